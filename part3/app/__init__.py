@@ -1,10 +1,12 @@
-from flask import Flask
+from flask import Flask, g
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from app.persistence.replica import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
 bcrypt = Bcrypt()
 
@@ -15,14 +17,47 @@ from app.api.v1.views import api as health_blueprint
 def create_app(config_class):
     app = Flask(__name__)
     app.config.from_object(config_class)
-    CORS(app, origins=["http://127.0.0.1:5500", "http://localhost:5500", "http://127.0.0.1:8000", "http://localhost:8000"], supports_credentials=True, allow_headers=["Content-Type", "Authorization"])
+    CORS(
+        app,
+        origins=[
+            "http://127.0.0.1:5500",
+            "http://localhost:5500",
+            "http://127.0.0.1:8000",
+            "http://localhost:8000",
+        ],
+        supports_credentials=True,
+        allow_headers=["Content-Type", "Authorization"],
+        expose_headers=["X-Total-Count", "X-Next-Cursor", "Link"],
+    )
 
     db.init_app(app)
+    with app.app_context():
+        from app.models import ids
+
+        ids.configure_engine(db.engine, app.config.get("ID_STORAGE", "string"))
     bcrypt.init_app(app)
     jwt.init_app(app)
 
+    from app.persistence import cache, sqlite
+    from app.services import hashing, rate_limit, token_blocklist
+
+    cache.init_app(app)
+    cache.register(db.session)
+    hashing.init_app(app)
+    rate_limit.init_app(app)
+    sqlite.init_app(app)
+    token_blocklist.init_app(app, jwt)
+
     with app.app_context():
+        from app.persistence import schema, search
+
         db.create_all()
+        schema.upgrade(db.engine)
+        search.create_index(db.engine)
+
+    from app.persistence import replica
+
+    replica.init_app(app, db)
 
     @app.route("/")
     def index():
@@ -31,9 +66,18 @@ def create_app(config_class):
     init_api(app)
     app.register_blueprint(health_blueprint)
 
+    from app import compression
+
+    compression.init_app(app)
+
+    @app.teardown_request
+    def _drop_entity_loaders(exc):
+        g.pop("entity_loaders", None)
+
     with app.app_context():
         _seed_admin_if_needed()
         _seed_places_if_needed()
+        _rebuild_clusters_if_needed()
 
     return app
 
@@ -57,48 +101,57 @@ def _seed_admin_if_needed():
         pass
 
 
+def _rebuild_clusters_if_needed():
+    from app.services import facade
+
+    if facade.place_clusters_missing():
+        facade.rebuild_place_clusters()
+
+
 def _seed_places_if_needed():
     from app.services import facade
 
-    if facade.get_all_places():
-        return
     try:
+        if facade.get_all_places():
+            return
         admin = facade.get_user_by_email("admin@example.com")
         if not admin:
             return
-        amenity = facade.create_amenity({"name": "Wi-Fi"})
-        facade.create_place(
-            {
-                "title": "Cozy Apartment in NYC",
-                "description": "Located in the heart of Manhattan, close to everything.",
-                "price": 80,
-                "latitude": 40.7128,
-                "longitude": -74.0060,
-                "owner_id": admin.id,
-                "amenities": [amenity.id],
-            }
-        )
-        facade.create_place(
-            {
-                "title": "Beach House in Miami",
-                "description": "Enjoy the sun and ocean views from your balcony.",
-                "price": 150,
-                "latitude": 25.7617,
-                "longitude": -80.1918,
-                "owner_id": admin.id,
-                "amenities": [amenity.id],
-            }
-        )
-        facade.create_place(
-            {
-                "title": "Budget Room",
-                "description": "Simple and affordable.",
-                "price": 8,
-                "latitude": 40.7,
-                "longitude": -74.0,
-                "owner_id": admin.id,
-                "amenities": [amenity.id],
-            }
-        )
+        with facade.unit_of_work():
+            amenity = facade.create_amenity({"name": "Wi-Fi"})
+            facade.create_place(
+                {
+                    "title": "Cozy Apartment in NYC",
+                    "description": "Located in the heart of Manhattan,"
+                    " close to everything.",
+                    "price": 80,
+                    "latitude": 40.7128,
+                    "longitude": -74.0060,
+                    "owner_id": admin.id,
+                    "amenities": [amenity.id],
+                }
+            )
+            facade.create_place(
+                {
+                    "title": "Beach House in Miami",
+                    "description": "Enjoy the sun and ocean views from your balcony.",
+                    "price": 150,
+                    "latitude": 25.7617,
+                    "longitude": -80.1918,
+                    "owner_id": admin.id,
+                    "amenities": [amenity.id],
+                }
+            )
+            facade.create_place(
+                {
+                    "title": "Budget Room",
+                    "description": "Simple and affordable.",
+                    "price": 8,
+                    "latitude": 40.7,
+                    "longitude": -74.0,
+                    "owner_id": admin.id,
+                    "amenities": [amenity.id],
+                }
+            )
     except Exception:
         pass
@@ -1,6 +1,19 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt
 
+from app.api.v1.caching import conditional
+from app.api.v1.params import (
+    FIELDS_DOC,
+    STREAM_DOC,
+    bulk_items,
+    bulk_status,
+    fields_arg,
+    fieldset,
+    page_args,
+    page_headers,
+    stream_args,
+)
+from app.api.v1.streaming import batch_size, stream_format, stream_response
 from app.services import facade
 
 api = Namespace("amenities", description="Amenity operations")
@@ -23,6 +36,14 @@ amenity_output = api.model(
 )
 
 
+AMENITY_FIELDS = {
+    "id": lambda a: a.id,
+    "name": lambda a: a.name,
+    "created_at": lambda a: a.created_at,
+    "updated_at": lambda a: a.updated_at,
+}
+
+
 def _is_admin():
     claims = get_jwt()
     return bool(claims.get("is_admin", False))
@@ -46,20 +67,77 @@ class AmenityList(Resource):
             return {"error": str(e)}, 400
         return amenity.to_dict(), 201
 
-    @api.marshal_list_with(amenity_output)
+    @api.doc(params={
+        "limit": "Maximum number of amenities to return",
+        "cursor": "X-Next-Cursor value from the previous page",
+        "sort": "created_at, prefixed with - for descending order",
+        "fields": FIELDS_DOC,
+        "stream": STREAM_DOC,
+    })
+    @api.response(200, "List of amenities", [amenity_output])
+    @conditional(api, "amenities")
     def get(self):
-        amenities = facade.get_all_amenities()
-        return [a.to_dict() for a in amenities], 200
+        fmt = stream_format()
+        try:
+            fields = fields_arg(AMENITY_FIELDS)
+            if fmt:
+                batches = facade.stream_amenities(
+                    batch_size(), **stream_args(), fields=fields
+                )
+                return stream_response(
+                    batches,
+                    lambda amenities: [
+                        fieldset(a, AMENITY_FIELDS, fields) for a in amenities
+                    ],
+                    fmt,
+                )
+            page = facade.get_amenities_page(**page_args(), fields=fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return (
+            [fieldset(a, AMENITY_FIELDS, fields) for a in page.items],
+            200,
+            page_headers(page),
+        )
+
+
+@api.route("/bulk")
+class AmenityBulk(Resource):
+    @api.doc(
+        description="Create up to BULK_MAX_ITEMS amenities from a JSON array"
+        " in one transaction"
+    )
+    @api.response(201, "All amenities created")
+    @api.response(207, "Some amenities created; see errors")
+    @api.response(400, "No amenity could be created")
+    @jwt_required()
+    def post(self):
+        if not _is_admin():
+            return {"error": "Admin privileges required"}, 403
+        try:
+            items = bulk_items(api.payload)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        created, errors = facade.create_amenities(items)
+        body = {"created": [a.to_dict() for a in created], "errors": errors}
+        return body, bulk_status(created, errors)
 
 
 @api.route("/<string:amenity_id>")
 class AmenityResource(Resource):
-    @api.marshal_with(amenity_output)
+    @api.doc(params={"fields": FIELDS_DOC})
+    @api.response(200, "Amenity details", amenity_output)
+    @conditional(api, "amenities")
     def get(self, amenity_id):
+        try:
+            fields = fields_arg(AMENITY_FIELDS)
+        except ValueError as e:
+            return {"error": str(e)}, 400
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {"error": "Amenity not found"}, 404
-        return amenity.to_dict(), 200
+        return fieldset(amenity, AMENITY_FIELDS, fields), 200
 
     @jwt_required()
     def put(self, amenity_id):
@@ -1,6 +1,17 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
-from app.services import facade
+from flask_jwt_extended import (
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+    jwt_required,
+    get_jwt_identity,
+    get_jwt,
+)
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from app.api.v1.ratelimit import throttle_logins
+from app.services import facade, token_blocklist
 
 api = Namespace('auth', description='Authentication operations')
 
@@ -16,12 +27,42 @@ register_model = api.model('Register', {
     'password': fields.String(required=True),
 })
 
+logout_model = api.model(
+    'Logout',
+    {
+        'refresh_token': fields.String(
+            description='Refresh token to revoke along with the access token'
+        )
+    },
+)
+
+# Claims copied from a refresh token onto the access tokens minted from it.
+CARRIED_CLAIMS = ('is_admin',)
+
+
+def issue_tokens(user):
+    """Access and refresh tokens for ``user``, sharing the same claims."""
+    identity = str(user.id)
+    claims = {"is_admin": user.is_admin}
+    return {
+        'access_token': create_access_token(
+            identity=identity, additional_claims=claims
+        ),
+        'refresh_token': create_refresh_token(
+            identity=identity, additional_claims=claims
+        ),
+    }
+
 
 @api.route('/register')
 class Register(Resource):
     @api.expect(register_model)
+    @api.response(429, 'Too many attempts from this address or for this email')
+    @throttle_logins
     def post(self):
         data = api.payload or {}
+        if not isinstance(data, dict):
+            return {'error': 'Request body must be a JSON object'}, 400
         required = ['first_name', 'last_name', 'email', 'password']
         missing = [f for f in required if not data.get(f)]
         if missing:
@@ -30,11 +71,7 @@ class Register(Resource):
             return {'error': 'Email already exists'}, 400
         try:
             user = facade.create_user(data)
-            token = create_access_token(
-                identity=str(user.id),
-                additional_claims={"is_admin": user.is_admin}
-            )
-            return {'access_token': token}, 201
+            return issue_tokens(user), 201
         except ValueError as e:
             return {'error': str(e)}, 400
 
@@ -42,26 +79,64 @@ class Register(Resource):
 @api.route('/login')
 class Login(Resource):
     @api.expect(login_model)
+    @api.response(429, 'Too many attempts from this address or for this email')
+    @throttle_logins
     def post(self):
         credentials = api.payload or {}
+        if not isinstance(credentials, dict):
+            return {'error': 'Request body must be a JSON object'}, 400
         email = credentials.get('email')
         password = credentials.get('password')
 
         if not email or not password:
             return {'error': 'Missing email or password'}, 400
 
-        user = facade.get_user_by_email(email)
+        user = facade.authenticate(email, password)
 
-        if not user or not user.verify_password(password):
+        if not user:
             return {'error': 'Invalid credentials'}, 401
 
+        return issue_tokens(user), 200
+
+
+@api.route('/refresh')
+class Refresh(Resource):
+    @jwt_required(refresh=True)
+    def post(self):
+        """Mint a new access token from a refresh token, without a password check"""
+        claims = get_jwt()
         access_token = create_access_token(
-            identity=str(user.id),
-            additional_claims={"is_admin": user.is_admin}
+            identity=get_jwt_identity(),
+            additional_claims={
+                name: claims[name] for name in CARRIED_CLAIMS if name in claims
+            },
         )
-        
         return {'access_token': access_token}, 200
 
+
+@api.route('/logout')
+class Logout(Resource):
+    @api.expect(logout_model)
+    @jwt_required(verify_type=False)
+    def post(self):
+        """Revoke the presented token, and the refresh token given in the body"""
+        current = get_jwt()
+        body = request.get_json(silent=True) or {}
+        if not isinstance(body, dict):
+            return {'error': 'Request body must be a JSON object'}, 400
+        refresh_token = body.get('refresh_token')
+        if refresh_token:
+            try:
+                refresh = decode_token(refresh_token)
+            except (PyJWTError, JWTExtendedException) as e:
+                return {'error': str(e)}, 400
+            same_user = refresh.get('sub') == current.get('sub')
+            if refresh.get('type') != 'refresh' or not same_user:
+                return {'error': 'refresh_token does not belong to this session'}, 400
+            token_blocklist.revoke(refresh)
+        token_blocklist.revoke(current)
+        return {'message': 'Logged out'}, 200
+
 @api.route('/protected')
 class ProtectedResource(Resource):
     @jwt_required()
@@ -0,0 +1,20 @@
+"""Answer requests that find the password hashing pool saturated with 503.
+
+Installed on the Api as a decorator outside ``transactional``, so the
+request's writes are rolled back first. Returning the response here rather
+than through an Api error handler keeps a login storm from also logging a
+traceback per rejected request.
+"""
+from functools import wraps
+
+from app.services.hashing import HashingBusy
+
+
+def shed_when_busy(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except HashingBusy as e:
+            return {"error": str(e)}, 503, {"Retry-After": str(e.retry_after)}
+    return wrapper
@@ -0,0 +1,103 @@
+"""Conditional GET support for the read endpoints.
+
+ETag and Last-Modified are derived from the version counters of the tables
+a response is built from (see app.persistence.versions) rather than from
+the body, so a matching If-None-Match or If-Modified-Since is answered with
+a 304 before the handler queries or serializes anything.
+
+HTTP dates have whole seconds while the versions are timestamped to the
+microsecond, so If-Modified-Since only matches when the tables last changed
+before the second it names. Last-Modified advertises the end of the second
+of the last change once that second is over (no later write can fall inside
+it), so a client sending its value back gets its 304.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import Response, current_app, request
+from flask_restx.utils import unpack
+from werkzeug.http import http_date
+
+from app.api.v1.streaming import stream_format
+from app.compression import etag_variants
+from app.services import facade
+
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+def cache_control(namespace):
+    """Cache-Control policy configured for a namespace (CACHE_CONTROL setting)."""
+    policies = current_app.config.get("CACHE_CONTROL") or {}
+    return policies.get(namespace.name, DEFAULT_CACHE_CONTROL)
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    if request.if_none_match:
+        # Compressed responses carry the coding in their ETag (see app.compression).
+        return any(
+            request.if_none_match.contains_weak(tag) for tag in etag_variants(etag)
+        )
+    if request.if_modified_since and last_modified:
+        return last_modified < request.if_modified_since
+    return False
+
+
+def _last_modified_header(changed):
+    second = changed.replace(microsecond=0)
+    if second + timedelta(seconds=1) <= datetime.now(timezone.utc):
+        second += timedelta(seconds=1)
+    return http_date(second)
+
+
+def conditional(namespace, *tables, per_user=False):
+    """Add validators to successful GETs and short-circuit them with 304.
+
+    ``tables`` are every table the response reads from. Set ``per_user`` on
+    endpoints whose output depends on the caller, so identities never share
+    an ETag; such endpoints must verify the JWT, and refuse callers who may
+    not read the resource, before this decorator runs, or a 304 would answer
+    them instead of the 403.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            token, last_modified = facade.get_table_versions(tables)
+            parts = [request.full_path, token, stream_format()]
+            if per_user:
+                from flask_jwt_extended import get_jwt, get_jwt_identity
+
+                parts += [get_jwt_identity(), bool(get_jwt().get("is_admin"))]
+            key = "|".join(map(str, parts)).encode("utf-8")
+            etag = hashlib.sha256(key).hexdigest()[:32]
+
+            headers = {
+                "ETag": f'"{etag}"',
+                "Cache-Control": cache_control(namespace),
+                "Vary": "Accept",
+            }
+            if last_modified:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+                headers["Last-Modified"] = _last_modified_header(last_modified)
+
+            if _not_modified(etag, last_modified):
+                response = Response(status=304, headers=headers)
+                if current_app.config.get("COMPRESS_ENABLED", True):
+                    # Same Vary as the 200 it stands for (see app.compression).
+                    response.vary.add("Accept-Encoding")
+                return response
+
+            rv = func(*args, **kwargs)
+            if isinstance(rv, Response):
+                # Streamed listings are returned as ready-made responses.
+                if rv.status_code == 200:
+                    rv.headers.update(headers)
+                return rv
+            data, code, extra = unpack(rv)
+            if code == 200:
+                extra = dict(extra or {})
+                extra.update(headers)
+            return data, code, extra
+        return wrapper
+    return decorator
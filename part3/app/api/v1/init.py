@@ -3,10 +3,14 @@ from app.api.v1.users import api as users_ns
 from app.api.v1.amenities import api as amenities_ns
 from app.api.v1.places import api as places_ns
 from app.api.v1.reviews import api as reviews_ns
-from app.api.v1.auth import api as auth_ns 
+from app.api.v1.auth import api as auth_ns
+from app.api.v1.representations import output_json
+from app.api.v1.backpressure import shed_when_busy
+from app.api.v1.transactions import transactional
 
 def init_api(app):
-    api = Api(app, doc="/api/v1/")
+    api = Api(app, doc="/api/v1/", decorators=[transactional, shed_when_busy])
+    api.representations["application/json"] = output_json
     api.add_namespace(users_ns, path="/api/v1/users")
     api.add_namespace(amenities_ns, path="/api/v1/amenities")
     api.add_namespace(places_ns, path="/api/v1/places")
@@ -0,0 +1,142 @@
+import math
+from urllib.parse import urlencode
+
+from flask import current_app, request
+
+FIELDS_DOC = "Comma-separated fields to return (default: all)"
+STREAM_DOC = (
+    "1 to stream every row as one JSON array (or send Accept: application/x-ndjson)"
+)
+
+
+def limit_arg():
+    """Page size from the query string, defaulted and capped by the config."""
+    default_limit = current_app.config.get("PAGE_DEFAULT_LIMIT", 100)
+    max_limit = current_app.config.get("PAGE_MAX_LIMIT", 500)
+
+    raw_limit = request.args.get("limit")
+    if raw_limit is None or raw_limit == "":
+        return default_limit
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, max_limit)
+
+
+def page_args():
+    """Read limit, cursor and sort for a paginated listing from the query string."""
+    return {
+        "limit": limit_arg(),
+        "cursor": request.args.get("cursor") or None,
+        "sort": request.args.get("sort") or None,
+    }
+
+
+def stream_args():
+    """Cursor and sort for a streamed listing, which has no page size."""
+    return {
+        "cursor": request.args.get("cursor") or None,
+        "sort": request.args.get("sort") or None,
+    }
+
+
+def int_arg(name, default=None):
+    """Optional integer query parameter; ValueError unless it is an integer."""
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+
+def float_arg(name):
+    """Optional float query parameter; ValueError unless it is a finite number."""
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+
+def required_float_arg(name):
+    value = float_arg(name)
+    if value is None:
+        raise ValueError(f"{name} is required")
+    return value
+
+
+def list_arg(name):
+    """Repeatable query parameter, also accepting comma-separated values."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v.strip() for v in raw.split(",") if v.strip())
+    return values
+
+
+def fields_arg(allowed):
+    """Field names requested with ``fields=``, or None for all of them.
+
+    ``allowed`` lists the fields the endpoint can return; anything else is
+    a ValueError.
+    """
+    names = list_arg("fields")
+    if not names:
+        return None
+    unknown = [n for n in names if n not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return set(names)
+
+
+def fieldset(obj, getters, fields=None):
+    """Serialize ``obj`` through {field: getter}, keeping only ``fields``.
+
+    Getters of fields that were not requested are not called, so their
+    columns and relationships are never read.
+    """
+    return {
+        name: get(obj)
+        for name, get in getters.items()
+        if fields is None or name in fields
+    }
+
+
+def page_headers(page):
+    """Headers describing a Page: total row count and where the next page is."""
+    headers = {"X-Total-Count": str(page.total)}
+    if page.next_cursor:
+        args = request.args.copy()
+        args["cursor"] = page.next_cursor
+        next_url = f"{request.base_url}?{urlencode(list(args.items(multi=True)))}"
+        headers["X-Next-Cursor"] = page.next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return headers
+
+
+def bulk_items(payload):
+    """The item list of a bulk request body, bounded by BULK_MAX_ITEMS."""
+    max_items = current_app.config.get("BULK_MAX_ITEMS", 1000)
+    if not isinstance(payload, list):
+        raise ValueError("Request body must be a JSON array")
+    if not payload:
+        raise ValueError("No items provided")
+    if len(payload) > max_items:
+        raise ValueError(f"At most {max_items} items per request")
+    return payload
+
+
+def bulk_status(created, errors):
+    """201 when every item succeeded, 207 when some did, 400 when none did."""
+    if not errors:
+        return 201
+    return 207 if created else 400
@@ -1,6 +1,27 @@
+from flask import current_app, request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
+from app.api.v1.caching import conditional
+from app.api.v1.params import (
+    FIELDS_DOC,
+    STREAM_DOC,
+    bulk_items,
+    bulk_status,
+    fields_arg,
+    fieldset,
+    float_arg,
+    int_arg,
+    limit_arg,
+    list_arg,
+    page_args,
+    page_headers,
+    required_float_arg,
+    stream_args,
+)
+from app.api.v1.reviews import REVIEW_FIELDS, serialize_review_batch, serialize_reviews
+from app.api.v1.streaming import batch_size, stream_format, stream_response
+from app.persistence.geo import cell_bounds, cluster_cell_degrees
 from app.services import facade
 
 api = Namespace("places", description="Place operations")
@@ -50,6 +71,47 @@ place_model = api.model(
 )
 
 
+def serialize_owner(owner):
+    if not owner:
+        return None
+    return {
+        "id": owner.id,
+        "first_name": owner.first_name,
+        "last_name": owner.last_name,
+        "email": owner.email,
+    }
+
+
+PLACE_FIELDS = {
+    "id": lambda p: p.id,
+    "title": lambda p: p.title,
+    "description": lambda p: p.description,
+    "price": lambda p: p.price,
+    "latitude": lambda p: p.latitude,
+    "longitude": lambda p: p.longitude,
+    "owner": lambda p: serialize_owner(p.owner),
+    "amenities": lambda p: [{"id": a.id, "name": a.name} for a in (p.amenities or [])],
+    "rating": lambda p: p.rating_summary(),
+    "created_at": lambda p: p.created_at,
+    "updated_at": lambda p: p.updated_at,
+}
+
+CLUSTER_FIELDS = ("latitude", "longitude", "count", "bounds")
+
+
+def serialize_place(place, fields=None):
+    return fieldset(place, PLACE_FIELDS, fields)
+
+
+def place_filters():
+    return {
+        "min_price": float_arg("min_price"),
+        "max_price": float_arg("max_price"),
+        "amenity_ids": list_arg("amenity"),
+        "owner_id": request.args.get("owner_id") or None,
+    }
+
+
 @api.route("/")
 class PlaceList(Resource):
     @api.expect(place_model)
@@ -76,79 +138,281 @@ class PlaceList(Resource):
                 "latitude": place.latitude,
                 "longitude": place.longitude,
                 "owner_id": place.owner_id,
-                "amenities": place.amenities,
+                "amenities": [{"id": a.id, "name": a.name} for a in place.amenities],
                 "created_at": place.created_at.isoformat(),
                 "updated_at": place.updated_at.isoformat(),
             }, 201
         except ValueError as e:
             return {"error": str(e)}, 400
 
+    @api.doc(params={
+        "limit": "Maximum number of places to return",
+        "cursor": "X-Next-Cursor value from the previous page",
+        "sort": "created_at, price or rating, prefixed with - for descending order",
+        "min_price": "Only places priced at or above this value",
+        "max_price": "Only places priced at or below this value",
+        "amenity": "Amenity ID (repeatable); places must have all of them",
+        "owner_id": "Only places owned by this user",
+        "fields": FIELDS_DOC,
+        "stream": STREAM_DOC,
+    })
     @api.response(200, "List of places retrieved successfully")
+    @api.response(400, "Invalid pagination or filter parameters")
+    @conditional(api, "places", "users", "amenities")
+    def get(self):
+        fmt = stream_format()
+        try:
+            fields = fields_arg(PLACE_FIELDS)
+            if fmt:
+                batches = facade.stream_places(
+                    batch_size(),
+                    **stream_args(),
+                    filters=place_filters(),
+                    fields=fields,
+                )
+                return stream_response(
+                    batches,
+                    lambda places: [serialize_place(p, fields) for p in places],
+                    fmt,
+                )
+            page = facade.get_places_page(
+                **page_args(), filters=place_filters(), fields=fields
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return [serialize_place(p, fields) for p in page.items], 200, page_headers(page)
+
+
+def _parse_coordinates(raw, count=None):
+    try:
+        values = [float(v) for v in raw.split(",")]
+    except ValueError:
+        raise ValueError("Coordinates must be numbers")
+    if count is not None and len(values) != count:
+        raise ValueError(f"Expected {count} comma-separated numbers")
+    return values
+
+
+@api.route("/bulk")
+class PlaceBulk(Resource):
+    @api.doc(
+        description="Create up to BULK_MAX_ITEMS places from a JSON array"
+        " in one transaction"
+    )
+    @api.response(201, "All places created")
+    @api.response(207, "Some places created; see errors")
+    @api.response(400, "No place could be created")
+    @jwt_required()
+    def post(self):
+        try:
+            items = bulk_items(api.payload)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        current_user_id = get_jwt_identity()
+        admin = _is_admin()
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            if not admin:
+                item["owner_id"] = current_user_id
+            else:
+                item.setdefault("owner_id", current_user_id)
+
+        created, errors = facade.create_places(items)
+        body = {"created": [serialize_place(p) for p in created], "errors": errors}
+        return body, bulk_status(created, errors)
+
+
+@api.route("/amenities/bulk")
+class PlaceAmenityBulk(Resource):
+    @api.doc(
+        description="Link and unlink amenities:"
+        ' {"link": [{"place_id", "amenity_id"}], "unlink": [...]}'
+    )
+    @api.response(200, "All links updated")
+    @api.response(207, "Some links updated; see errors")
+    @api.response(400, "No link could be updated")
+    @jwt_required()
+    def post(self):
+        data = api.payload
+        if not isinstance(data, dict):
+            return {"error": "Request body must be a JSON object"}, 400
+        link, unlink = data.get("link") or [], data.get("unlink") or []
+        if not isinstance(link, list) or not isinstance(unlink, list):
+            return {"error": "link and unlink must be JSON arrays"}, 400
+        try:
+            bulk_items(link + unlink)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        owner_id = None if _is_admin() else get_jwt_identity()
+        linked, unlinked, errors = facade.update_amenity_links(
+            link, unlink, owner_id=owner_id
+        )
+        if not errors:
+            status = 200
+        else:
+            status = 207 if len(errors) < len(link) + len(unlink) else 400
+        return {"linked": linked, "unlinked": unlinked, "errors": errors}, status
+
+
+@api.route("/search")
+class PlaceSearch(Resource):
+    @api.doc(params={
+        "q": "Words to find in titles and descriptions",
+        "limit": "Maximum number of places to return",
+        "cursor": "X-Next-Cursor value from the previous page",
+        "fields": FIELDS_DOC,
+    })
+    @api.response(200, "Matching places, best match first")
+    @api.response(400, "Invalid search query")
+    @conditional(api, "places", "users", "amenities")
     def get(self):
-        places = facade.get_all_places()
+        try:
+            fields = fields_arg([*PLACE_FIELDS, "search"])
+            page = facade.search_places(
+                request.args.get("q", ""), limit_arg(), request.args.get("cursor"),
+                fields=fields,
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
         result = []
-        for p in places:
-            owner = facade.get_user(p.owner_id)
-            owner_data = None
-            if owner:
-                owner_data = {
-                    "id": owner.id,
-                    "first_name": owner.first_name,
-                    "last_name": owner.last_name,
-                    "email": owner.email,
+        for place, hit in page.items:
+            item = serialize_place(place, fields)
+            if fields is None or "search" in fields:
+                item["search"] = {
+                    "rank": hit["rank"],
+                    "title": hit["title"],
+                    "description": hit["description"],
                 }
-            amenity_items = [
-                {"id": a.id, "name": a.name} for a in (p.amenities or [])
-            ]
+            result.append(item)
+        return result, 200, page_headers(page)
+
+
+@api.route("/near")
+class PlaceNear(Resource):
+    @api.doc(params={
+        "lat": "Latitude of the search centre",
+        "lon": "Longitude of the search centre",
+        "radius_km": "Search radius in kilometres (default 10)",
+        "limit": "Maximum number of places to return",
+        "fields": FIELDS_DOC,
+    })
+    @api.response(200, "Places sorted by distance")
+    @api.response(400, "Invalid search parameters")
+    @conditional(api, "places", "users", "amenities")
+    def get(self):
+        try:
+            fields = fields_arg([*PLACE_FIELDS, "distance_km"])
+            lat = required_float_arg("lat")
+            lon = required_float_arg("lon")
+            radius_km = float_arg("radius_km")
+            radius_km = 10.0 if radius_km is None else radius_km
+            if radius_km <= 0:
+                raise ValueError("radius_km must be positive")
+            max_radius = current_app.config.get("GEO_MAX_RADIUS_KM", 500.0)
+            if radius_km > max_radius:
+                raise ValueError(f"radius_km cannot exceed {max_radius:g}")
+            results = facade.get_places_near(lat, lon, radius_km, limit_arg(), fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        result = []
+        for place, distance in results:
+            item = serialize_place(place, fields)
+            if fields is None or "distance_km" in fields:
+                item["distance_km"] = round(distance, 3)
+            result.append(item)
+        return result, 200
+
+
+@api.route("/within")
+class PlaceWithin(Resource):
+    @api.doc(
+        params={
+            "bbox": "west,south,east,north in degrees"
+            " (west > east crosses the antimeridian)",
+            "polygon": "lat,lon;lat,lon;... vertices of a simple polygon",
+            "limit": "Maximum number of places to return",
+            "fields": FIELDS_DOC,
+        }
+    )
+    @api.response(200, "Places inside the area")
+    @api.response(400, "Invalid area")
+    @conditional(api, "places", "users", "amenities")
+    def get(self):
+        bbox = request.args.get("bbox")
+        polygon = request.args.get("polygon")
+        try:
+            fields = fields_arg(PLACE_FIELDS)
+            if bool(bbox) == bool(polygon):
+                raise ValueError("Provide exactly one of bbox or polygon")
+            if bbox:
+                west, south, east, north = _parse_coordinates(bbox, count=4)
+                places = facade.get_places_in_bbox(
+                    west, south, east, north, limit_arg(), fields
+                )
+            else:
+                points = [
+                    tuple(_parse_coordinates(vertex, count=2))
+                    for vertex in polygon.split(";") if vertex.strip()
+                ]
+                places = facade.get_places_in_polygon(points, limit_arg(), fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return [serialize_place(p, fields) for p in places], 200
+
+
+@api.route("/clusters")
+class PlaceClusters(Resource):
+    @api.doc(params={
+        "bbox": "Viewport as west,south,east,north in degrees",
+        "zoom": "Map zoom level (0 = whole world)",
+        "fields": "Comma-separated cluster fields to return (default: all)",
+    })
+    @api.response(200, "Cluster centroids and counts for the viewport")
+    @api.response(400, "Invalid viewport")
+    @conditional(api, "places")
+    def get(self):
+        try:
+            west, south, east, north = _parse_coordinates(
+                request.args.get("bbox", ""), count=4
+            )
+            zoom = int_arg("zoom", 0)
+            if zoom < 0:
+                raise ValueError("zoom must not be negative")
+            fields = fields_arg(CLUSTER_FIELDS)
+            level, clusters = facade.get_place_clusters(west, south, east, north, zoom)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        size = cluster_cell_degrees(level)
+        result = []
+        for c in clusters:
+            min_lat, min_lon, max_lat, max_lon = cell_bounds(c.cell, size)
+            item = c.to_dict(bounds=(min_lon, min_lat, max_lon, max_lat))
             result.append(
-                {
-                    "id": p.id,
-                    "title": p.title,
-                    "description": p.description,
-                    "price": p.price,
-                    "latitude": p.latitude,
-                    "longitude": p.longitude,
-                    "owner": owner_data,
-                    "amenities": amenity_items,
-                    "created_at": p.created_at.isoformat(),
-                    "updated_at": p.updated_at.isoformat(),
-                }
+                {k: v for k, v in item.items() if fields is None or k in fields}
             )
-        return result, 200
+        return {"zoom": zoom, "level": level, "clusters": result}, 200
 
 
 @api.route("/<place_id>")
 class PlaceResource(Resource):
+    @api.doc(params={"fields": FIELDS_DOC})
     @api.response(200, "Place details retrieved successfully")
+    @api.response(400, "Unknown field requested")
     @api.response(404, "Place not found")
+    @conditional(api, "places", "users", "amenities")
     def get(self, place_id):
+        try:
+            fields = fields_arg(PLACE_FIELDS)
+        except ValueError as e:
+            return {"error": str(e)}, 400
         place = facade.get_place(place_id)
         if not place:
             return {"error": "Place not found"}, 404
-        owner = facade.get_user(place.owner_id)
-        owner_data = None
-        if owner:
-            owner_data = {
-                "id": owner.id,
-                "first_name": owner.first_name,
-                "last_name": owner.last_name,
-                "email": owner.email,
-            }
-        amenity_items = [
-            {"id": a.id, "name": a.name} for a in (place.amenities or [])
-        ]
-        return {
-            "id": place.id,
-            "title": place.title,
-            "description": place.description,
-            "price": place.price,
-            "latitude": place.latitude,
-            "longitude": place.longitude,
-            "owner": owner_data,
-            "amenities": amenity_items,
-            "created_at": place.created_at.isoformat(),
-            "updated_at": place.updated_at.isoformat(),
-        }, 200
+        return serialize_place(place, fields), 200
 
     @api.expect(place_model)
     @api.response(200, "Place updated successfully")
@@ -190,3 +454,36 @@ class PlaceResource(Resource):
         facade.delete_place(place_id)
         return {}, 204
 
+
+@api.route("/<place_id>/reviews")
+class PlaceReviewList(Resource):
+    @api.doc(params={
+        "limit": "Maximum number of reviews to return",
+        "cursor": "X-Next-Cursor value from the previous page",
+        "sort": "created_at or rating, prefixed with - for descending order",
+        "fields": FIELDS_DOC,
+        "stream": STREAM_DOC,
+    })
+    @api.response(200, "Reviews of the place")
+    @api.response(400, "Invalid pagination parameters")
+    @api.response(404, "Place not found")
+    @conditional(api, "reviews", "users", "places")
+    def get(self, place_id):
+        if not facade.get_place(place_id):
+            return {"error": "Place not found"}, 404
+        fmt = stream_format()
+        try:
+            fields = fields_arg(REVIEW_FIELDS)
+            if fmt:
+                batches = facade.stream_reviews(
+                    batch_size(), **stream_args(), fields=fields, place_id=place_id
+                )
+                return stream_response(
+                    batches,
+                    lambda reviews: serialize_review_batch(reviews, fields),
+                    fmt,
+                )
+            page = facade.get_place_reviews_page(place_id, **page_args(), fields=fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return serialize_reviews(page.items, fields), 200, page_headers(page)
@@ -0,0 +1,36 @@
+"""Throttle password endpoints before they reach bcrypt.
+
+``throttle_logins`` charges the attempt to the client IP and to the email
+in the JSON body (by IP alone when the body is not an object), answering
+429 with Retry-After once either bucket is empty. Allowed responses carry
+the RateLimit-* headers as well, so clients can slow down before they are
+refused.
+
+The IP is ``request.remote_addr``; behind a reverse proxy, wrap the app in
+werkzeug's ProxyFix so that is the real client address.
+"""
+from functools import wraps
+
+from flask import request
+from flask_restx.utils import unpack
+
+from app.services import rate_limit
+
+
+def throttle_logins(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        body = request.get_json(silent=True)
+        email = body.get("email") if isinstance(body, dict) else None
+        if not isinstance(email, str):
+            email = None
+        decision = rate_limit.check_login(request.remote_addr, email)
+        if decision is None:
+            return func(*args, **kwargs)
+        headers = decision.headers()
+        if not decision.allowed:
+            return {"error": "Too many attempts, retry later"}, 429, headers
+        data, code, extra = unpack(func(*args, **kwargs))
+        headers.update(extra or {})
+        return data, code, headers
+    return wrapper
@@ -0,0 +1,41 @@
+"""JSON encoding of API responses.
+
+Responses are encoded with orjson when it is installed and with the
+standard library otherwise. Both write datetimes in ISO 8601 (the same text
+as ``isoformat()``), so serializers can return them as they are and leave
+the formatting to the encoder.
+"""
+import json
+from datetime import date
+
+from flask import current_app, make_response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data, indent=False):
+    """``data`` encoded as UTF-8 JSON bytes."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    return json.dumps(
+        data, default=_default, ensure_ascii=False, indent=2 if indent else None
+    ).encode("utf-8")
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTX representation for application/json, indented in debug mode."""
+    resp = make_response(dumps(data, indent=current_app.debug) + b"\n", code)
+    resp.headers.extend(headers or {})
+    return resp
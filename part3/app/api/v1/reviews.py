@@ -1,7 +1,21 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
+from app.api.v1.caching import conditional
+from app.api.v1.params import (
+    FIELDS_DOC,
+    STREAM_DOC,
+    bulk_items,
+    bulk_status,
+    fields_arg,
+    fieldset,
+    page_args,
+    page_headers,
+    stream_args,
+)
+from app.api.v1.streaming import batch_size, stream_format, stream_response
 from app.services import facade
+from app.services.loader import reset_request_loaders
 
 api = Namespace("reviews", description="Review operations")
 
@@ -22,13 +36,44 @@ review_input = api.model(
 )
 
 
-def serialize_review(review):
-    user = facade.get_user(review.user_id)
-    place = facade.get_place(review.place_id)
-    return review.to_dict(
-        user=user.to_dict() if user else None,
-        place=place.to_dict() if place else None,
-    )
+def _load_dict(loader, obj_id):
+    obj = loader().load(obj_id)
+    return obj.to_dict() if obj else None
+
+
+REVIEW_FIELDS = {
+    "id": lambda r: r.id,
+    "text": lambda r: r.text,
+    "rating": lambda r: r.rating,
+    "user_id": lambda r: r.user_id,
+    "place_id": lambda r: r.place_id,
+    "user": lambda r: _load_dict(facade.user_loader, r.user_id),
+    "place": lambda r: _load_dict(facade.place_loader, r.place_id),
+    "created_at": lambda r: r.created_at,
+    "updated_at": lambda r: r.updated_at,
+}
+
+
+def serialize_review(review, fields=None):
+    return fieldset(review, REVIEW_FIELDS, fields)
+
+
+def serialize_reviews(reviews, fields=None):
+    """Serialize a list of reviews with one query per referenced entity type."""
+    if fields is None or "user" in fields:
+        facade.user_loader().want(r.user_id for r in reviews)
+    if fields is None or "place" in fields:
+        facade.place_loader().want(r.place_id for r in reviews)
+    return [serialize_review(r, fields) for r in reviews]
+
+
+def serialize_review_batch(reviews, fields=None):
+    """serialize_reviews for one batch of a stream.
+
+    Users and places loaded for earlier batches are forgotten first.
+    """
+    reset_request_loaders()
+    return serialize_reviews(reviews, fields)
 
 
 @api.route("/")
@@ -51,26 +96,74 @@ class ReviewList(Resource):
         if not admin and data.get("user_id") != current_user_id:
             return {"error": "Unauthorized action"}, 403
 
-        if not facade.get_user(data["user_id"]):
-            return {"error": "User not found"}, 400
-        if not facade.get_place(data["place_id"]):
-            return {"error": "Place not found"}, 400
-
-        review = facade.create_review(data)
+        try:
+            review = facade.create_review(data)
+        except ValueError as e:
+            return {"error": str(e)}, 400
         return serialize_review(review), 201
 
+    @api.doc(params={
+        "limit": "Maximum number of reviews to return",
+        "cursor": "X-Next-Cursor value from the previous page",
+        "sort": "created_at or rating, prefixed with - for descending order",
+        "fields": FIELDS_DOC,
+        "stream": STREAM_DOC,
+    })
+    @conditional(api, "reviews", "users", "places")
     def get(self):
-        reviews = facade.get_all_reviews()
-        return [serialize_review(r) for r in reviews], 200
+        fmt = stream_format()
+        try:
+            fields = fields_arg(REVIEW_FIELDS)
+            if fmt:
+                batches = facade.stream_reviews(
+                    batch_size(), **stream_args(), fields=fields
+                )
+                return stream_response(
+                    batches,
+                    lambda reviews: serialize_review_batch(reviews, fields),
+                    fmt,
+                )
+            page = facade.get_reviews_page(**page_args(), fields=fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return serialize_reviews(page.items, fields), 200, page_headers(page)
+
+
+@api.route("/bulk")
+class ReviewBulk(Resource):
+    @api.doc(
+        description="Create up to BULK_MAX_ITEMS reviews from a JSON array"
+        " in one transaction"
+    )
+    @api.response(201, "All reviews created")
+    @api.response(207, "Some reviews created; see errors")
+    @api.response(400, "No review could be created")
+    @jwt_required()
+    def post(self):
+        try:
+            items = bulk_items(api.payload)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        author_id = None if _is_admin() else get_jwt_identity()
+        created, errors = facade.create_reviews(items, author_id=author_id)
+        body = {"created": serialize_reviews(created), "errors": errors}
+        return body, bulk_status(created, errors)
 
 
 @api.route("/<string:review_id>")
 class ReviewResource(Resource):
+    @api.doc(params={"fields": FIELDS_DOC})
+    @conditional(api, "reviews", "users", "places")
     def get(self, review_id):
+        try:
+            fields = fields_arg(REVIEW_FIELDS)
+        except ValueError as e:
+            return {"error": str(e)}, 400
         review = facade.get_review(review_id)
         if not review:
             return {"error": "Review not found"}, 404
-        return serialize_review(review), 200
+        return serialize_review(review, fields), 200
 
     @jwt_required()
     def put(self, review_id):
@@ -95,12 +188,15 @@ class ReviewResource(Resource):
         if not admin and review.user_id != current_user_id:
             return {"error": "Unauthorized action"}, 403
 
-        if "user_id" in data and not facade.get_user(data["user_id"]):
+        if "user_id" in data and not facade.user_loader().load(data["user_id"]):
             return {"error": "User not found"}, 400
-        if "place_id" in data and not facade.get_place(data["place_id"]):
+        if "place_id" in data and not facade.place_loader().load(data["place_id"]):
             return {"error": "Place not found"}, 400
 
-        updated = facade.update_review(review_id, data)
+        try:
+            updated = facade.update_review(review_id, data)
+        except ValueError as e:
+            return {"error": str(e)}, 400
         return serialize_review(updated), 200
 
     @jwt_required()
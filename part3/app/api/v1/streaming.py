@@ -0,0 +1,50 @@
+"""Streamed responses for the list endpoints.
+
+A listing is streamed instead of paginated when the client sends
+``Accept: application/x-ndjson`` (one JSON object per line) or ``stream=1``
+(a single JSON array). Rows are read with yield_per and serialized one
+batch at a time, so memory stays flat however many rows match.
+"""
+from flask import Response, current_app, request, stream_with_context
+
+from app.api.v1.representations import dumps
+
+NDJSON = "application/x-ndjson"
+
+
+def stream_format():
+    """"ndjson" or "json" when the client asked for a stream, otherwise None."""
+    if request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON:
+        return "ndjson"
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        return "json"
+    return None
+
+
+def batch_size():
+    return current_app.config.get("STREAM_BATCH_SIZE", 500)
+
+
+def stream_response(batches, serialize, fmt):
+    """Response writing ``serialize(batch)`` for each batch as it is produced.
+
+    ``batches`` must already be validated (see iter_batches), since a
+    streamed response cannot turn into an error once it has started.
+    """
+    def ndjson():
+        for batch in batches:
+            yield b"".join(dumps(item) + b"\n" for item in serialize(batch))
+
+    def array():
+        separator = b"["
+        for batch in batches:
+            items = serialize(batch)
+            if items:
+                yield separator + b",".join(dumps(item) for item in items)
+                separator = b","
+        yield b"[]" if separator == b"[" else b"]"
+
+    body, mimetype = (
+        (ndjson(), NDJSON) if fmt == "ndjson" else (array(), "application/json")
+    )
+    return Response(stream_with_context(body), mimetype=mimetype)
@@ -0,0 +1,35 @@
+"""Run every write request of the API as one unit of work.
+
+Installed on the Api as a decorator, so each POST, PUT or DELETE commits at
+most once, after the handler has built its response. Error responses and
+exceptions roll the whole request back, including writes made before the
+handler decided to fail.
+"""
+from functools import wraps
+
+from flask import request
+from flask_restx.utils import unpack
+from werkzeug.wrappers import Response
+
+from app.services import facade
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _status(resp):
+    if isinstance(resp, Response):
+        return resp.status_code
+    return unpack(resp)[1]
+
+
+def transactional(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if request.method in READ_METHODS:
+            return func(*args, **kwargs)
+        with facade.unit_of_work() as uow:
+            resp = func(*args, **kwargs)
+            if _status(resp) >= 400:
+                uow.discard()
+        return resp
+    return wrapper
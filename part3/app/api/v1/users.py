@@ -1,6 +1,19 @@
+from functools import wraps
+
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
+from app.api.v1.caching import conditional
+from app.api.v1.params import (
+    FIELDS_DOC,
+    STREAM_DOC,
+    fields_arg,
+    fieldset,
+    page_args,
+    page_headers,
+    stream_args,
+)
+from app.api.v1.streaming import batch_size, stream_format, stream_response
 from app.services import facade
 
 api = Namespace("users", description="User operations")
@@ -30,11 +43,41 @@ user_input = api.model(
 )
 
 
+USER_FIELDS = {
+    "id": lambda u: u.id,
+    "first_name": lambda u: u.first_name,
+    "last_name": lambda u: u.last_name,
+    "email": lambda u: u.email,
+    "is_admin": lambda u: u.is_admin,
+    "created_at": lambda u: u.created_at,
+    "updated_at": lambda u: u.updated_at,
+}
+
+
 def _is_admin():
     claims = get_jwt()
     return bool(claims.get("is_admin", False))
 
 
+def _admin_only(func):
+    # Checked ahead of conditional(), which would otherwise answer with a 304.
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _is_admin():
+            return {"error": "Admin privileges required"}, 403
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def _self_or_admin(func):
+    @wraps(func)
+    def wrapper(self, user_id, *args, **kwargs):
+        if not _is_admin() and get_jwt_identity() != user_id:
+            return {"error": "Forbidden"}, 403
+        return func(self, user_id, *args, **kwargs)
+    return wrapper
+
+
 @api.route("/")
 class UserList(Resource):
     @api.expect(user_input)
@@ -62,28 +105,56 @@ class UserList(Resource):
 
         return user.to_dict(), 201
 
-    @api.marshal_list_with(user_model)
+    @api.doc(params={
+        "limit": "Maximum number of users to return",
+        "cursor": "X-Next-Cursor value from the previous page",
+        "sort": "created_at, prefixed with - for descending order",
+        "fields": FIELDS_DOC,
+        "stream": STREAM_DOC,
+    })
+    @api.response(200, "List of users", [user_model])
     @jwt_required()
+    @_admin_only
+    @conditional(api, "users", per_user=True)
     def get(self):
-        if not _is_admin():
-            return {"error": "Admin privileges required"}, 403
-        users = facade.get_all_users()
-        return [u.to_dict() for u in users], 200
+        fmt = stream_format()
+        try:
+            fields = fields_arg(USER_FIELDS)
+            if fmt:
+                batches = facade.stream_users(
+                    batch_size(), **stream_args(), fields=fields
+                )
+                return stream_response(
+                    batches,
+                    lambda users: [fieldset(u, USER_FIELDS, fields) for u in users],
+                    fmt,
+                )
+            page = facade.get_users_page(**page_args(), fields=fields)
+        except ValueError as e:
+            api.abort(400, str(e))
+        return (
+            [fieldset(u, USER_FIELDS, fields) for u in page.items],
+            200,
+            page_headers(page),
+        )
 
 
 @api.route("/<string:user_id>")
 class UserResource(Resource):
-    @api.marshal_with(user_model)
+    @api.doc(params={"fields": FIELDS_DOC})
+    @api.response(200, "User details", user_model)
     @jwt_required()
+    @_self_or_admin
+    @conditional(api, "users", per_user=True)
     def get(self, user_id):
-        current_user_id = get_jwt_identity()
-        if not _is_admin() and current_user_id != user_id:
-            return {"error": "Forbidden"}, 403
-
+        try:
+            fields = fields_arg(USER_FIELDS)
+        except ValueError as e:
+            api.abort(400, str(e))
         user = facade.get_user(user_id)
         if not user:
             api.abort(404, "User not found")
-        return user.to_dict()
+        return fieldset(user, USER_FIELDS, fields)
 
     @api.expect(user_input)
     @api.marshal_with(user_model)
@@ -0,0 +1,125 @@
+"""Negotiated compression of API responses.
+
+Responses are compressed with brotli (when the ``brotli`` package is
+installed) or gzip, whichever the client's Accept-Encoding prefers, once
+they reach COMPRESS_MIN_SIZE bytes. Streamed responses are compressed chunk
+by chunk, flushing after each one, so clients still receive rows as they
+are produced. Compressed responses get the coding appended to their ETag
+(``"<tag>-gzip"``), keeping strong validators unique per representation;
+see ``etag_variants`` for how conditional requests still match them.
+"""
+import gzip
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def init_app(app):
+    app.after_request(compress_response)
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def etag_variants(etag):
+    """Every ETag a response tagged ``etag`` may have been sent with."""
+    return [etag] + [f"{etag}-{coding}" for coding in available_encodings()]
+
+
+def _compressible(response):
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def _tag_304(response):
+    # A 304 must carry the ETag the client holds, which may be a compressed one.
+    etag, weak = response.get_etag()
+    if etag and request.if_none_match:
+        for variant in etag_variants(etag)[1:]:
+            if request.if_none_match.contains_weak(variant):
+                response.set_etag(variant, weak)
+                break
+    return response
+
+
+def compress_response(response):
+    if response.status_code == 304:
+        return _tag_304(response)
+    config = current_app.config
+    if (
+        not config.get("COMPRESS_ENABLED", True)
+        or request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code == 204
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or not _compressible(response)
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    coding = request.accept_encodings.best_match(available_encodings())
+    if coding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, coding, config)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config.get("COMPRESS_MIN_SIZE", 500):
+            return response
+        response.set_data(_compress(data, coding, config))
+
+    response.headers["Content-Encoding"] = coding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{coding}", weak)
+    return response
+
+
+def _compress(data, coding, config):
+    if coding == "br":
+        return brotli.compress(data, quality=config.get("COMPRESS_BR_QUALITY", 4))
+    return gzip.compress(data, compresslevel=config.get("COMPRESS_LEVEL", 6))
+
+
+def _compress_stream(chunks, coding, config):
+    if coding == "br":
+        compressor = brotli.Compressor(quality=config.get("COMPRESS_BR_QUALITY", 4))
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        # wbits=31 writes the gzip header and trailer around the deflate stream.
+        compressor = zlib.compressobj(
+            config.get("COMPRESS_LEVEL", 6), zlib.DEFLATED, 31
+        )
+        process = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: E731
+        finish = compressor.flush
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 
 class Config:
@@ -6,7 +7,68 @@ class Config:
     JWT_SECRET_KEY = os.getenv(
         "JWT_SECRET_KEY", "jwt-secret-key-change-in-production"
     )
+    # Access tokens stay short-lived; clients renew them at /auth/refresh
+    # with the refresh token instead of logging in (and running bcrypt) again.
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(
+        minutes=int(os.getenv("JWT_ACCESS_TOKEN_MINUTES", "15"))
+    )
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(
+        days=int(os.getenv("JWT_REFRESH_TOKEN_DAYS", "30"))
+    )
     DEBUG = False
+    # bcrypt cost of new password hashes; older hashes are upgraded (or
+    # downgraded) to it on the user's next successful login.
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+    # Password hashing runs on HASH_WORKERS threads; once HASH_QUEUE_DEPTH
+    # more jobs are waiting, requests needing one get 503 + Retry-After.
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+    HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", "8"))
+    HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "1"))
+    # Token buckets for login/register attempts, per client IP and per email:
+    # BURST attempts at once, refilled at PER_MINUTE. Refused with 429 before
+    # any password is hashed. At most RATE_LIMIT_MAX_KEYS buckets are kept.
+    RATE_LIMIT_ENABLED = (
+        os.getenv("RATE_LIMIT_ENABLED", "1") not in ("0", "false", "no")
+    )
+    LOGIN_RATE_IP_BURST = int(os.getenv("LOGIN_RATE_IP_BURST", "20"))
+    LOGIN_RATE_IP_PER_MINUTE = int(os.getenv("LOGIN_RATE_IP_PER_MINUTE", "20"))
+    LOGIN_RATE_EMAIL_BURST = int(os.getenv("LOGIN_RATE_EMAIL_BURST", "5"))
+    LOGIN_RATE_EMAIL_PER_MINUTE = int(os.getenv("LOGIN_RATE_EMAIL_PER_MINUTE", "5"))
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+    PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+    PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "500"))
+    GEO_MAX_RADIUS_KM = float(os.getenv("GEO_MAX_RADIUS_KM", "500"))
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+    # gzip/brotli compression of responses of at least COMPRESS_MIN_SIZE bytes.
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") not in ("0", "false", "no")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", "4"))
+    # GET/HEAD requests read from this database when set (see
+    # app/persistence/replica.py). A SQLite replica of a SQLite primary is
+    # refreshed with the backup API after each commit that wrote.
+    SQLALCHEMY_REPLICA_URI = os.getenv("DATABASE_REPLICA_URL")
+    REPLICA_SYNC_ON_COMMIT = (
+        os.getenv("REPLICA_SYNC_ON_COMMIT", "1") not in ("0", "false", "no")
+    )
+    # New ids are UUIDv4 or time-ordered UUIDv7 (ID_VERSION), stored as
+    # 36-char text or 16 bytes (ID_STORAGE); see app/models/ids.py. Changing
+    # ID_STORAGE of an existing database needs migrate_ids.py.
+    ID_VERSION = int(os.getenv("ID_VERSION", "4"))
+    ID_STORAGE = os.getenv("ID_STORAGE", "string")
+    # Rows fetched and serialized per step of a streamed listing.
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+    # In-process cache of users, places and amenities by id; 0 disables it.
+    ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "1024"))
+    ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", "30"))
+    # Cache-Control per API namespace. Every read endpoint also sends an ETag
+    # and Last-Modified, so "no-cache" still lets clients revalidate with 304s.
+    CACHE_CONTROL = {
+        "places": os.getenv("CACHE_CONTROL_PLACES", "public, no-cache"),
+        "amenities": os.getenv("CACHE_CONTROL_AMENITIES", "public, max-age=60"),
+        "reviews": os.getenv("CACHE_CONTROL_REVIEWS", "public, no-cache"),
+        "users": os.getenv("CACHE_CONTROL_USERS", "private, no-cache"),
+    }
 
 
 class DevelopmentConfig(Config):
@@ -20,10 +82,32 @@ class ProductionConfig(Config):
     SECRET_KEY = os.getenv("SECRET_KEY")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///production.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "13"))
+    # Run on every new SQLite connection (see app/persistence/sqlite.py):
+    # WAL lets readers proceed while a write commits. Ignored for other
+    # databases.
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # Negative sizes are in KiB: 64 MiB of page cache per connection.
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+        "foreign_keys": "ON",
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "no"),
+    }
 
 
 class TestingConfig(Config):
     TESTING = True
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # The bcrypt minimum: tests hash many passwords and need no real cost.
+    BCRYPT_LOG_ROUNDS = 4
\ No newline at end of file
@@ -1,12 +1,12 @@
 from datetime import datetime
-import uuid
 from app import db
+from app.models.ids import EntityId, new_id
 
 
 class BaseModel(db.Model):
     __abstract__ = True
 
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(EntityId, primary_key=True, default=new_id)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -0,0 +1,137 @@
+"""Primary key generation and storage.
+
+Ids are UUIDs, always handled as canonical strings in Python and in the
+API. ID_VERSION picks how new ones are made: 4 (random) or 7 (a
+millisecond timestamp followed by random bits, RFC 9562), which keeps
+inserts appending to the end of every id index instead of landing on a
+random page.
+
+ID_STORAGE picks the column format: "string" stores the 36-character text,
+"binary" the 16 raw bytes, which shrinks the primary keys, the foreign keys
+and every index over them. The choice is made per engine (see
+``configure_engine``) because the DDL and the bind/result conversions both
+follow it; ``migrate_ids.py`` copies a database from one format to the
+other.
+"""
+import os
+import threading
+import time
+import uuid
+
+from flask import current_app, has_app_context
+from sqlalchemy import LargeBinary, String, func, insert, inspect, select
+from sqlalchemy.types import TypeDecorator
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_seq = 0
+
+
+def uuid7():
+    """A UUIDv7, monotonic within this process.
+
+    The 12 ``rand_a`` bits act as a counter within a millisecond (RFC 9562
+    method 1); when they run out the timestamp is advanced by one.
+    """
+    global _last_ms, _last_seq
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            seq = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            ms, seq = _last_ms, _last_seq + 1
+            if seq > 0xFFF:
+                ms, seq = ms + 1, 0
+        _last_ms, _last_seq = ms, seq
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | seq << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=value)
+
+
+def new_id():
+    """Default for ``BaseModel.id``: a v4 or v7 UUID string per ID_VERSION."""
+    version = current_app.config.get("ID_VERSION", 4) if has_app_context() else 4
+    return str(uuid7() if int(version) == 7 else uuid.uuid4())
+
+
+def configure_engine(engine, storage):
+    """Store ids on ``engine`` as "string" or "binary"; call before first use."""
+    if storage not in ("string", "binary"):
+        raise ValueError(f"ID_STORAGE must be 'string' or 'binary', not {storage!r}")
+    engine.dialect.binary_ids = storage == "binary"
+
+
+def binary_ids(dialect):
+    return getattr(dialect, "binary_ids", False)
+
+
+class EntityId(TypeDecorator):
+    """A UUID column: canonical string in Python, text or 16 bytes in the database."""
+
+    impl = String(36)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if binary_ids(dialect):
+            return dialect.type_descriptor(LargeBinary(16))
+        return dialect.type_descriptor(String(36))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not binary_ids(dialect):
+            return value
+        if isinstance(value, uuid.UUID):
+            return value.bytes
+        if isinstance(value, bytes) and len(value) == 16:
+            return value
+        try:
+            raw = bytes.fromhex(value.replace("-", ""))
+        except (AttributeError, TypeError, ValueError):
+            raw = b""
+        # Not a UUID, so no row can have it; compare against nothing.
+        return raw if len(raw) == 16 else b""
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        h = bytes(value).hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def migrate(source, target, batch_size=1000):
+    """Copy every table from ``source`` into an empty ``target`` engine.
+
+    Configure both engines first; ids are read in the source's storage
+    format and written in the target's, so the same call converts either
+    way. Ids keep their values. Returns {table name: rows copied}.
+
+    The source may predate some tables or columns: only what it has is
+    copied, and columns it lacks are filled by their schema backfills.
+    """
+    from app import db
+    from app.persistence import schema, search
+
+    db.metadata.create_all(target)
+    inspector = inspect(source)
+    source_tables = set(inspector.get_table_names())
+    copied, missing = {}, set()
+    with source.connect() as src, target.begin() as dst:
+        for table in db.metadata.sorted_tables:
+            if dst.execute(select(func.count()).select_from(table)).scalar():
+                raise ValueError(f"Target table {table.name} is not empty")
+            copied[table.name] = 0
+            if table.name not in source_tables:
+                continue
+            have = {column["name"] for column in inspector.get_columns(table.name)}
+            missing |= {
+                (table.name, c.name) for c in table.columns if c.name not in have
+            }
+            # The model's columns, so ids are converted from the source's format.
+            columns = [c for c in table.columns if c.name in have]
+            stmt = select(*columns)
+            result = src.execution_options(yield_per=batch_size).execute(stmt)
+            for rows in result.mappings().partitions():
+                dst.execute(insert(table), [dict(row) for row in rows])
+                copied[table.name] += len(rows)
+        schema.backfill(dst, missing)
+    search.create_index(target)
+    return copied
@@ -1,22 +1,52 @@
+from sqlalchemy import event
+
 from app import db
 from app.models.base import BaseModel
+from app.models.ids import EntityId
+from app.persistence import search
+from app.persistence.geo import cell_key
 
 # Association table for Place-Amenity many-to-many relationship
 place_amenity = db.Table('place_amenity',
-    db.Column('place_id', db.String(36), db.ForeignKey('places.id'), primary_key=True),
-    db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True)
+    db.Column('place_id', EntityId, db.ForeignKey('places.id'), primary_key=True),
+    db.Column('amenity_id', EntityId, db.ForeignKey('amenities.id'), primary_key=True),
+    # The primary key serves place -> amenities; this one serves amenity filters.
+    db.Index('ix_place_amenity_amenity_id_place_id', 'amenity_id', 'place_id')
 )
 
 
 class Place(BaseModel):
     __tablename__ = 'places'
+    __table_args__ = (
+        db.Index('ix_places_created_at_id', 'created_at', 'id'),
+        db.Index('ix_places_price_id', 'price', 'id'),
+        # Covering index for spatial lookups: cell ranges, then exact coordinates.
+        db.Index('ix_places_geo_cell', 'geo_cell', 'latitude', 'longitude'),
+        db.Index('ix_places_rating_avg_id', 'rating_avg', 'id'),
+    )
 
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(500), nullable=True)
     price = db.Column(db.Float, nullable=False)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
-    owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    # Grid cell of (latitude, longitude), see app.persistence.geo; set on flush.
+    geo_cell = db.Column(db.Integer, nullable=True)
+    owner_id = db.Column(
+        EntityId, db.ForeignKey('users.id'), nullable=False, index=True
+    )
+
+    # Rating aggregates over this place's reviews, maintained by the facade
+    # on every review write (see PlaceRepository.adjust_ratings).
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # rating_sum / review_count, or 0 without reviews; stored so it can be indexed.
+    rating_avg = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
 
     # Relationships
     owner = db.relationship('User', backref='places', lazy=True)
@@ -59,6 +89,15 @@ class Place(BaseModel):
         if amenities:
             self.amenities = amenities if isinstance(amenities, list) else []
 
+    def rating_summary(self):
+        return {
+            "average": round(self.rating_avg or 0.0, 2) if self.review_count else None,
+            "count": self.review_count or 0,
+            "histogram": {
+                str(r): getattr(self, f"rating_{r}") or 0 for r in range(1, 6)
+            },
+        }
+
     def to_dict(self, owner=None, amenities=None):
         return {
             "id": self.id,
@@ -70,7 +109,16 @@ class Place(BaseModel):
             "owner_id": self.owner_id,
             "owner": owner,
             "amenities": amenities or [],
+            "rating": self.rating_summary(),
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
         }
 
+
+@event.listens_for(Place, 'before_insert')
+@event.listens_for(Place, 'before_update')
+def _set_geo_cell(mapper, connection, target):
+    target.geo_cell = cell_key(target.latitude, target.longitude)
+
+
+search.register(Place)
@@ -0,0 +1,24 @@
+from app import db
+
+
+class PlaceCluster(db.Model):
+    """Pre-aggregated places per grid cell, one grid per map zoom level.
+
+    Rows are maintained by the facade on every place write, so a viewport
+    only reads the cells it covers instead of the places inside them.
+    """
+    __tablename__ = 'place_clusters'
+
+    level = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    cell = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    lat_sum = db.Column(db.Float, nullable=False, default=0.0)
+    lon_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+    def to_dict(self, bounds=None):
+        return {
+            "latitude": self.lat_sum / self.count,
+            "longitude": self.lon_sum / self.count,
+            "count": self.count,
+            "bounds": list(bounds) if bounds else None,
+        }
@@ -1,14 +1,21 @@
 from app import db
 from app.models.base import BaseModel
+from app.models.ids import EntityId
 
 
 class Review(BaseModel):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('ix_reviews_created_at_id', 'created_at', 'id'),
+        db.Index('ix_reviews_rating_id', 'rating', 'id'),
+        # Reviews of one place, newest/oldest first, without touching other places.
+        db.Index('ix_reviews_place_id_created_at_id', 'place_id', 'created_at', 'id'),
+    )
 
     text = db.Column(db.String(500), nullable=False)
     rating = db.Column(db.Integer, nullable=False)
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
-    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False)
+    user_id = db.Column(EntityId, db.ForeignKey('users.id'), nullable=False)
+    place_id = db.Column(EntityId, db.ForeignKey('places.id'), nullable=False)
 
     # Relationships
     user = db.relationship('User', backref='reviews', lazy=True)
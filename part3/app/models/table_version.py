@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from app import db
+from app.persistence import versions
+
+
+class TableVersion(db.Model):
+    """Change counter of one table, bumped in the transaction that writes it.
+
+    The API derives ETag and Last-Modified validators from these rows, so a
+    conditional GET is answered without loading or serializing anything.
+    """
+    __tablename__ = 'table_versions'
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+versions.register(db.session)
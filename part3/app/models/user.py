@@ -1,10 +1,26 @@
 from datetime import datetime
+
+from flask import current_app, has_app_context
+
 from app import db, bcrypt
 from app.models.base import BaseModel
+from app.services import hashing
+
+DEFAULT_LOG_ROUNDS = 12
+
+
+def log_rounds():
+    """bcrypt cost for new hashes: BCRYPT_LOG_ROUNDS of the current app."""
+    if has_app_context():
+        return current_app.config.get("BCRYPT_LOG_ROUNDS", DEFAULT_LOG_ROUNDS)
+    return DEFAULT_LOG_ROUNDS
 
 
 class User(BaseModel):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     first_name = db.Column(db.String(128), nullable=False)
     last_name = db.Column(db.String(128), nullable=False)
@@ -39,13 +55,22 @@ class User(BaseModel):
         """Hash the password before storing it."""
         if not password:
             raise ValueError("Password is required")
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password = hashing.run(
+            bcrypt.generate_password_hash, password, rounds=log_rounds()
+        ).decode('utf-8')
 
     def verify_password(self, password):
         """Verify the hashed password."""
         if not self.password:
             return False
-        return bcrypt.check_password_hash(self.password, password)
+        return hashing.run(bcrypt.check_password_hash, self.password, password)
+
+    def password_needs_rehash(self):
+        """True when the stored hash was made with a different bcrypt cost."""
+        try:
+            return int(self.password.split("$")[2]) != log_rounds()
+        except (AttributeError, IndexError, ValueError):
+            return False
 
     def update(self, data):
         for key, value in data.items():
@@ -0,0 +1,225 @@
+"""In-process cache of entity rows in front of SQLAlchemyRepository.get.
+
+Each app owns one EntityCache (``app.extensions["entity_cache"]``) holding
+the committed column values of recently read rows, keyed by (table, id),
+in LRU order with a TTL. Missing ids are cached too, so repeated lookups of
+a bad id do not reach the database either.
+
+Entries are dropped when the transaction that wrote them commits: ORM
+flushes record the identities they touched and Core INSERT/UPDATE/DELETE
+statements run through the session record their whole table. Other
+processes writing the same database are only seen once the TTL expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+
+_MISSING = object()
+_PENDING_KEY = "entity_cache_pending"
+
+
+class EntityCache:
+    def __init__(self, max_size=1024, ttl=30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a miss that raced one is not stored.
+        self._generation = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        """Cached column values for ``key``.
+
+        None if the row is known to be missing, _MISSING if nothing is cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            if entry[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry[1]
+
+    def put(self, key, values, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, keys=(), tables=()):
+        """Drop entries by (table, id) key and every entry of ``tables``."""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+            if tables:
+                for key in [k for k in self._entries if k[0] in tables]:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def init_app(app):
+    app.extensions["entity_cache"] = EntityCache(
+        max_size=app.config.get("ENTITY_CACHE_SIZE", 1024),
+        ttl=app.config.get("ENTITY_CACHE_TTL", 30.0),
+    )
+
+
+def current_cache():
+    """The current app's EntityCache, or None when caching is off."""
+    if not has_app_context():
+        return None
+    cache = current_app.extensions.get("entity_cache")
+    if cache is None or not cache.enabled:
+        return None
+    return cache
+
+
+def _has_pending_writes(session):
+    keys, tables = session.info.get(_PENDING_KEY, ((), ()))
+    return bool(session.new or session.dirty or session.deleted or keys or tables)
+
+
+def get(session, model, obj_id):
+    """session.get(model, obj_id), answered from the cache when possible.
+
+    A cache hit is attached to the session as a persistent instance built
+    from the cached values, without running a query; relationships load
+    lazily as usual.
+    """
+    cache = current_cache()
+    if cache is None or not isinstance(obj_id, str):
+        return session.get(model, obj_id)
+
+    mapper = inspect(model)
+    identity = mapper.identity_key_from_primary_key([obj_id])
+    obj = session.identity_map.get(identity)
+    if obj is not None:
+        return obj
+
+    key = (mapper.local_table.name, obj_id)
+    values = cache.get(key)
+    if values is None:
+        return None
+    if values is not _MISSING:
+        return _attach(session, mapper, values)
+
+    generation = cache.generation
+    obj = session.get(model, obj_id)
+    if not _has_pending_writes(session):
+        values = _column_values(mapper, obj)
+        if values is not _MISSING:
+            cache.put(key, values, generation)
+    return obj
+
+
+def _column_values(mapper, obj):
+    """Committed column values of ``obj``; _MISSING if some are not loaded."""
+    if obj is None:
+        return None
+    loaded = inspect(obj).dict
+    keys = [attr.key for attr in mapper.column_attrs]
+    if any(k not in loaded for k in keys):
+        return _MISSING
+    return {k: loaded[k] for k in keys}
+
+
+def _attach(session, mapper, values):
+    from sqlalchemy.orm import make_transient_to_detached
+    from sqlalchemy.orm.attributes import set_committed_value
+
+    obj = mapper.class_manager.new_instance()
+    for key, value in values.items():
+        set_committed_value(obj, key, value)
+    make_transient_to_detached(obj)
+    session.add(obj)
+    return obj
+
+
+def register(session):
+    """Track the rows ``session`` writes and invalidate them on commit."""
+    if event.contains(session, "after_commit", _after_commit):
+        return
+    event.listen(session, "after_flush", _after_flush)
+    event.listen(session, "do_orm_execute", _after_execute)
+    event.listen(session, "after_commit", _after_commit)
+    event.listen(session, "after_rollback", _after_rollback)
+
+
+def _pending(session):
+    return session.info.setdefault(_PENDING_KEY, (set(), set()))
+
+
+def _after_flush(session, flush_context):
+    keys, _ = _pending(session)
+    for obj in session.new | session.dirty | session.deleted:
+        state = inspect(obj)
+        # New rows have no identity key until the flush is finalized.
+        obj_id = state.key[1][0] if state.key else state.dict.get("id")
+        if obj_id is not None:
+            keys.add((state.mapper.local_table.name, obj_id))
+
+
+def _after_execute(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+    table = orm_execute_state.statement.table
+    name = getattr(table, "name", None)
+    if name is None:
+        name = inspect(table).local_table.name
+    _, tables = _pending(orm_execute_state.session)
+    tables.add(name)
+
+
+def _after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    cache = current_cache()
+    if pending and cache is not None:
+        keys, tables = pending
+        cache.invalidate(keys, tables)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
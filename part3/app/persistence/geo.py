@@ -0,0 +1,173 @@
+"""Grid cells, distances and shapes backing the spatial place queries.
+
+The globe is cut into square cells of ``size`` degrees, numbered row-major
+from the south-west corner. Because a row of cells is a contiguous run of
+keys, any bounding box maps onto one key range per row, which an ordinary
+B-tree index on the cell column answers with a handful of range scans.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Resolution of places.geo_cell: 0.05 degrees is about 5.5 km at the equator.
+CELL_DEGREES = 0.05
+
+# Above this many per-row ranges a bbox is scanned as one latitude band.
+MAX_CELL_RANGES = 64
+
+# Cluster grids: level L uses cells of 180 / 2**L degrees (level 14 is ~1.2 km).
+CLUSTER_MAX_LEVEL = 14
+
+# A viewport is answered from a coarser level if it would span more cells.
+CLUSTER_MAX_CELLS = 4096
+
+
+def grid_shape(size):
+    """Number of (rows, columns) in a grid of ``size`` degree cells."""
+    return int(math.ceil(180.0 / size)), int(math.ceil(360.0 / size))
+
+
+def cell_row(lat, size):
+    rows, _ = grid_shape(size)
+    return min(max(int((lat + 90.0) // size), 0), rows - 1)
+
+
+def cell_col(lon, size):
+    _, cols = grid_shape(size)
+    return min(max(int((lon + 180.0) // size), 0), cols - 1)
+
+
+def cell_key(lat, lon, size=CELL_DEGREES):
+    """Row-major key of the cell containing (lat, lon)."""
+    _, cols = grid_shape(size)
+    return cell_row(lat, size) * cols + cell_col(lon, size)
+
+
+def cell_bounds(key, size):
+    """(min_lat, min_lon, max_lat, max_lon) of a cell."""
+    _, cols = grid_shape(size)
+    row, col = divmod(key, cols)
+    min_lat = row * size - 90.0
+    min_lon = col * size - 180.0
+    return min_lat, min_lon, min(min_lat + size, 90.0), min(min_lon + size, 180.0)
+
+
+def cell_ranges(box, size=CELL_DEGREES, max_ranges=MAX_CELL_RANGES):
+    """Inclusive (low, high) cell-key ranges covering a non-wrapping box.
+
+    One range is emitted per row of cells. When that would exceed
+    ``max_ranges`` the whole latitude band is returned as a single range,
+    which over-selects but stays a single index scan; callers always
+    re-check the exact coordinates.
+    """
+    min_lat, min_lon, max_lat, max_lon = box
+    _, cols = grid_shape(size)
+    r0, r1 = cell_row(min_lat, size), cell_row(max_lat, size)
+    c0, c1 = cell_col(min_lon, size), cell_col(max_lon, size)
+    if c0 == 0 and c1 == cols - 1:
+        return [(r0 * cols, r1 * cols + cols - 1)]
+    if r1 - r0 + 1 > max_ranges:
+        return [(r0 * cols + c0, r1 * cols + c1)]
+    return [(r * cols + c0, r * cols + c1) for r in range(r0, r1 + 1)]
+
+
+def cells_in_box(box, size):
+    """Number of grid cells a non-wrapping box touches."""
+    min_lat, min_lon, max_lat, max_lon = box
+    rows = cell_row(max_lat, size) - cell_row(min_lat, size) + 1
+    cols = cell_col(max_lon, size) - cell_col(min_lon, size) + 1
+    return rows * cols
+
+
+def box_contains_cell(box, key, size):
+    min_lat, min_lon, max_lat, max_lon = box
+    _, cols = grid_shape(size)
+    row, col = divmod(key, cols)
+    return (cell_row(min_lat, size) <= row <= cell_row(max_lat, size)
+            and cell_col(min_lon, size) <= col <= cell_col(max_lon, size))
+
+
+def cluster_cell_degrees(level):
+    return 180.0 / (2 ** level)
+
+
+def zoom_to_level(zoom):
+    """Cluster level for a web-map zoom.
+
+    At zoom z a 256px tile spans 360 / 2**z degrees, so level z + 1 gives
+    cells of roughly 64 pixels on screen.
+    """
+    return max(0, min(CLUSTER_MAX_LEVEL, int(zoom) + 1))
+
+
+def split_bbox(min_lon, min_lat, max_lon, max_lat):
+    """Validate a west,south,east,north box and split it at the antimeridian.
+
+    Returns a list of (min_lat, min_lon, max_lat, max_lon) boxes.
+    """
+    if not (-90 <= min_lat <= 90 and -90 <= max_lat <= 90):
+        raise ValueError("Invalid latitude in bounding box")
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError("Invalid longitude in bounding box")
+    if min_lat > max_lat:
+        raise ValueError("Bounding box south edge is above its north edge")
+    if min_lon <= max_lon:
+        return [(min_lat, min_lon, max_lat, max_lon)]
+    return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+
+
+def boxes_around(lat, lon, radius_km):
+    """Bounding boxes enclosing the circle of ``radius_km`` around a point."""
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90 or angular >= math.pi / 2:
+        # The circle contains a pole: every longitude is in range.
+        return [(max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0)]
+    dlon = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(lat))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180:
+        return [
+            (min_lat, min_lon + 360.0, max_lat, 180.0),
+            (min_lat, -180.0, max_lat, max_lon),
+        ]
+    if max_lon > 180:
+        return [
+            (min_lat, min_lon, max_lat, 180.0),
+            (min_lat, -180.0, max_lat, max_lon - 360.0),
+        ]
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def polygon_bbox(points):
+    """(min_lat, min_lon, max_lat, max_lon) of a list of (lat, lon) points."""
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+def point_in_polygon(lat, lon, points):
+    """Even-odd ray casting test on a simple polygon of (lat, lon) vertices."""
+    inside = False
+    j = len(points) - 1
+    for i in range(len(points)):
+        lat_i, lon_i = points[i]
+        lat_j, lon_j = points[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if lon < crossing:
+                inside = not inside
+        j = i
+    return inside
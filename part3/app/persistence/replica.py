@@ -0,0 +1,159 @@
+"""Route read-only requests to a read replica.
+
+With SQLALCHEMY_REPLICA_URI set, the queries of GET and HEAD requests,
+including the facade.get_* calls their handlers make, run on a second
+engine, while every other request stays on the primary. Once a read
+request writes anything (a flush or a Core INSERT/UPDATE/DELETE) the rest
+of it sticks to the primary, so it reads its own writes.
+
+A second SQLite file can stand in for a real replica: when both databases
+are SQLite, ``sync`` copies the primary into the replica with SQLite's
+online backup API, after every commit unless REPLICA_SYNC_ON_COMMIT is
+off; each sync also empties the entity cache, which may hold rows read
+from the old copy. Other replicas cannot announce their catch-up, so
+entries cached from them may lag for up to ENTITY_CACHE_TTL.
+
+A sync that fails (say, a reader holds a lock on the replica file) is
+logged rather than failing the request whose write already committed. The
+replica is then marked stale and reads go to the primary until a later
+sync succeeds.
+"""
+import sqlite3
+import weakref
+
+from flask import current_app, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import UpdateBase
+
+READ_METHODS = ("GET", "HEAD")
+
+_READS_KEY = "replica_reads"
+_STICKY_KEY = "replica_sticky"
+_UNSYNCED_KEY = "replica_unsynced"
+
+
+class ReadReplica:
+    def __init__(self, engine, primary):
+        self.engine = engine
+        self.primary = primary
+        # Set while the replica may hold a partial or outdated copy.
+        self.stale = False
+
+    @property
+    def can_sync(self):
+        return (
+            self.engine.dialect.name == "sqlite"
+            and self.primary.dialect.name == "sqlite"
+        )
+
+    def sync(self):
+        """Copy the primary into the replica file with the SQLite backup API."""
+        from app.persistence import cache
+
+        if not self.can_sync:
+            return False
+        try:
+            target = sqlite3.connect(self.engine.url.database)
+            try:
+                with self.primary.connect() as conn:
+                    conn.connection.driver_connection.backup(target)
+            finally:
+                target.close()
+        except BaseException:
+            self.stale = True
+            raise
+        self.stale = False
+        # Rows (or misses) cached from the stale copy must be read again.
+        entity_cache = cache.current_cache()
+        if entity_cache is not None:
+            entity_cache.clear()
+        return True
+
+
+class RoutingSession(Session):
+    """Session whose default engine is the replica while serving a read request."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None:
+            return engine
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info[_UNSYNCED_KEY] = True
+            self.info[_STICKY_KEY] = True
+        if not self.info.get(_READS_KEY) or self.info.get(_STICKY_KEY):
+            return engine
+        replica = current_replica()
+        if replica is None or replica.stale or engine is not replica.primary:
+            return engine
+        return replica.engine
+
+
+def init_app(app, db):
+    """Create the replica engine of ``app``; call once its tables exist."""
+    uri = app.config.get("SQLALCHEMY_REPLICA_URI")
+    if not uri:
+        return
+    from app.models import ids
+    from app.persistence import search, sqlite
+
+    with app.app_context():
+        primary = db.engine
+    engine = create_engine(
+        uri, **app.config.get("SQLALCHEMY_REPLICA_ENGINE_OPTIONS", {})
+    )
+    ids.configure_engine(engine, app.config.get("ID_STORAGE", "string"))
+    sqlite.configure_engine(engine, app.config.get("SQLITE_PRAGMAS"))
+    replica = ReadReplica(engine, primary)
+    app.extensions["read_replica"] = replica
+    weakref.finalize(app, engine.dispose)
+
+    replica.sync()
+    # The backup carries places_fts along, so the replica can serve searches.
+    if replica.can_sync and search.is_indexed(primary):
+        search.mark_indexed(engine)
+
+    register(db.session)
+
+    @app.before_request
+    def _route_reads():
+        db.session.info[_READS_KEY] = request.method in READ_METHODS
+        db.session.info.pop(_STICKY_KEY, None)
+
+    @app.teardown_request
+    def _stop_routing(exc):
+        db.session.info.pop(_READS_KEY, None)
+        db.session.info.pop(_STICKY_KEY, None)
+
+
+def current_replica():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("read_replica")
+
+
+def register(session):
+    """Sync the app's SQLite replica after each commit of ``session`` that wrote."""
+    if event.contains(session, "after_commit", _after_commit):
+        return
+    event.listen(session, "after_commit", _after_commit)
+    event.listen(session, "after_rollback", _after_rollback)
+
+
+def _after_commit(session):
+    if not session.info.pop(_UNSYNCED_KEY, False):
+        return
+    replica = current_replica()
+    if replica is None or not current_app.config.get("REPLICA_SYNC_ON_COMMIT", True):
+        return
+    try:
+        replica.sync()
+    except (sqlite3.Error, SQLAlchemyError):
+        current_app.logger.exception(
+            "Replica sync failed; reading from the primary until the next sync"
+        )
+
+
+def _after_rollback(session):
+    session.info.pop(_UNSYNCED_KEY, None)
@@ -1,4 +1,56 @@
+import base64
+import json
 from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import datetime
+
+from app.persistence import cache, transaction, versions
+
+
+Page = namedtuple("Page", ["items", "next_cursor", "total"])
+
+
+def encode_cursor(sort, value, obj_id):
+    """Encode the last row of a page as an opaque, URL-safe cursor."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, obj_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor into (sort, value, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 3:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _cursor_position(cursor, sort, column):
+    """The (sort value, id) a keyset cursor for ``sort`` on ``column`` resumes after.
+
+    Cursors come back from clients, so every part is checked before it is
+    bound: a tampered cursor is a ValueError (a 400), never a database error.
+    """
+    from sqlalchemy import DateTime
+
+    cursor_sort, value, last_id = decode_cursor(cursor)
+    if cursor_sort != sort or not isinstance(last_id, str):
+        raise ValueError("Invalid cursor")
+    if isinstance(column.type, DateTime):
+        if not isinstance(value, str):
+            raise ValueError("Invalid cursor")
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError("Invalid cursor")
+    elif isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("Invalid cursor")
+    return value, last_id
 
 
 class Repository(ABC):
@@ -61,6 +113,17 @@ class InMemoryRepository(Repository):
 
 
 class SQLAlchemyRepository(Repository):
+    # Columns a listing may be sorted by; the primary key breaks ties.
+    sort_fields = ("created_at",)
+    default_sort = "created_at"
+    # Sort names that are stored under a different column name.
+    sort_columns = {}
+    # Serve get() from the app's EntityCache (see app.persistence.cache).
+    cacheable = False
+    # Model attributes an API field is built from, for fields that are not
+    # simply the column of the same name (see field_options).
+    field_sources = {}
+
     def __init__(self, model):
         self.model = model
 
@@ -68,19 +131,161 @@ class SQLAlchemyRepository(Repository):
         from app import db
 
         db.session.add(obj)
-        db.session.commit()
+        transaction.commit(db.session)
+
+    def add_many(self, objs):
+        """Insert several objects in one transaction.
+
+        The flush groups rows of the same table into executemany INSERTs, so
+        the whole batch costs one commit instead of one per object.
+        """
+        from app import db
+
+        objs = list(objs)
+        if objs:
+            db.session.add_all(objs)
+            transaction.commit(db.session)
+        return objs
 
     def get(self, obj_id):
         from app import db
 
+        if self.cacheable:
+            return cache.get(db.session, self.model, obj_id)
         return db.session.get(self.model, obj_id)
 
+    def _invalidate(self, obj_id):
+        entity_cache = cache.current_cache()
+        if entity_cache is not None:
+            entity_cache.invalidate([(self.model.__tablename__, obj_id)])
+
     def get_all(self):
         from app import db
         from sqlalchemy import select
 
         return list(db.session.execute(select(self.model)).scalars().all())
 
+    def field_options(self, fields, extra=()):
+        """Loader options reading only what the API ``fields`` are built from.
+
+        ``fields`` is a collection of API field names, or None for the whole
+        object (no options). Columns outside the projection are left unloaded
+        and relationships that are not requested are never eagerly loaded;
+        ``extra`` names further attributes to load, such as a sort column.
+        """
+        from sqlalchemy import inspect
+        from sqlalchemy.orm import lazyload, load_only
+
+        if fields is None:
+            return []
+        wanted = {"id", *extra}
+        for name in fields:
+            wanted.update(self.field_sources.get(name, (name,)))
+        mapper = inspect(self.model)
+        columns = [
+            getattr(self.model, a.key) for a in mapper.column_attrs if a.key in wanted
+        ]
+        options = [load_only(*columns)]
+        options += [
+            lazyload(getattr(self.model, r.key))
+            for r in mapper.relationships if r.key not in wanted
+        ]
+        return options
+
+    def get_many(self, obj_ids, options=(), fields=None):
+        """Retrieve several objects with a single IN query (order not preserved)."""
+        from app import db
+        from sqlalchemy import select
+
+        obj_ids = list(set(obj_ids))
+        if not obj_ids:
+            return []
+        options = [*options, *self.field_options(fields)]
+        stmt = select(self.model).where(self.model.id.in_(obj_ids)).options(*options)
+        return list(db.session.execute(stmt).scalars().all())
+
+    def get_page(
+        self, limit, cursor=None, sort=None, criteria=(), options=(), fields=None
+    ):
+        """Return one keyset-paginated Page ordered by (sort key, id).
+
+        ``sort`` is a name from ``sort_fields``, prefixed with ``-`` for
+        descending order. ``cursor`` is the ``next_cursor`` of the previous
+        page and must have been produced with the same sort. ``fields``
+        narrows the loaded columns, see field_options.
+        """
+        from app import db
+        from sqlalchemy import func, select
+
+        stmt, column, sort = self._ordered(cursor, sort, criteria, options, fields)
+        total = db.session.execute(
+            select(func.count(self.model.id)).where(*criteria)
+        ).scalar_one()
+
+        items = list(db.session.execute(stmt.limit(limit + 1)).scalars().all())
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+        return Page(items, next_cursor, total)
+
+    def iter_batches(
+        self, batch_size, cursor=None, sort=None, criteria=(), options=(), fields=None
+    ):
+        """Every row after ``cursor`` in get_page order, as lists of ``batch_size``.
+
+        Rows are fetched with yield_per, so only one batch is held in memory
+        at a time. Arguments are validated before this returns; the query
+        itself runs as the result is iterated.
+        """
+        from app import db
+
+        stmt, _, _ = self._ordered(cursor, sort, criteria, options, fields)
+        stmt = stmt.execution_options(yield_per=batch_size)
+
+        def batches():
+            result = db.session.execute(stmt).scalars()
+            try:
+                for partition in result.partitions():
+                    yield list(partition)
+            finally:
+                result.close()
+
+        return batches()
+
+    def _ordered(self, cursor, sort, criteria, options, fields):
+        """SELECT ordered by (sort key, id) starting after ``cursor``.
+
+        Returns the statement, the sort column and the normalized sort name.
+        """
+        from sqlalchemy import literal, select, tuple_
+
+        sort = sort or self.default_sort
+        descending = sort.startswith("-")
+        field = sort.lstrip("-")
+        if field not in self.sort_fields:
+            raise ValueError(f"Cannot sort by '{field}'")
+        column = getattr(self.model, self.sort_columns.get(field, field))
+        key = self.model.id
+
+        options = [*options, *self.field_options(fields, extra=(column.key,))]
+        stmt = select(self.model).where(*criteria).options(*options)
+        if cursor:
+            value, last_id = _cursor_position(cursor, sort, column)
+            position = tuple_(column, key)
+            bound = tuple_(literal(value, column.type), literal(last_id, key.type))
+            if descending:
+                stmt = stmt.where(position < bound)
+            else:
+                stmt = stmt.where(position > bound)
+
+        if descending:
+            stmt = stmt.order_by(column.desc(), key.desc())
+        else:
+            stmt = stmt.order_by(column.asc(), key.asc())
+        return stmt, column, sort
+
     def update(self, obj_id, data):
         from app import db
 
@@ -93,7 +298,8 @@ class SQLAlchemyRepository(Repository):
                 from datetime import datetime
 
                 obj.updated_at = datetime.utcnow()
-            db.session.commit()
+            transaction.commit(db.session)
+            self._invalidate(obj_id)
 
     def delete(self, obj_id):
         from app import db
@@ -101,7 +307,40 @@ class SQLAlchemyRepository(Repository):
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            transaction.commit(db.session)
+            self._invalidate(obj_id)
+
+    def update_many(self, changes):
+        """Apply {obj_id: data} updates in one transaction; returns updated objects.
+
+        Objects are loaded with one IN query and written back by a single
+        flush, which batches UPDATEs touching the same columns.
+        """
+        from app import db
+        from datetime import datetime
+
+        objs = self.get_many(changes.keys())
+        now = datetime.utcnow()
+        for obj in objs:
+            for key, value in changes[obj.id].items():
+                if hasattr(obj, key) and key not in ("id", "created_at"):
+                    setattr(obj, key, value)
+            if hasattr(obj, "updated_at"):
+                obj.updated_at = now
+        if objs:
+            transaction.commit(db.session)
+        return objs
+
+    def delete_many(self, obj_ids):
+        """Delete several objects in one transaction; returns how many existed."""
+        from app import db
+
+        objs = self.get_many(obj_ids)
+        for obj in objs:
+            db.session.delete(obj)
+        if objs:
+            transaction.commit(db.session)
+        return len(objs)
 
     def get_by_attribute(self, attr_name, attr_value):
         from app import db
@@ -112,6 +351,8 @@ class SQLAlchemyRepository(Repository):
 
 
 class UserRepository(SQLAlchemyRepository):
+    cacheable = True
+
     def __init__(self):
         from app.models.user import User
         super().__init__(User)
@@ -122,19 +363,509 @@ class UserRepository(SQLAlchemyRepository):
 
 
 class PlaceRepository(SQLAlchemyRepository):
+    sort_fields = ("created_at", "price", "rating")
+    sort_columns = {"rating": "rating_avg"}
+    cacheable = True
+    field_sources = {
+        "owner": ("owner_id", "owner"),
+        "rating": (
+            "review_count", "rating_avg", *(f"rating_{r}" for r in range(1, 6))
+        ),
+    }
+
     def __init__(self):
         from app.models.place import Place
         super().__init__(Place)
 
+    def card_options(self, fields=None):
+        """Loader options for listing pages: owner joined, amenities in one batch.
+
+        With ``fields``, only the requested relationships are loaded and the
+        place columns are narrowed as in field_options.
+        """
+        from sqlalchemy.orm import joinedload, selectinload
+        from app.models.user import User
+
+        options = []
+        if fields is None or "owner" in fields:
+            options.append(joinedload(self.model.owner).load_only(
+                User.first_name, User.last_name, User.email
+            ))
+        if fields is None or "amenities" in fields:
+            options.append(selectinload(self.model.amenities))
+        return options
+
+    def summary_options(self):
+        """Loader options for places shown without their amenities."""
+        from sqlalchemy.orm import lazyload
+
+        return [lazyload(self.model.amenities)]
+
+    def filter_criteria(
+        self, min_price=None, max_price=None, amenity_ids=None, owner_id=None
+    ):
+        """SQL criteria for the place listing filters.
+
+        ``amenity_ids`` uses all-of semantics: a place matches only if it is
+        linked to every requested amenity.
+        """
+        from sqlalchemy import func, select
+        from app.models.place import place_amenity
+
+        criteria = []
+        if min_price is not None:
+            criteria.append(self.model.price >= min_price)
+        if max_price is not None:
+            criteria.append(self.model.price <= max_price)
+        if owner_id:
+            criteria.append(self.model.owner_id == owner_id)
+        if amenity_ids:
+            wanted = set(amenity_ids)
+            matching = (
+                select(place_amenity.c.place_id)
+                .where(place_amenity.c.amenity_id.in_(wanted))
+                .group_by(place_amenity.c.place_id)
+                .having(func.count() == len(wanted))
+            )
+            criteria.append(self.model.id.in_(matching))
+        return criteria
+
+    def get_coordinates_in_boxes(self, boxes):
+        """(id, latitude, longitude) rows inside any of the given boxes.
+
+        Each box is (min_lat, min_lon, max_lat, max_lon) and must not cross
+        the antimeridian (see app.persistence.geo.split_bbox). Only the
+        covering geo_cell index is read, never the place rows themselves.
+        """
+        from app import db
+        from sqlalchemy import and_, or_, select
+        from app.persistence.geo import cell_ranges
+
+        model = self.model
+        conditions = []
+        for box in boxes:
+            min_lat, min_lon, max_lat, max_lon = box
+            cells = or_(
+                *(model.geo_cell.between(lo, hi) for lo, hi in cell_ranges(box))
+            )
+            conditions.append(
+                and_(
+                    cells,
+                    model.latitude.between(min_lat, max_lat),
+                    model.longitude.between(min_lon, max_lon),
+                )
+            )
+        stmt = select(model.id, model.latitude, model.longitude).where(or_(*conditions))
+        return db.session.execute(stmt).all()
+
+    def get_amenity_ids(self, place_id):
+        """Ids of the amenities linked to one place, read from place_amenity only."""
+        from app import db
+        from app.models.place import place_amenity
+        from sqlalchemy import select
+
+        stmt = select(place_amenity.c.amenity_id).where(
+            place_amenity.c.place_id == place_id
+        )
+        return set(db.session.execute(stmt).scalars())
+
+    def existing_amenity_links(self, pairs):
+        """The subset of (place_id, amenity_id) pairs already linked."""
+        from app import db
+        from app.models.place import place_amenity
+        from sqlalchemy import select, tuple_
+
+        pairs = list(set(pairs))
+        if not pairs:
+            return set()
+        rows = db.session.execute(
+            select(place_amenity.c.place_id, place_amenity.c.amenity_id).where(
+                tuple_(place_amenity.c.place_id, place_amenity.c.amenity_id).in_(pairs)
+            )
+        ).all()
+        return {tuple(row) for row in rows}
+
+    def link_amenities(self, pairs):
+        """Insert (place_id, amenity_id) links in one executemany; caller commits."""
+        from app.models.place import place_amenity
+
+        self._write_links(place_amenity.insert(), pairs)
+
+    def unlink_amenities(self, pairs):
+        """Delete (place_id, amenity_id) links in one executemany; caller commits."""
+        from app.models.place import place_amenity
+        from sqlalchemy import and_, bindparam
+
+        stmt = place_amenity.delete().where(and_(
+            place_amenity.c.place_id == bindparam("b_place_id"),
+            place_amenity.c.amenity_id == bindparam("b_amenity_id"),
+        ))
+        self._write_links(stmt, pairs, prefix="b_")
+
+    def _write_links(self, stmt, pairs, prefix=""):
+        from app import db
+        from sqlalchemy import inspect
+
+        pairs = list(set(pairs))
+        if not pairs:
+            return
+        db.session.execute(stmt, [
+            {f"{prefix}place_id": place_id, f"{prefix}amenity_id": amenity_id}
+            for place_id, amenity_id in pairs
+        ])
+        # Loaded places and amenities must re-read their collections.
+        from app.models.amenity import Amenity
+
+        for model, index, attr in (
+            (self.model, 0, "amenities"),
+            (Amenity, 1, "places"),
+        ):
+            mapper = inspect(model)
+            for obj_id in {pair[index] for pair in pairs}:
+                obj = db.session.identity_map.get(
+                    mapper.identity_key_from_primary_key([obj_id])
+                )
+                if obj is not None:
+                    db.session.expire(obj, [attr])
+        versions.bump(db.session.connection(), [self.model.__tablename__])
+
+    def adjust_ratings(self, changes):
+        """Apply (place_id, rating, delta) changes to the rating aggregates.
+
+        Changes are netted per place and written as one relative UPDATE each,
+        so concurrent reviews of the same place cannot overwrite each other.
+        The caller commits.
+        """
+        from collections import Counter, defaultdict
+
+        from app import db
+        from sqlalchemy import case, inspect, update
+
+        net = defaultdict(Counter)
+        for place_id, rating, delta in changes:
+            net[place_id][rating] += delta
+
+        Place = self.model
+        for place_id, deltas in net.items():
+            count = sum(deltas.values())
+            total = sum(rating * delta for rating, delta in deltas.items())
+            new_count = Place.review_count + count
+            new_sum = Place.rating_sum + total
+            values = {
+                Place.review_count: new_count,
+                Place.rating_sum: new_sum,
+                Place.rating_avg: case(
+                    (new_count > 0, new_sum * 1.0 / new_count), else_=0.0
+                ),
+            }
+            for rating, delta in deltas.items():
+                if delta:
+                    column = getattr(Place, f"rating_{rating}")
+                    values[column] = column + delta
+            db.session.execute(
+                update(Place.__table__).where(Place.id == place_id).values(
+                    {column.key: value for column, value in values.items()}
+                )
+            )
+            # Loaded copies of the place must re-read the new totals.
+            identity = inspect(Place).identity_key_from_primary_key([place_id])
+            place = db.session.identity_map.get(identity)
+            if place is not None:
+                db.session.expire(place, [column.key for column in values])
+        if net:
+            versions.bump(db.session.connection(), [Place.__tablename__])
+
+    def rebuild_ratings(self):
+        """Recompute every place's rating aggregates from the reviews table."""
+        from app import db
+
+        rated = self.write_ratings(db.session)
+        transaction.commit(db.session)
+        db.session.expire_all()
+        return rated
+
+    def write_ratings(self, connection):
+        """Overwrite the rating aggregates with ones computed from reviews.
+
+        ``connection`` is a Connection or a Session, so this also serves
+        schema upgrades outside the ORM. The caller commits. Returns the
+        number of places rated.
+        """
+        from app.models.review import Review
+        from sqlalchemy import bindparam, case, func, select, update
+
+        table = self.model.__table__
+        zero = {c: 0 for c in ("review_count", "rating_sum", "rating_avg")}
+        zero.update({f"rating_{r}": 0 for r in range(1, 6)})
+        connection.execute(update(table).values(zero))
+
+        histogram = [
+            func.sum(case((Review.rating == r, 1), else_=0)).label(f"h{r}")
+            for r in range(1, 6)
+        ]
+        rows = connection.execute(
+            select(
+                Review.place_id,
+                func.count(Review.id).label("count"),
+                func.sum(Review.rating).label("total"),
+                *histogram,
+            ).group_by(Review.place_id)
+        ).all()
+        params = [
+            {
+                "b_id": row.place_id,
+                "b_count": row.count,
+                "b_sum": row.total,
+                "b_avg": row.total / row.count,
+                **{f"b_{r}": getattr(row, f"h{r}") for r in range(1, 6)},
+            }
+            for row in rows
+        ]
+        if params:
+            values = {
+                "review_count": bindparam("b_count"),
+                "rating_sum": bindparam("b_sum"),
+                "rating_avg": bindparam("b_avg"),
+            }
+            values.update({f"rating_{r}": bindparam(f"b_{r}") for r in range(1, 6)})
+            connection.execute(
+                update(table).where(table.c.id == bindparam("b_id")).values(values),
+                params,
+            )
+        versions.bump(connection, [table.name])
+        return len(params)
+
+    def update_many(self, changes):
+        """Update several places, moving the ones that changed cell between clusters."""
+        from app import db
+
+        with transaction.unit_of_work(db.session):
+            before = {
+                p.id: (p.latitude, p.longitude) for p in self.get_many(changes.keys())
+            }
+            places = super().update_many(changes)
+            moves = []
+            for place in places:
+                after = (place.latitude, place.longitude)
+                if after != before[place.id]:
+                    moves += [(*before[place.id], -1), (*after, 1)]
+            PlaceClusterRepository().adjust(moves)
+        return places
+
+    def delete_many(self, obj_ids):
+        """Delete several places and take them out of their clusters."""
+        from app import db
+
+        with transaction.unit_of_work(db.session):
+            places = self.get_many(obj_ids)
+            PlaceClusterRepository().adjust(
+                [(p.latitude, p.longitude, -1) for p in places]
+            )
+            return super().delete_many(obj_ids)
+
 
 class ReviewRepository(SQLAlchemyRepository):
+    sort_fields = ("created_at", "rating")
+    field_sources = {"user": ("user_id",), "place": ("place_id",)}
+
     def __init__(self):
         from app.models.review import Review
         super().__init__(Review)
 
+    def update_many(self, changes):
+        """Update several reviews, moving their ratings between place aggregates."""
+        from app import db
+
+        for data in changes.values():
+            rating = data.get("rating", 1)
+            if (
+                not isinstance(rating, int)
+                or isinstance(rating, bool)
+                or not (1 <= rating <= 5)
+            ):
+                raise ValueError("Rating must be an integer between 1 and 5")
+        with transaction.unit_of_work(db.session):
+            before = {
+                r.id: (r.place_id, r.rating) for r in self.get_many(changes.keys())
+            }
+            reviews = super().update_many(changes)
+            ratings = []
+            for review in reviews:
+                after = (review.place_id, review.rating)
+                if after != before[review.id]:
+                    ratings += [before[review.id] + (-1,), after + (1,)]
+            PlaceRepository().adjust_ratings(ratings)
+        return reviews
+
+    def delete_many(self, obj_ids):
+        """Delete several reviews and remove their ratings from their places."""
+        from app import db
+
+        with transaction.unit_of_work(db.session):
+            reviews = self.get_many(obj_ids)
+            PlaceRepository().adjust_ratings(
+                [(r.place_id, r.rating, -1) for r in reviews]
+            )
+            return super().delete_many(obj_ids)
+
 
 class AmenityRepository(SQLAlchemyRepository):
+    cacheable = True
+
     def __init__(self):
         from app.models.amenity import Amenity
         super().__init__(Amenity)
 
+
+class PlaceClusterRepository:
+    """Per-level grid aggregates of place coordinates (see PlaceCluster)."""
+
+    def __init__(self):
+        from app.models.place_cluster import PlaceCluster
+        self.model = PlaceCluster
+
+    def adjust(self, changes):
+        """Apply (lat, lon, delta) changes to every level with batched statements.
+
+        ``delta`` is 1 for an added place and -1 for a removed one; a move is
+        a -1 at the old position plus a 1 at the new one. Changes are netted
+        per cell, and cells left empty are deleted.
+        """
+        from app import db
+        from sqlalchemy import (
+            and_,
+            bindparam,
+            delete,
+            insert,
+            inspect,
+            select,
+            tuple_,
+            update,
+        )
+        from app.persistence.geo import (
+            CLUSTER_MAX_LEVEL,
+            cell_key,
+            cluster_cell_degrees,
+        )
+
+        net = {}
+        for lat, lon, delta in changes:
+            for level in range(CLUSTER_MAX_LEVEL + 1):
+                key = (level, cell_key(lat, lon, cluster_cell_degrees(level)))
+                entry = net.setdefault(key, [0, 0.0, 0.0])
+                entry[0] += delta
+                entry[1] += delta * lat
+                entry[2] += delta * lon
+        if not net:
+            return
+
+        table = self.model.__table__
+        keys = list(net)
+        existing = {}
+        # Chunked so the tuple IN stays below SQLite's bound-parameter limit.
+        for i in range(0, len(keys), 1000):
+            rows = db.session.execute(
+                select(table.c.level, table.c.cell, table.c.count).where(
+                    tuple_(table.c.level, table.c.cell).in_(keys[i:i + 1000])
+                )
+            )
+            existing.update(((r.level, r.cell), r.count) for r in rows)
+
+        inserts, updates, deletes = [], [], []
+        for (level, cell), (count, lat_sum, lon_sum) in net.items():
+            if (level, cell) not in existing:
+                if count > 0:
+                    inserts.append({"level": level, "cell": cell, "count": count,
+                                    "lat_sum": lat_sum, "lon_sum": lon_sum})
+            elif existing[(level, cell)] + count <= 0:
+                deletes.append({"b_level": level, "b_cell": cell})
+            elif count or lat_sum or lon_sum:
+                updates.append({"b_level": level, "b_cell": cell, "b_count": count,
+                                "b_lat_sum": lat_sum, "b_lon_sum": lon_sum})
+
+        at_key = and_(
+            table.c.level == bindparam("b_level"), table.c.cell == bindparam("b_cell")
+        )
+        if inserts:
+            db.session.execute(insert(table), inserts)
+        if updates:
+            db.session.execute(
+                update(table).where(at_key).values(
+                    count=table.c.count + bindparam("b_count"),
+                    lat_sum=table.c.lat_sum + bindparam("b_lat_sum"),
+                    lon_sum=table.c.lon_sum + bindparam("b_lon_sum"),
+                ),
+                updates,
+            )
+        if deletes:
+            db.session.execute(delete(table).where(at_key), deletes)
+
+        # Clusters already loaded in this session must re-read their totals.
+        mapper = inspect(self.model)
+        for key in existing:
+            cluster = db.session.identity_map.get(
+                mapper.identity_key_from_primary_key(list(key))
+            )
+            if cluster is not None:
+                db.session.expire(cluster)
+
+    def get_cells(self, level, boxes):
+        """Clusters of one level inside any of the given non-wrapping boxes."""
+        from app import db
+        from sqlalchemy import or_, select
+        from app.persistence.geo import (
+            box_contains_cell,
+            cell_ranges,
+            cluster_cell_degrees,
+        )
+
+        size = cluster_cell_degrees(level)
+        ranges = [r for box in boxes for r in cell_ranges(box, size)]
+        stmt = select(self.model).where(
+            self.model.level == level,
+            or_(*(self.model.cell.between(lo, hi) for lo, hi in ranges)),
+        )
+        clusters = db.session.execute(stmt).scalars().all()
+        # Wide boxes are read as whole latitude bands; drop cells outside them.
+        return [
+            c for c in clusters
+            if any(box_contains_cell(box, c.cell, size) for box in boxes)
+        ]
+
+    def is_empty(self):
+        from app import db
+        from sqlalchemy import select
+
+        return db.session.execute(select(self.model.level).limit(1)).first() is None
+
+    def rebuild(self, coordinates):
+        """Replace every aggregate with ones computed from (lat, lon) pairs."""
+        from app import db
+        from sqlalchemy import delete, insert
+        from app.persistence.geo import (
+            CLUSTER_MAX_LEVEL,
+            cell_key,
+            cluster_cell_degrees,
+        )
+
+        sizes = [
+            (level, cluster_cell_degrees(level))
+            for level in range(CLUSTER_MAX_LEVEL + 1)
+        ]
+        totals = {}
+        for lat, lon in coordinates:
+            for level, size in sizes:
+                entry = totals.setdefault(
+                    (level, cell_key(lat, lon, size)), [0, 0.0, 0.0]
+                )
+                entry[0] += 1
+                entry[1] += lat
+                entry[2] += lon
+        db.session.execute(delete(self.model))
+        if totals:
+            db.session.execute(insert(self.model), [
+                {"level": level, "cell": cell, "count": c, "lat_sum": la, "lon_sum": lo}
+                for (level, cell), (c, la, lo) in totals.items()
+            ])
+        transaction.commit(db.session)
+        return len(totals)
@@ -0,0 +1,97 @@
+"""Bring a database created by an older version up to the current models.
+
+``db.create_all()`` creates missing tables but never alters existing ones,
+so a column or index added to a model would be missing from every database
+made before it. ``upgrade`` adds those with ALTER TABLE / CREATE INDEX, then
+fills the new columns of existing rows with the backfill registered for
+them. It runs at every startup and does nothing once the schema is current.
+
+New columns must be nullable or have a server default, since the rows
+already in the table get the default when the column is added.
+"""
+from sqlalchemy import bindparam, inspect, select, update
+from sqlalchemy.schema import CreateColumn
+
+from app.persistence import versions
+
+
+def upgrade(engine):
+    """Add missing columns and indexes to existing tables and backfill them.
+
+    Call after ``db.create_all()``. Returns the set of (table, column)
+    pairs that were added.
+    """
+    from app import db
+
+    with engine.begin() as conn:
+        added = add_missing(conn, db.metadata)
+        backfill(conn, added)
+    return added
+
+
+def add_missing(conn, metadata):
+    """ALTER tables of ``metadata`` that exist but lack columns or indexes."""
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    preparer = conn.dialect.identifier_preparer
+    added = set()
+    for table in metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        have = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in have:
+                continue
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}"
+            )
+            added.add((table.name, column.name))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    return added
+
+
+def backfill(conn, columns):
+    """Run the backfill of every group with a column in ``columns``."""
+    for needs, fill in _BACKFILLS:
+        if needs & set(columns):
+            fill(conn)
+
+
+def _places():
+    from app.models.place import Place
+
+    return Place.__table__
+
+
+def _fill_geo_cells(conn):
+    from app.persistence.geo import cell_key
+
+    places = _places()
+    rows = conn.execute(select(places.c.id, places.c.latitude, places.c.longitude))
+    params = [{"b_id": r.id, "b_cell": cell_key(r.latitude, r.longitude)} for r in rows]
+    if params:
+        conn.execute(
+            update(places)
+            .where(places.c.id == bindparam("b_id"))
+            .values(geo_cell=bindparam("b_cell")),
+            params,
+        )
+        versions.bump(conn, [places.name])
+
+
+def _fill_ratings(conn):
+    from app.persistence.repository import PlaceRepository
+
+    PlaceRepository().write_ratings(conn)
+
+
+_RATING_COLUMNS = {("places", c) for c in ("review_count", "rating_sum", "rating_avg")}
+_RATING_COLUMNS |= {("places", f"rating_{r}") for r in range(1, 6)}
+
+# (columns, fill): fill(connection) computes ``columns`` for existing rows.
+_BACKFILLS = [
+    ({("places", "geo_cell")}, _fill_geo_cells),
+    (_RATING_COLUMNS, _fill_ratings),
+]
@@ -0,0 +1,216 @@
+"""Full-text search over place titles and descriptions.
+
+On SQLite the text lives in an FTS5 virtual table, ``places_fts``, kept in
+sync with ``places`` by mapper events. Searches are then an index probe
+ranked with BM25. Other databases, or SQLite builds without FTS5, fall back
+to a LIKE scan so the endpoint keeps working.
+
+An FTS row shares its rowid with the matching ``places`` row, so events
+reach it with a rowid lookup. SQLite may renumber implicit rowids on
+VACUUM, so call rebuild_index() after vacuuming.
+"""
+import html
+import re
+import weakref
+
+from sqlalchemy import bindparam, event, func, or_, select, text
+
+from app.models.ids import EntityId
+
+FTS_TABLE = "places_fts"
+
+# Title matches count ten times as much as description matches.
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Private-use markers around matches, swapped for <mark> once escaped.
+_OPEN, _CLOSE = "\ue000", "\ue001"
+
+# Engines whose database has a places_fts table.
+_indexed_engines = weakref.WeakSet()
+
+
+def create_index(engine):
+    """Create places_fts if needed and backfill it. Returns True on success."""
+    from sqlalchemy.exc import OperationalError
+
+    if engine.dialect.name != "sqlite":
+        return False
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "place_id UNINDEXED, title, description, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            indexed = conn.exec_driver_sql(f"SELECT count(*) FROM {FTS_TABLE}").scalar()
+            if not indexed:
+                _fill(conn)
+    except OperationalError:
+        # SQLite compiled without FTS5.
+        return False
+    _indexed_engines.add(engine)
+    return True
+
+
+def rebuild_index(engine):
+    """Re-populate places_fts from places, e.g. after the tables were recreated."""
+    if engine not in _indexed_engines:
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+        _fill(conn)
+
+
+def _fill(conn):
+    conn.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE} (rowid, place_id, title, description) "
+        "SELECT rowid, id, title, description FROM places"
+    )
+
+
+def is_indexed(engine):
+    return engine in _indexed_engines
+
+
+def mark_indexed(engine):
+    """Record that ``engine`` sees a places_fts kept current elsewhere (a replica)."""
+    _indexed_engines.add(engine)
+
+
+def match_expression(query):
+    """Turn free text into a safe FTS5 query: every word must match.
+
+    Words are quoted so FTS5 operators in user input are searched as text,
+    and the last word is a prefix so results follow the user as they type.
+    """
+    terms = re.findall(r"\w+", query or "")
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    quoted = ['"%s"' % term for term in terms[:16]]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlight(snippet):
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def search(session, query, limit, offset=0):
+    """Rank places for ``query``.
+
+    Returns (hits, total) where hits are dicts with place_id, rank and
+    HTML-escaped title/description snippets, best match first.
+    """
+    engine = session.get_bind()
+    if not is_indexed(engine):
+        return _search_like(session, query, limit, offset)
+
+    params = {"q": match_expression(query), "limit": limit, "offset": offset}
+    total = session.execute(
+        text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q"), params
+    ).scalar()
+    rows = session.execute(
+        text(
+            f"SELECT place_id, "
+            f"bm25({FTS_TABLE}, 0.0, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) AS rank, "
+            f"snippet({FTS_TABLE}, 1, '{_OPEN}', '{_CLOSE}', '…', 10) AS title, "
+            f"snippet({FTS_TABLE}, 2, '{_OPEN}', '{_CLOSE}', '…', 24) AS description "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q "
+            "ORDER BY rank LIMIT :limit OFFSET :offset"
+        ).columns(place_id=EntityId),
+        params,
+    ).all()
+    hits = [
+        {
+            "place_id": r.place_id,
+            "rank": r.rank,
+            "title": _highlight(r.title),
+            "description": _highlight(r.description),
+        }
+        for r in rows
+    ]
+    return hits, total
+
+
+def _search_like(session, query, limit, offset):
+    from app.models.place import Place
+
+    terms = re.findall(r"\w+", query or "")
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    criteria = [
+        or_(Place.title.ilike(f"%{term}%"), Place.description.ilike(f"%{term}%"))
+        for term in terms[:16]
+    ]
+    total = session.execute(select(func.count(Place.id)).where(*criteria)).scalar()
+    rows = session.execute(
+        select(Place.id, Place.title, Place.description)
+        .where(*criteria)
+        .order_by(Place.title, Place.id)
+        .limit(limit)
+        .offset(offset)
+    ).all()
+    hits = [
+        {
+            "place_id": r.id,
+            "rank": None,
+            "title": html.escape(r.title),
+            "description": html.escape(r.description) if r.description else None,
+        }
+        for r in rows
+    ]
+    return hits, total
+
+
+def _title_or_description_changed(target):
+    from sqlalchemy import inspect
+
+    state = inspect(target)
+    return (state.attrs.title.history.has_changes()
+            or state.attrs.description.history.has_changes())
+
+
+def register(place_model):
+    """Keep places_fts in step with every ORM write to ``place_model``."""
+    place_rowid = "(SELECT rowid FROM places WHERE id = :id)"
+    # Ids go through the column type, which may store them as bytes.
+    id_param = bindparam("id", type_=EntityId)
+
+    @event.listens_for(place_model, "after_insert")
+    def _index_insert(mapper, connection, target):
+        if connection.engine in _indexed_engines:
+            connection.execute(
+                text(f"INSERT OR REPLACE INTO {FTS_TABLE} "
+                     "(rowid, place_id, title, description) "
+                     "SELECT rowid, id, title, description FROM places WHERE id = :id"
+                     ).bindparams(id_param),
+                {"id": target.id},
+            )
+
+    @event.listens_for(place_model, "after_update")
+    def _index_update(mapper, connection, target):
+        if connection.engine not in _indexed_engines:
+            return
+        if _title_or_description_changed(target):
+            stmt = text(
+                f"UPDATE {FTS_TABLE} SET title = :title, description = :description"
+                f" WHERE rowid = {place_rowid}"
+            )
+            connection.execute(
+                stmt.bindparams(id_param),
+                {
+                    "id": target.id,
+                    "title": target.title,
+                    "description": target.description,
+                },
+            )
+
+    @event.listens_for(place_model, "before_delete")
+    def _index_delete(mapper, connection, target):
+        if connection.engine in _indexed_engines:
+            stmt = text(f"DELETE FROM {FTS_TABLE} WHERE rowid = {place_rowid}")
+            connection.execute(stmt.bindparams(id_param), {"id": target.id})
@@ -0,0 +1,63 @@
+"""Per-connection SQLite tuning.
+
+SQLite keeps most settings per connection, so the pragmas in the
+SQLITE_PRAGMAS config dict are issued from a ``connect`` event on every new
+DB-API connection the pool opens. With the production values the database
+runs in WAL mode, where readers keep reading a snapshot while a writer
+commits instead of waiting for its lock, and commits only fsync at
+checkpoints (``synchronous=NORMAL``).
+
+Other dialects are left alone; their pool options come from
+SQLALCHEMY_ENGINE_OPTIONS as usual.
+"""
+from sqlalchemy import event
+
+# journal_mode first: later pragmas such as mmap_size apply to the open file.
+_ORDER = (
+    "journal_mode",
+    "synchronous",
+    "busy_timeout",
+    "mmap_size",
+    "cache_size",
+    "foreign_keys",
+)
+
+
+def _statements(pragmas):
+    def rank(name):
+        return (_ORDER.index(name) if name in _ORDER else len(_ORDER), name)
+
+    names = sorted(pragmas, key=rank)
+    return [f"PRAGMA {name}={pragmas[name]}" for name in names]
+
+
+def configure_engine(engine, pragmas):
+    """Issue ``pragmas`` ({name: value}) on each new connection of a SQLite engine."""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return False
+    statements = _statements(pragmas)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    # Connections opened before the listener existed miss the pragmas.
+    engine.dispose()
+    return True
+
+
+def init_app(app):
+    from app import db
+
+    with app.app_context():
+        configure_engine(db.engine, app.config.get("SQLITE_PRAGMAS"))
+
+
+def pragma(connection, name):
+    """Current value of a pragma on a SQLAlchemy connection."""
+    return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
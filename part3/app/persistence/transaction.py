@@ -0,0 +1,60 @@
+"""Units of work: one commit for a whole multi-step operation.
+
+Repositories and the facade finish writes with commit(session). Outside a
+unit of work that commits as before; inside one it only flushes, and the
+outermost unit_of_work() commits once at exit, or rolls everything back if
+an exception escapes or the unit was discarded.
+"""
+from contextlib import contextmanager
+
+_DEPTH_KEY = "unit_of_work_depth"
+_DISCARD_KEY = "unit_of_work_discarded"
+
+
+class UnitOfWork:
+    def __init__(self, session):
+        self.session = session
+
+    def discard(self):
+        """Roll back instead of committing when the outermost unit exits."""
+        self.session.info[_DISCARD_KEY] = True
+
+
+def in_unit_of_work(session):
+    return session.info.get(_DEPTH_KEY, 0) > 0
+
+
+@contextmanager
+def unit_of_work(session):
+    """Defer every commit(session) inside the block to a single commit at exit.
+
+    Units nest; only the outermost one commits. An exception escaping any of
+    them rolls the whole unit back.
+    """
+    depth = session.info.get(_DEPTH_KEY, 0)
+    session.info[_DEPTH_KEY] = depth + 1
+    try:
+        yield UnitOfWork(session)
+    except BaseException:
+        session.info[_DISCARD_KEY] = True
+        raise
+    finally:
+        session.info[_DEPTH_KEY] = depth
+        if depth == 0:
+            discarded = session.info.pop(_DISCARD_KEY, False)
+            if discarded:
+                session.rollback()
+            else:
+                try:
+                    session.commit()
+                except BaseException:
+                    session.rollback()
+                    raise
+
+
+def commit(session):
+    """Commit now, or just flush when a unit of work will commit later."""
+    if in_unit_of_work(session):
+        session.flush()
+    else:
+        session.commit()
@@ -0,0 +1,80 @@
+"""Per-table version counters backing conditional GETs.
+
+Every flush that inserts, updates or deletes ORM objects bumps the counter
+of the tables it touched, inside the same transaction, so a rolled back
+write leaves the version alone. Code that writes with Core statements
+instead of the ORM calls bump() itself.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, inspect, insert, select, update
+
+
+def _table():
+    from app.models.table_version import TableVersion
+
+    return TableVersion.__table__
+
+
+def bump(connection, names):
+    """Increment the version of each table in ``names``, creating missing rows."""
+    names = sorted(set(names))
+    if not names:
+        return
+    table = _table()
+    now = datetime.utcnow()
+    result = connection.execute(
+        update(table)
+        .where(table.c.name.in_(names))
+        .values(version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount == len(names):
+        return
+    existing = set(
+        connection.execute(
+            select(table.c.name).where(table.c.name.in_(names))
+        ).scalars()
+    )
+    missing = [
+        {"name": n, "version": 1, "updated_at": now} for n in names if n not in existing
+    ]
+    if missing:
+        connection.execute(insert(table), missing)
+
+
+def snapshot(session, names):
+    """Current state of ``names`` as (version token, last modified datetime).
+
+    The token changes whenever any of the tables is written. The datetime is
+    None while none of them has been written yet.
+    """
+    table = _table()
+    rows = session.execute(
+        select(table.c.name, table.c.version, table.c.updated_at)
+        .where(table.c.name.in_(sorted(set(names))))
+    ).all()
+    token = ",".join(f"{r.name}:{r.version}:{r.updated_at.isoformat()}"
+                     for r in sorted(rows))
+    last_modified = max((r.updated_at for r in rows), default=None)
+    return token, last_modified
+
+
+def _written_tables(session):
+    names = set()
+    for obj in session.new | session.deleted:
+        names.add(inspect(obj).mapper.local_table.name)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            names.add(inspect(obj).mapper.local_table.name)
+    names.discard(_table().name)
+    return names
+
+
+def register(session):
+    """Bump table versions after every flush of ``session``."""
+
+    @event.listens_for(session, "after_flush")
+    def _bump_written_tables(session, flush_context):
+        names = _written_tables(session)
+        if names:
+            bump(session.connection(), names)
@@ -1,13 +1,22 @@
+import heapq
+
 from app.models.amenity import Amenity
 from app.models.place import Place
 from app.models.review import Review
+from app.models.table_version import TableVersion  # noqa: F401 (version bumps)
 from app.models.user import User
+from app.persistence import cache, geo, search, transaction, versions
 from app.persistence.repository import (
+    Page,
+    decode_cursor,
+    encode_cursor,
     UserRepository,
     PlaceRepository,
     ReviewRepository,
-    AmenityRepository
+    AmenityRepository,
+    PlaceClusterRepository,
 )
+from app.services.loader import request_loader
 
 
 class HBnBFacade:
@@ -16,6 +25,38 @@ class HBnBFacade:
         self.amenity_repo = AmenityRepository()
         self.place_repo = PlaceRepository()
         self.review_repo = ReviewRepository()
+        self.cluster_repo = PlaceClusterRepository()
+
+    def user_loader(self):
+        """Batching user loader shared by the current request."""
+        return request_loader("user", self.user_repo)
+
+    def place_loader(self):
+        """Batching place loader shared by the current request.
+
+        Places are loaded without their amenities, which the summaries built
+        from this loader never show.
+        """
+        return request_loader(
+            "place", self.place_repo, self.place_repo.summary_options()
+        )
+
+    def unit_of_work(self):
+        """Context manager making the enclosed facade calls commit once, at exit."""
+        from app import db
+
+        return transaction.unit_of_work(db.session)
+
+    def get_table_versions(self, names):
+        """(version token, last modified) of the given tables, for conditional GETs."""
+        from app import db
+
+        return versions.snapshot(db.session, names)
+
+    def get_entity_cache_stats(self):
+        """Size and hit/miss counters of the entity cache, or None when it is off."""
+        entity_cache = cache.current_cache()
+        return entity_cache.stats() if entity_cache else None
 
     def get_user_by_email(self, email: str):
         """Retrieve a user by email address."""
@@ -38,12 +79,37 @@ class HBnBFacade:
         self.user_repo.add(user)
         return user
 
+    def authenticate(self, email, password):
+        """The user with these credentials, or None.
+
+        A password hashed with another bcrypt cost than BCRYPT_LOG_ROUNDS is
+        rehashed with the current one while the plain text is at hand.
+        """
+        from app import db
+
+        user = self.get_user_by_email(email)
+        if not user or not user.verify_password(password):
+            return None
+        if user.password_needs_rehash():
+            user.hash_password(password)
+            transaction.commit(db.session)
+        return user
+
     def get_user(self, user_id):
         return self.user_repo.get(user_id)
 
     def get_all_users(self):
         return self.user_repo.get_all()
 
+    def get_users_page(self, limit, cursor=None, sort=None, fields=None):
+        return self.user_repo.get_page(limit, cursor=cursor, sort=sort, fields=fields)
+
+    def stream_users(self, batch_size, cursor=None, sort=None, fields=None):
+        """Every user in get_users_page order, as batches of ``batch_size``."""
+        return self.user_repo.iter_batches(
+            batch_size, cursor=cursor, sort=sort, fields=fields
+        )
+
     def update_user(self, user_id, data):
         from app import db
 
@@ -69,7 +135,7 @@ class HBnBFacade:
         if filtered:
             user.update(filtered)
 
-        db.session.commit()
+        transaction.commit(db.session)
         return user
 
     def create_amenity(self, data):
@@ -85,29 +151,48 @@ class HBnBFacade:
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
 
+    def get_amenities_page(self, limit, cursor=None, sort=None, fields=None):
+        return self.amenity_repo.get_page(
+            limit, cursor=cursor, sort=sort, fields=fields
+        )
+
+    def stream_amenities(self, batch_size, cursor=None, sort=None, fields=None):
+        """Every amenity in get_amenities_page order, as batches of ``batch_size``."""
+        return self.amenity_repo.iter_batches(
+            batch_size, cursor=cursor, sort=sort, fields=fields
+        )
+
     def update_amenity(self, amenity_id, data):
         from app import db
         amenity = self.get_amenity(amenity_id)
         if not amenity:
             return None
         amenity.update(data)
-        db.session.commit()
+        transaction.commit(db.session)
         return amenity
 
     def delete_amenity(self, amenity_id):
         self.amenity_repo.delete(amenity_id)
 
+    def create_amenities(self, items):
+        """Create many amenities in one transaction; returns (created, errors)."""
+        amenities, errors = [], []
+        for index, data in enumerate(items):
+            try:
+                amenities.append(Amenity(name=_item(data, ("name",))["name"]))
+            except (TypeError, ValueError) as e:
+                errors.append(_item_error(index, e))
+        self.amenity_repo.add_many(amenities)
+        return _reloaded(self.amenity_repo, amenities), errors
+
     def create_place(self, data):
+        from app import db
+
         owner = self.user_repo.get(data.get("owner_id"))
         if not owner:
             raise ValueError("Owner not found")
 
-        # Get Amenity objects (not just IDs) for the relationship
-        amenity_objects = []
-        for amenity_id in data.get("amenities", []):
-            amenity = self.amenity_repo.get(amenity_id)
-            if amenity:
-                amenity_objects.append(amenity)
+        amenity_objects = self._resolve_amenities(data.get("amenities") or [])
 
         place = Place(
             title=data.get("title"),
@@ -118,42 +203,298 @@ class HBnBFacade:
             owner_id=owner.id,
             amenities=amenity_objects,
         )
+        db.session.add(place)
+        self.cluster_repo.adjust([(place.latitude, place.longitude, 1)])
         self.place_repo.add(place)
         return place
 
+    def create_places(self, items):
+        """Create many places in one transaction.
+
+        Owners and amenities of the whole batch are resolved with one query
+        each. Returns (created, errors) where errors lists the index and
+        reason of every rejected item; valid items are created regardless.
+        """
+        from app import db
+
+        dicts = [item for item in items if isinstance(item, dict)]
+        owner_ids = {u.id for u in self.user_repo.get_many(
+            {d.get("owner_id") for d in dicts if isinstance(d.get("owner_id"), str)}
+        )}
+        amenities = {a.id: a for a in self.amenity_repo.get_many(
+            {a for d in dicts if isinstance(d.get("amenities"), list)
+             for a in d["amenities"] if isinstance(a, str)}
+        )}
+
+        places, errors = [], []
+        for index, data in enumerate(items):
+            try:
+                data = _item(data, ("title", "price", "latitude", "longitude"))
+                if data.get("owner_id") not in owner_ids:
+                    raise ValueError("Owner not found")
+                places.append(Place(
+                    title=data.get("title"),
+                    description=data.get("description"),
+                    price=data.get("price"),
+                    latitude=data.get("latitude"),
+                    longitude=data.get("longitude"),
+                    owner_id=data.get("owner_id"),
+                    amenities=_pick_amenities(data.get("amenities") or [], amenities),
+                ))
+            except (TypeError, ValueError) as e:
+                errors.append(_item_error(index, e))
+
+        if places:
+            db.session.add_all(places)
+            self.cluster_repo.adjust([(p.latitude, p.longitude, 1) for p in places])
+            self.place_repo.add_many(places)
+        return self._place_cards_by_id(_identities(places)), errors
+
+    def update_amenity_links(self, link=(), unlink=(), owner_id=None):
+        """Link and unlink (place, amenity) pairs in one transaction.
+
+        ``link`` and ``unlink`` are lists of {"place_id", "amenity_id"}. With
+        ``owner_id`` set, only places owned by that user may be changed.
+        Linking a linked pair or unlinking a missing one is a no-op. Returns
+        (linked, unlinked, errors); errors carry the list name and index.
+        """
+        from app import db
+
+        requested = [("link", i, d) for i, d in enumerate(link)]
+        requested += [("unlink", i, d) for i, d in enumerate(unlink)]
+        dicts = [d for _, _, d in requested if isinstance(d, dict)]
+        places = {p.id: p for p in self.place_repo.get_many(
+            {d.get("place_id") for d in dicts if isinstance(d.get("place_id"), str)},
+            options=self.place_repo.summary_options(),
+        )}
+        amenity_ids = {a.id for a in self.amenity_repo.get_many(
+            {d.get("amenity_id") for d in dicts if isinstance(d.get("amenity_id"), str)}
+        )}
+
+        pairs = {"link": set(), "unlink": set()}
+        errors = []
+        for kind, index, data in requested:
+            try:
+                data = _item(data)
+                place = places.get(data.get("place_id"))
+                if place is None:
+                    raise ValueError("Place not found")
+                if data.get("amenity_id") not in amenity_ids:
+                    raise ValueError("Amenity not found")
+                if owner_id is not None and place.owner_id != owner_id:
+                    raise ValueError("Unauthorized action")
+                pairs[kind].add((place.id, data["amenity_id"]))
+            except (TypeError, ValueError) as e:
+                errors.append(dict(_item_error(index, e), list=kind))
+
+        existing = self.place_repo.existing_amenity_links(
+            pairs["link"] | pairs["unlink"]
+        )
+        to_link = pairs["link"] - existing
+        to_unlink = (pairs["unlink"] & existing) - pairs["link"]
+        if to_link:
+            self.place_repo.link_amenities(to_link)
+        if to_unlink:
+            self.place_repo.unlink_amenities(to_unlink)
+        transaction.commit(db.session)
+        return len(to_link), len(to_unlink), errors
+
+    def _resolve_amenities(self, amenity_ids):
+        """Amenities for a list of ids, fetched with one query.
+
+        Raises ValueError naming any id that does not exist.
+        """
+        if not isinstance(amenity_ids, list) or not all(
+            isinstance(a, str) for a in amenity_ids
+        ):
+            raise ValueError("amenities must be a list of amenity IDs")
+        found = {a.id: a for a in self.amenity_repo.get_many(amenity_ids)}
+        return _pick_amenities(amenity_ids, found)
+
     def get_place(self, place_id):
         return self.place_repo.get(place_id)
 
     def get_all_places(self):
         return self.place_repo.get_all()
 
+    def get_places_page(self, limit, cursor=None, sort=None, filters=None, fields=None):
+        """One page of place cards, owners and amenities eagerly loaded.
+
+        ``filters`` takes min_price, max_price, amenity_ids and owner_id.
+        ``fields`` limits the load to the named API fields.
+        """
+        return self.place_repo.get_page(
+            limit,
+            cursor=cursor,
+            sort=sort,
+            criteria=self._place_criteria(filters),
+            options=self.place_repo.card_options(fields),
+            fields=fields,
+        )
+
+    def stream_places(
+        self, batch_size, cursor=None, sort=None, filters=None, fields=None
+    ):
+        """Every place card matching ``filters``, as batches of ``batch_size``."""
+        return self.place_repo.iter_batches(
+            batch_size,
+            cursor=cursor,
+            sort=sort,
+            criteria=self._place_criteria(filters),
+            options=self.place_repo.card_options(fields),
+            fields=fields,
+        )
+
+    def _place_criteria(self, filters):
+        filters = filters or {}
+        min_price = filters.get("min_price")
+        max_price = filters.get("max_price")
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValueError("min_price cannot exceed max_price")
+        return self.place_repo.filter_criteria(**filters)
+
+    def _place_cards_by_id(self, place_ids, fields=None):
+        places = self.place_repo.get_many(
+            place_ids, options=self.place_repo.card_options(fields), fields=fields
+        )
+        by_id = {p.id: p for p in places}
+        return [by_id[i] for i in place_ids if i in by_id]
+
+    def get_places_near(self, lat, lon, radius_km, limit, fields=None):
+        """Places within ``radius_km`` of a point, nearest first.
+
+        Returns (place, distance_km) pairs.
+        """
+        if not (-90 <= lat <= 90):
+            raise ValueError("Invalid latitude")
+        if not (-180 <= lon <= 180):
+            raise ValueError("Invalid longitude")
+        if radius_km <= 0:
+            raise ValueError("radius_km must be positive")
+
+        rows = self.place_repo.get_coordinates_in_boxes(
+            geo.boxes_around(lat, lon, radius_km)
+        )
+        distances = (
+            (geo.haversine_km(lat, lon, r.latitude, r.longitude), r.id) for r in rows
+        )
+        nearest = heapq.nsmallest(
+            limit, (d for d in distances if d[0] <= radius_km)
+        )
+        places = self._place_cards_by_id([place_id for _, place_id in nearest], fields)
+        distance_by_id = {place_id: d for d, place_id in nearest}
+        return [(p, distance_by_id[p.id]) for p in places]
+
+    def search_places(self, query, limit, cursor=None, fields=None):
+        """Full-text search as a Page of (place, hit) pairs, best match first.
+
+        ``hit`` carries the BM25 rank and highlighted snippets. Ranked
+        results are paged by offset, carried in the usual opaque cursor.
+        """
+        from app import db
+
+        offset = 0
+        if cursor:
+            kind, offset, _ = decode_cursor(cursor)
+            if kind != "search" or not isinstance(offset, int) or offset < 0:
+                raise ValueError("Invalid cursor")
+        hits, total = search.search(db.session, query, limit, offset)
+        places = self._place_cards_by_id([h["place_id"] for h in hits], fields)
+        by_id = {p.id: p for p in places}
+        items = [(by_id[h["place_id"]], h) for h in hits if h["place_id"] in by_id]
+        next_cursor = None
+        if offset + len(hits) < total:
+            next_cursor = encode_cursor("search", offset + len(hits), None)
+        return Page(items, next_cursor, total)
+
+    def get_places_in_bbox(
+        self, min_lon, min_lat, max_lon, max_lat, limit, fields=None
+    ):
+        """Places inside a west,south,east,north box (may cross the antimeridian)."""
+        boxes = geo.split_bbox(min_lon, min_lat, max_lon, max_lat)
+        rows = self.place_repo.get_coordinates_in_boxes(boxes)
+        return self._place_cards_by_id(sorted(r.id for r in rows)[:limit], fields)
+
+    def get_places_in_polygon(self, points, limit, fields=None):
+        """Places inside a simple polygon given as a list of (lat, lon) vertices."""
+        if len(points) < 3:
+            raise ValueError("A polygon needs at least 3 vertices")
+        for lat, lon in points:
+            if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+                raise ValueError("Invalid polygon vertex")
+        min_lat, min_lon, max_lat, max_lon = geo.polygon_bbox(points)
+        rows = self.place_repo.get_coordinates_in_boxes(
+            [(min_lat, min_lon, max_lat, max_lon)]
+        )
+        inside = sorted(
+            r.id for r in rows if geo.point_in_polygon(r.latitude, r.longitude, points)
+        )
+        return self._place_cards_by_id(inside[:limit], fields)
+
     def update_place(self, place_id, data):
         from app import db
         place = self.get_place(place_id)
         if not place:
             return None
 
-        # Handle amenities relationship separately
-        if 'amenities' in data:
-            amenity_ids = data.pop('amenities')
-            amenity_objects = []
-            for amenity_id in amenity_ids:
-                amenity = self.amenity_repo.get(amenity_id)
-                if amenity:
-                    amenity_objects.append(amenity)
-            place.amenities = amenity_objects
+        data = dict(data)
+        if "amenities" in data:
+            # Only the place_amenity rows that actually change are written.
+            wanted = {
+                a.id for a in self._resolve_amenities(data.pop("amenities") or [])
+            }
+            current = self.place_repo.get_amenity_ids(place.id)
+            self.place_repo.link_amenities((place.id, a) for a in wanted - current)
+            self.place_repo.unlink_amenities((place.id, a) for a in current - wanted)
 
         # Update other attributes
+        old_position = (place.latitude, place.longitude)
         place.update(data)
-        db.session.commit()
+        new_position = (place.latitude, place.longitude)
+        if new_position != old_position:
+            self.cluster_repo.adjust([(*old_position, -1), (*new_position, 1)])
+        transaction.commit(db.session)
         return place
 
     def delete_place(self, place_id):
+        place = self.get_place(place_id)
+        if place:
+            self.cluster_repo.adjust([(place.latitude, place.longitude, -1)])
         self.place_repo.delete(place_id)
 
+    def get_place_clusters(self, min_lon, min_lat, max_lon, max_lat, zoom):
+        """Cluster aggregates covering a viewport as (level, clusters).
+
+        The level follows the map zoom but is coarsened until the viewport
+        spans at most geo.CLUSTER_MAX_CELLS cells.
+        """
+        boxes = geo.split_bbox(min_lon, min_lat, max_lon, max_lat)
+        level = geo.zoom_to_level(zoom)
+        while level > 0 and sum(
+            geo.cells_in_box(box, geo.cluster_cell_degrees(level)) for box in boxes
+        ) > geo.CLUSTER_MAX_CELLS:
+            level -= 1
+        return level, self.cluster_repo.get_cells(level, boxes)
+
+    def place_clusters_missing(self):
+        return self.cluster_repo.is_empty() and bool(self.place_repo.get_page(1).items)
+
+    def rebuild_place_clusters(self):
+        """Recompute every cluster aggregate from the places table."""
+        from app import db
+        from sqlalchemy import select
+
+        rows = db.session.execute(
+            select(Place.latitude, Place.longitude).execution_options(yield_per=5000)
+        )
+        return self.cluster_repo.rebuild((r.latitude, r.longitude) for r in rows)
+
     def create_review(self, data):
-        user = self.user_repo.get(data.get("user_id"))
-        place = self.place_repo.get(data.get("place_id"))
+        users, places = self.user_loader(), self.place_loader()
+        users.want([data.get("user_id")])
+        places.want([data.get("place_id")])
+        user = users.load(data.get("user_id"))
+        place = places.load(data.get("place_id"))
 
         if not user:
             raise ValueError("User not found")
@@ -170,30 +511,143 @@ class HBnBFacade:
             user_id=user.id,
             place_id=place.id,
         )
+        self.place_repo.adjust_ratings([(place.id, review.rating, 1)])
         self.review_repo.add(review)
         return review
 
+    def create_reviews(self, items, author_id=None):
+        """Create many reviews in one transaction; returns (created, errors).
+
+        With ``author_id`` set, every review must be written by that user.
+        Rating aggregates of all touched places are updated together.
+        """
+        users, places = self.user_loader(), self.place_loader()
+        dicts = [item for item in items if isinstance(item, dict)]
+        users.want(d.get("user_id") for d in dicts if isinstance(d.get("user_id"), str))
+        places.want(
+            d.get("place_id") for d in dicts if isinstance(d.get("place_id"), str)
+        )
+
+        reviews, errors = [], []
+        for index, data in enumerate(items):
+            try:
+                data = _item(data, ("text", "rating", "user_id", "place_id"))
+                if author_id is not None and data.get("user_id") != author_id:
+                    raise ValueError("Unauthorized action")
+                user_id, place_id = data.get("user_id"), data.get("place_id")
+                if not isinstance(user_id, str) or not users.load(user_id):
+                    raise ValueError("User not found")
+                if not isinstance(place_id, str) or not places.load(place_id):
+                    raise ValueError("Place not found")
+                reviews.append(Review(
+                    text=data.get("text"),
+                    rating=data.get("rating"),
+                    user_id=data["user_id"],
+                    place_id=data["place_id"],
+                ))
+            except (TypeError, ValueError) as e:
+                errors.append(_item_error(index, e))
+
+        if reviews:
+            self.place_repo.adjust_ratings([(r.place_id, r.rating, 1) for r in reviews])
+            self.review_repo.add_many(reviews)
+        return _reloaded(self.review_repo, reviews), errors
+
     def get_review(self, review_id):
         return self.review_repo.get(review_id)
 
     def get_all_reviews(self):
         return self.review_repo.get_all()
 
+    def get_reviews_page(self, limit, cursor=None, sort=None, fields=None):
+        return self.review_repo.get_page(limit, cursor=cursor, sort=sort, fields=fields)
+
+    def stream_reviews(
+        self, batch_size, cursor=None, sort=None, fields=None, place_id=None
+    ):
+        """Every review, or every review of one place, as batches of ``batch_size``."""
+        criteria = [Review.place_id == place_id] if place_id else []
+        return self.review_repo.iter_batches(
+            batch_size, cursor=cursor, sort=sort, criteria=criteria, fields=fields
+        )
+
     def update_review(self, review_id, data):
         from app import db
         review = self.get_review(review_id)
         if not review:
             return None
+        rating = data.get("rating", review.rating)
+        if (
+            not isinstance(rating, int)
+            or isinstance(rating, bool)
+            or not (1 <= rating <= 5)
+        ):
+            raise ValueError("Rating must be an integer between 1 and 5")
+        before = (review.place_id, review.rating)
         review.update(data)
-        db.session.commit()
+        after = (review.place_id, review.rating)
+        if before != after:
+            self.place_repo.adjust_ratings([before + (-1,), after + (1,)])
+        transaction.commit(db.session)
         return review
 
     def delete_review(self, review_id):
+        review = self.get_review(review_id)
+        if review:
+            self.place_repo.adjust_ratings([(review.place_id, review.rating, -1)])
         self.review_repo.delete(review_id)
 
-    def get_reviews_by_place(self, place_id):
-        return [
-            r for r in self.review_repo.get_all() if r.place_id == place_id
-        ]
+    def rebuild_place_ratings(self):
+        """Recompute all place rating aggregates from reviews; returns places rated."""
+        return self.place_repo.rebuild_ratings()
+
+    def get_place_reviews_page(
+        self, place_id, limit, cursor=None, sort=None, fields=None
+    ):
+        return self.review_repo.get_page(
+            limit,
+            cursor=cursor,
+            sort=sort,
+            criteria=[Review.place_id == place_id],
+            fields=fields,
+        )
+
+
+def _item(data, required=()):
+    if not isinstance(data, dict):
+        raise ValueError("Item must be a JSON object")
+    missing = [name for name in required if data.get(name) is None]
+    if len(missing) == 1:
+        raise ValueError(f"Missing required field: {missing[0]}")
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    return data
+
+
+def _pick_amenities(amenity_ids, found):
+    """Amenities from ``found`` in request order, without duplicates."""
+    if not isinstance(amenity_ids, list):
+        raise ValueError("amenities must be a list of amenity IDs")
+    unknown = [a for a in amenity_ids if a not in found]
+    if unknown:
+        raise ValueError("Unknown amenity id(s): " + ", ".join(map(str, unknown)))
+    return [found[a] for a in dict.fromkeys(amenity_ids)]
+
+
+def _item_error(index, error):
+    message = str(error) if isinstance(error, ValueError) else "Invalid field types"
+    return {"index": index, "error": message}
+
+
+def _identities(objs):
+    """Primary keys of persisted objects, read without refreshing them."""
+    from sqlalchemy import inspect
+
+    return [inspect(obj).identity[0] for obj in objs]
 
 
+def _reloaded(repo, objs):
+    """Refresh freshly committed objects with one query, keeping their order."""
+    ids = _identities(objs)
+    by_id = {obj.id: obj for obj in repo.get_many(ids)}
+    return [by_id[i] for i in ids if i in by_id]
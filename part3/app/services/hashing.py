@@ -0,0 +1,79 @@
+"""Bounded worker pool for password hashing.
+
+bcrypt is deliberately slow and releases the GIL while it works, so hashes
+and checks run on a small thread pool (HASH_WORKERS threads) instead of on
+the request thread's own account. At most HASH_QUEUE_DEPTH further jobs may
+wait for a worker; beyond that ``run`` raises HashingBusy, which the API
+turns into a 503 with Retry-After, so a burst of logins is shed instead of
+holding every server thread while read traffic starves.
+"""
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+
+
+class HashingBusy(Exception):
+    """Every worker is busy and the wait queue is full."""
+
+    def __init__(self, retry_after):
+        super().__init__("Too many password operations in progress, retry later")
+        self.retry_after = retry_after
+
+
+class HashingPool:
+    def __init__(self, workers=2, queue_depth=8, retry_after=1):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="hashing"
+        )
+        self.rejected = 0
+
+    def submit(self, func, *args, **kwargs):
+        """Schedule ``func``; HashingBusy if no worker or queue slot is free."""
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingBusy(self.retry_after)
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func, *args, **kwargs):
+        """``func(*args, **kwargs)`` on a worker thread, waiting for the result."""
+        return self.submit(func, *args, **kwargs).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def init_app(app):
+    pool = HashingPool(
+        workers=app.config.get("HASH_WORKERS", 2),
+        queue_depth=app.config.get("HASH_QUEUE_DEPTH", 8),
+        retry_after=app.config.get("HASH_RETRY_AFTER", 1),
+    )
+    app.extensions["hashing_pool"] = pool
+    # Idle worker threads go away with the app that owns them.
+    weakref.finalize(app, pool.shutdown)
+
+
+def current_pool():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("hashing_pool")
+
+
+def run(func, *args, **kwargs):
+    """Run ``func`` on the current app's hashing pool, or inline without one."""
+    pool = current_pool()
+    if pool is None:
+        return func(*args, **kwargs)
+    return pool.run(func, *args, **kwargs)
@@ -0,0 +1,69 @@
+"""Request-scoped batching of user and place lookups."""
+from flask import g, has_app_context
+
+
+class EntityLoader:
+    """Batches lookups of one entity type and memoizes the results.
+
+    Callers first announce the ids they will need with ``want``; the first
+    ``load`` then resolves everything pending with a single ``IN`` query.
+    Missing ids are remembered as None so they are not queried again.
+    """
+
+    def __init__(self, repo, options=()):
+        self.repo = repo
+        self.options = options
+        self._cache = {}
+        self._pending = set()
+
+    def prime(self, obj):
+        """Record an object the caller already holds."""
+        if obj is not None:
+            self._cache[obj.id] = obj
+            self._pending.discard(obj.id)
+
+    def want(self, obj_ids):
+        self._pending.update(i for i in obj_ids if i and i not in self._cache)
+
+    def dispatch(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, set()
+        found = {
+            obj.id: obj for obj in self.repo.get_many(pending, options=self.options)
+        }
+        for obj_id in pending:
+            self._cache[obj_id] = found.get(obj_id)
+
+    def load(self, obj_id):
+        if obj_id not in self._cache:
+            self.want([obj_id])
+        self.dispatch()
+        return self._cache.get(obj_id)
+
+    def load_many(self, obj_ids):
+        obj_ids = list(obj_ids)
+        self.want(obj_ids)
+        self.dispatch()
+        return {i: self._cache.get(i) for i in obj_ids}
+
+
+def request_loader(kind, repo, options=()):
+    """The EntityLoader for ``kind`` shared by everything in the current request.
+
+    Loaders live on ``flask.g`` and are dropped at request teardown (see
+    create_app), so memoized objects never outlive the request's session.
+    Outside an app context every call gets a fresh, unshared loader.
+    """
+    if not has_app_context():
+        return EntityLoader(repo, options)
+    loaders = g.setdefault("entity_loaders", {})
+    if kind not in loaders:
+        loaders[kind] = EntityLoader(repo, options)
+    return loaders[kind]
+
+
+def reset_request_loaders():
+    """Forget everything the current request's loaders have memoized."""
+    if has_app_context():
+        g.pop("entity_loaders", None)
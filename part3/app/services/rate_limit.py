@@ -0,0 +1,107 @@
+"""In-process token-bucket rate limiting for password endpoints.
+
+Each key (a client IP, or an email address) owns a bucket holding up to
+``burst`` tokens that refills at ``per_minute`` tokens a minute; an attempt
+takes one token or is refused. Buckets are refilled lazily when their key is
+seen again, so idle keys cost nothing but their slot.
+
+Storage is bounded: at most ``max_keys`` buckets are kept in LRU order and
+the least recently seen one is dropped to make room. A dropped key simply
+starts over with a full bucket, which only matters when more than
+``max_keys`` distinct keys are hammering the endpoint at once.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from flask import current_app
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+    def headers(self):
+        """RateLimit-* headers (IETF draft), plus Retry-After when refused."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class TokenBucketLimiter:
+    def __init__(self, burst, per_minute, max_keys=10000, clock=time.monotonic):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def hit(self, key):
+        """Take one token from ``key``'s bucket if it has one."""
+        with self._lock:
+            now = self._clock()
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return Decision(
+            allowed=allowed,
+            limit=self.burst,
+            remaining=int(tokens),
+            reset_after=(self.burst - tokens) / self.rate,
+            retry_after=0 if allowed else (1 - tokens) / self.rate,
+        )
+
+
+def init_app(app):
+    config = app.config
+    max_keys = config.get("RATE_LIMIT_MAX_KEYS", 10000)
+    app.extensions["login_rate_limits"] = {
+        "ip": TokenBucketLimiter(
+            config.get("LOGIN_RATE_IP_BURST", 20),
+            config.get("LOGIN_RATE_IP_PER_MINUTE", 20),
+            max_keys,
+        ),
+        "email": TokenBucketLimiter(
+            config.get("LOGIN_RATE_EMAIL_BURST", 5),
+            config.get("LOGIN_RATE_EMAIL_PER_MINUTE", 5),
+            max_keys,
+        ),
+    }
+
+
+def check_login(ip, email=None):
+    """Charge one attempt to ``ip`` and then ``email``.
+
+    Returns the refusing Decision, or the one with the fewest tokens left;
+    None when rate limiting is disabled. A request refused by IP does not
+    also use up the email's bucket.
+    """
+    if not current_app.config.get("RATE_LIMIT_ENABLED", True):
+        return None
+    limiters = current_app.extensions["login_rate_limits"]
+    decision = limiters["ip"].hit(ip or "unknown")
+    if decision.allowed and email:
+        by_email = limiters["email"].hit(email.strip().lower())
+        if not by_email.allowed or by_email.remaining < decision.remaining:
+            decision = by_email
+    return decision
@@ -0,0 +1,67 @@
+"""In-memory revocation list for JWTs.
+
+Logging out revokes the token's ``jti`` until the token would have expired
+anyway. Lookups are a set membership test, so every authenticated request
+pays O(1) for the check; a heap ordered by expiry lets ``prune`` drop
+entries that can no longer match without scanning the whole set.
+
+The list lives in the process, so it is lost on restart and not shared
+between workers; revoked refresh tokens are the ones that matter most and
+access tokens stay short-lived (JWT_ACCESS_TOKEN_EXPIRES) for that reason.
+"""
+import heapq
+import math
+import threading
+import time
+
+from flask import current_app
+
+
+class TokenBlocklist:
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._revoked = set()
+        self._expiries = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def __contains__(self, jti):
+        return jti in self._revoked
+
+    def revoke(self, jti, expires_at):
+        """Reject ``jti`` until ``expires_at`` (a UNIX timestamp) has passed."""
+        with self._lock:
+            self._prune(self._clock())
+            if expires_at <= self._clock() or jti in self._revoked:
+                return
+            self._revoked.add(jti)
+            heapq.heappush(self._expiries, (expires_at, jti))
+
+    def prune(self):
+        with self._lock:
+            self._prune(self._clock())
+
+    def _prune(self, now):
+        while self._expiries and self._expiries[0][0] <= now:
+            _, jti = heapq.heappop(self._expiries)
+            self._revoked.discard(jti)
+
+
+def init_app(app, jwt):
+    blocklist = TokenBlocklist()
+    app.extensions["token_blocklist"] = blocklist
+
+    @jwt.token_in_blocklist_loader
+    def _token_revoked(jwt_header, jwt_payload):
+        return jwt_payload["jti"] in current_blocklist()
+
+
+def current_blocklist():
+    return current_app.extensions["token_blocklist"]
+
+
+def revoke(jwt_payload):
+    """Revoke a decoded token; one without ``exp`` stays revoked for good."""
+    current_blocklist().revoke(jwt_payload["jti"], jwt_payload.get("exp", math.inf))
@@ -0,0 +1,107 @@
+"""Benchmark bulk creation against the one-commit-per-row path.
+
+Run from part3 folder: python benchmarks/bench_bulk.py [--rows 5000]
+
+Each run uses a fresh temporary SQLite file so every commit pays for a real
+fsync. Places and reviews are created once through HBnBFacade.create_place /
+create_review (one transaction per row) and once through create_places /
+create_reviews in batches of --batch rows.
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.config import Config
+from app.services import facade
+
+
+def _place_items(rng, owner_id, count):
+    return [
+        {
+            "title": f"Bench place {i}",
+            "description": "Generated for the bulk benchmark",
+            "price": rng.uniform(20, 400),
+            "latitude": rng.uniform(-60, 60),
+            "longitude": rng.uniform(-170, 170),
+            "owner_id": owner_id,
+        }
+        for i in range(count)
+    ]
+
+
+def _review_items(rng, user_id, place_ids, count):
+    return [
+        {
+            "text": "Generated review",
+            "rating": rng.randint(1, 5),
+            "user_id": user_id,
+            "place_id": rng.choice(place_ids),
+        }
+        for _ in range(count)
+    ]
+
+
+def _run(args, bulk):
+    workdir = tempfile.mkdtemp(prefix="hbnb-bulk-")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "bench.db")
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    app = create_app(BenchConfig)
+    rng = random.Random(1)
+    try:
+        with app.app_context():
+            owner_id = facade.get_user_by_email("admin@example.com").id
+            places = _place_items(rng, owner_id, args.rows)
+
+            start = time.perf_counter()
+            if bulk:
+                place_ids = []
+                for i in range(0, len(places), args.batch):
+                    created, errors = facade.create_places(places[i:i + args.batch])
+                    assert not errors, errors[:3]
+                    place_ids += [p.id for p in created]
+                    db.session.expunge_all()
+            else:
+                place_ids = [facade.create_place(item).id for item in places]
+            place_time = time.perf_counter() - start
+
+            reviews = _review_items(rng, owner_id, place_ids, args.rows)
+            start = time.perf_counter()
+            if bulk:
+                for i in range(0, len(reviews), args.batch):
+                    _, errors = facade.create_reviews(reviews[i:i + args.batch])
+                    assert not errors, errors[:3]
+                    db.session.expunge_all()
+            else:
+                for item in reviews:
+                    facade.create_review(item)
+            review_time = time.perf_counter() - start
+            db.session.remove()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return place_time, review_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    for label, bulk in (("per-row", False), ("bulk", True)):
+        place_time, review_time = _run(args, bulk)
+        print(f"{label:8}  places: {args.rows / place_time:9.0f} rows/s"
+              f"  reviews: {args.rows / review_time:9.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
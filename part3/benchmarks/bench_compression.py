@@ -0,0 +1,107 @@
+"""Measure CPU cost against bytes saved for API response compression.
+
+Run from part3 folder: python benchmarks/bench_compression.py [--places 2000]
+
+Seeds --places places into a temporary SQLite file, fetches one large
+/api/v1/places/ page without compression, then times compressing that body
+at several gzip levels (and brotli qualities when brotli is installed).
+The last rows time the full request with and without Accept-Encoding.
+"""
+import argparse
+import gzip
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import compression, create_app, db
+from app.config import Config
+from app.services import facade
+
+
+def _seed(count):
+    rng = random.Random(1)
+    owner_id = facade.get_user_by_email("admin@example.com").id
+    _, errors = facade.create_places([
+        {
+            "title": f"Bench place {i}",
+            "description": "Generated for the compression benchmark, near the sea.",
+            "price": round(rng.uniform(20, 400), 2),
+            "latitude": rng.uniform(-60, 60),
+            "longitude": rng.uniform(-170, 170),
+            "owner_id": owner_id,
+        }
+        for i in range(count)
+    ])
+    assert not errors, errors[:3]
+
+
+def _best(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--places", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hbnb-compress-")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "bench.db")
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        PAGE_MAX_LIMIT = args.places + 10
+
+    app = create_app(BenchConfig)
+    try:
+        with app.app_context():
+            _seed(args.places)
+            db.session.remove()
+        client = app.test_client()
+        url = f"/api/v1/places/?limit={args.places + 10}"
+        body = client.get(url).data
+        print(f"uncompressed body: {len(body) / 1000:.0f} kB ({args.places} places)")
+
+        codecs = [
+            (
+                f"gzip -{level}",
+                lambda level=level: gzip.compress(body, compresslevel=level),
+            )
+            for level in (1, 6, 9)
+        ]
+        if compression.brotli is not None:
+            brotli = compression.brotli
+            codecs += [
+                (f"br q{q}", lambda q=q: brotli.compress(body, quality=q))
+                for q in (1, 4, 11)
+            ]
+        for label, func in codecs:
+            elapsed, data = _best(func, args.repeat)
+            print(f"{label:9} {len(data) / 1000:8.0f} kB  {len(body) / len(data):5.1f}x"
+                  f"  {elapsed * 1000:7.1f} ms  {len(body) / elapsed / 1e6:6.0f} MB/s")
+
+        for label, headers in (
+            ("request, identity", {}),
+            ("request, gzip", {"Accept-Encoding": "gzip"}),
+        ):
+            elapsed, response = _best(
+                lambda: client.get(url, headers=headers), args.repeat
+            )
+            size = len(response.data) / 1000
+            print(f"{label:18} {size:8.0f} kB  {elapsed * 1000:7.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
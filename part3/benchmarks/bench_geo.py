@@ -0,0 +1,112 @@
+"""Benchmark "places near me" on a large synthetic dataset.
+
+Run from part3 folder: python benchmarks/bench_geo.py [--places 1000000]
+
+Places are scattered around a few dozen random "cities" and stored in a
+temporary SQLite file. Radius queries through HBnBFacade.get_places_near
+(geo_cell index + haversine refinement) are timed against a full scan that
+computes the distance to every row.
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+
+from app import create_app, db
+from app.config import Config
+from app.models.place import Place
+from app.persistence.geo import cell_key, haversine_km
+from app.services import facade
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.median(samples) * 1000, p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--places", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius-km", type=float, nargs="+", default=[2.0, 10.0, 50.0])
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hbnb-geo-")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "bench.db")
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    app = create_app(BenchConfig)
+    rng = random.Random(1)
+    cities = [(rng.uniform(-50, 60), rng.uniform(-170, 170)) for _ in range(40)]
+
+    with app.app_context():
+        owner = facade.get_user_by_email("admin@example.com")
+        start = time.perf_counter()
+        chunk = []
+        for i in range(args.places):
+            c_lat, c_lon = rng.choice(cities)
+            lat = max(-90.0, min(90.0, rng.gauss(c_lat, 0.8)))
+            lon = max(-180.0, min(180.0, rng.gauss(c_lon, 0.8)))
+            chunk.append({
+                "title": f"Bench place {i}",
+                "price": 50.0,
+                "latitude": lat,
+                "longitude": lon,
+                "geo_cell": cell_key(lat, lon),
+                "owner_id": owner.id,
+            })
+            if len(chunk) == 50_000:
+                db.session.execute(insert(Place.__table__), chunk)
+                chunk = []
+        if chunk:
+            db.session.execute(insert(Place.__table__), chunk)
+        db.session.commit()
+        print(f"Inserted {args.places} places in {time.perf_counter() - start:.1f}s")
+
+        points = []
+        for _ in range(args.queries):
+            c_lat, c_lon = rng.choice(cities)
+            points.append((rng.gauss(c_lat, 0.5), rng.gauss(c_lon, 0.5)))
+
+        for radius in args.radius_km:
+            timings, found = [], 0
+            for lat, lon in points:
+                db.session.expunge_all()
+                t0 = time.perf_counter()
+                found += len(facade.get_places_near(lat, lon, radius, args.limit))
+                timings.append(time.perf_counter() - t0)
+            p50, p95 = _percentiles(timings)
+            print(
+                f"indexed  radius={radius:>5g} km  p50={p50:8.2f} ms  p95={p95:8.2f} ms"
+                f"  avg results={found / len(points):.1f}"
+            )
+
+        timings = []
+        for lat, lon in points[:3]:
+            t0 = time.perf_counter()
+            rows = db.session.execute(select(Place.id, Place.latitude, Place.longitude))
+            hits = sorted(
+                (haversine_km(lat, lon, r.latitude, r.longitude), r.id) for r in rows
+            )
+            [h for h in hits if h[0] <= args.radius_km[0]][:args.limit]
+            timings.append(time.perf_counter() - t0)
+        p50, _ = _percentiles(timings)
+        print(f"full scan                  p50={p50:8.2f} ms")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Insert rate and index size per id format (UUIDv4/v7, text/binary).
+
+Run from part3 folder: python benchmarks/bench_ids.py [--rows 100000] [--batch 5000]
+
+For each combination of ID_VERSION and ID_STORAGE a fresh app is created on
+a temporary SQLite file, 1000 places are added, then --rows reviews are
+inserted in --batch sized transactions. Reported are the review insert
+rate and, from SQLite's dbstat table, the bytes taken by the reviews table,
+its primary key index and its other indexes (place, created_at and rating
+composites, which all end in the id).
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text
+
+from app import create_app, db
+from app.config import Config
+from app.models import ids
+from app.models.place import Place
+from app.models.review import Review
+from app.services import facade
+
+VARIANTS = ((4, "string"), (7, "string"), (4, "binary"), (7, "binary"))
+
+
+def _sizes(conn):
+    rows = conn.execute(
+        text(
+            "SELECT d.name, SUM(d.pgsize) FROM dbstat d"
+            " JOIN sqlite_master m ON m.name = d.name"
+            " WHERE m.tbl_name = 'reviews' GROUP BY d.name"
+        )
+    ).all()
+    sizes = dict(rows)
+    table = sizes.pop("reviews")
+    primary_key = sizes.pop("sqlite_autoindex_reviews_1")
+    return table, primary_key, sum(sizes.values())
+
+
+def _run(args, version, storage):
+    workdir = tempfile.mkdtemp(prefix="hbnb-ids-")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "bench.db")
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        ID_VERSION = version
+        ID_STORAGE = storage
+
+    rng = random.Random(1)
+    app = create_app(BenchConfig)
+    try:
+        with app.app_context():
+            user_id = facade.get_user_by_email("admin@example.com").id
+            now = datetime.utcnow()
+            places = [
+                {
+                    "id": ids.new_id(),
+                    "title": f"Place {i}",
+                    "price": 50,
+                    "latitude": 0.0,
+                    "longitude": 0.0,
+                    "owner_id": user_id,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(1000)
+            ]
+            with db.engine.begin() as conn:
+                conn.execute(insert(Place.__table__), places)
+            place_ids = [p["id"] for p in places]
+
+            start = time.perf_counter()
+            for offset in range(0, args.rows, args.batch):
+                rows = []
+                for i in range(offset, min(offset + args.batch, args.rows)):
+                    created = now + timedelta(milliseconds=i)
+                    rows.append(
+                        {
+                            "id": ids.new_id(),
+                            "text": "Nice stay",
+                            "rating": rng.randint(1, 5),
+                            "user_id": user_id,
+                            "place_id": rng.choice(place_ids),
+                            "created_at": created,
+                            "updated_at": created,
+                        }
+                    )
+                with db.engine.begin() as conn:
+                    conn.execute(insert(Review.__table__), rows)
+            elapsed = time.perf_counter() - start
+
+            with db.engine.connect() as conn:
+                sizes = _sizes(conn)
+            db.engine.dispose()
+        return (args.rows / elapsed,) + sizes
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+
+    for version, storage in VARIANTS:
+        rate, table, primary_key, indexes = _run(args, version, storage)
+        print(
+            f"v{version} {storage:6}  {rate:9.0f} rows/s  table {table / 1e6:6.1f} MB"
+            f"  primary key {primary_key / 1e6:6.1f} MB"
+            f"  other indexes {indexes / 1e6:6.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare the API JSON encoder with Flask-RESTX's default on place payloads.
+
+Run from part3 folder: python benchmarks/bench_json.py [--places 10000]
+
+Builds --places in-memory places (with owner and amenities, no database)
+and times, over --repeat runs:
+  * encoding alone: stdlib json.dumps, as used by the default
+    representation, against app.api.v1.representations.dumps;
+  * serialize + encode: the old isoformat()-per-field dicts with json.dumps,
+    against serialize_place handing datetimes straight to the encoder.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.v1 import representations
+from app.api.v1.places import serialize_place
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.user import User
+
+
+def _places(count):
+    rng = random.Random(1)
+    start = datetime(2024, 1, 1)
+    owner = User(first_name="Bench", last_name="Owner", email="bench@example.com")
+    owner.id = "owner"
+    amenities = [Amenity(name=name) for name in ("Wifi", "Pool", "Parking", "Kitchen")]
+    places = []
+    for i in range(count):
+        place = Place(
+            title=f"Bench place {i}",
+            description="A generated place for the JSON benchmark",
+            price=round(rng.uniform(20, 400), 2),
+            latitude=rng.uniform(-60, 60),
+            longitude=rng.uniform(-170, 170),
+            owner_id=owner.id,
+        )
+        place.id = f"place-{i}"
+        place.owner = owner
+        place.amenities = rng.sample(amenities, 2)
+        place.created_at = start + timedelta(
+            seconds=rng.randint(0, 10**7), microseconds=i
+        )
+        place.updated_at = place.created_at
+        place.review_count, place.rating_avg = 4, 3.5
+        for r in range(1, 6):
+            setattr(place, f"rating_{r}", 1 if r < 5 else 0)
+        places.append(place)
+    return places
+
+
+def _isoformat_dict(place):
+    data = serialize_place(place)
+    data["created_at"] = data["created_at"].isoformat()
+    data["updated_at"] = data["updated_at"].isoformat()
+    return data
+
+
+def _best(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--places", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoder = (
+        "orjson"
+        if representations.orjson is not None
+        else "stdlib json (orjson missing)"
+    )
+    print(f"{args.places} places, best of {args.repeat}; API encoder: {encoder}")
+
+    places = _places(args.places)
+    strings = [_isoformat_dict(p) for p in places]
+    native = [serialize_place(p) for p in places]
+
+    rows = (
+        ("encode  json.dumps", lambda: json.dumps(strings)),
+        ("encode  api dumps", lambda: representations.dumps(native)),
+        ("full    isoformat + json.dumps",
+         lambda: json.dumps([_isoformat_dict(p) for p in places])),
+        ("full    serialize_place + api dumps",
+         lambda: representations.dumps([serialize_place(p) for p in places])),
+    )
+    for label, func in rows:
+        print(f"{label:38} {_best(func, args.repeat) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
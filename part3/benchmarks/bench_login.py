@@ -0,0 +1,59 @@
+"""Login throughput per bcrypt cost (BCRYPT_LOG_ROUNDS).
+
+Run from part3 folder:
+    python benchmarks/bench_login.py [--costs 4,8,10,12] [--logins 20]
+
+For each cost a fresh app is created on a temporary SQLite file, the
+seeded admin logs in once (rehashing the password to that cost), then
+--logins sequential POST /api/v1/auth/login requests are timed.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.config import Config
+
+CREDENTIALS = {"email": "admin@example.com", "password": "admin123"}
+
+
+def _run(cost, logins):
+    workdir = tempfile.mkdtemp(prefix="hbnb-login-")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "bench.db")
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        BCRYPT_LOG_ROUNDS = cost
+        RATE_LIMIT_ENABLED = False
+
+    try:
+        client = create_app(BenchConfig).test_client()
+        assert client.post("/api/v1/auth/login", json=CREDENTIALS).status_code == 200
+        start = time.perf_counter()
+        for _ in range(logins):
+            response = client.post("/api/v1/auth/login", json=CREDENTIALS)
+            assert response.status_code == 200, response.status_code
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--costs", default="4,8,10,12")
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+
+    for cost in (int(c) for c in args.costs.split(",")):
+        elapsed = _run(cost, args.logins)
+        print(f"cost {cost:2}  {args.logins / elapsed:8.1f} logins/s"
+              f"  {elapsed / args.logins * 1000:8.1f} ms/login")
+
+
+if __name__ == "__main__":
+    main()
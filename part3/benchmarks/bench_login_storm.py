@@ -0,0 +1,128 @@
+"""Read latency during a login storm, with and without a tight hashing pool.
+
+Run from part3 folder:
+    python benchmarks/bench_login_storm.py [--clients 16] [--seconds 5]
+
+Starts the app on a threaded local server, keeps --clients threads logging
+in as fast as they can, and meanwhile times GET /api/v1/amenities/ from a
+separate client. "wide" gives every login its own hashing worker; "pool"
+uses the HASH_WORKERS / HASH_QUEUE_DEPTH given on the command line; "limit"
+adds the login rate limiter, which refuses most attempts (429) before they
+reach the pool, as it would for credential stuffing from one address.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.config import Config
+
+CREDENTIALS = json.dumps(
+    {"email": "admin@example.com", "password": "admin123"}
+).encode()
+
+
+def _storm(base, stop, counts):
+    while not stop.is_set():
+        req = urllib.request.Request(base + "/api/v1/auth/login", data=CREDENTIALS,
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req) as resp:
+                resp.read()
+            counts["ok"] += 1
+        except urllib.error.HTTPError as e:
+            counts[e.code] = counts.get(e.code, 0) + 1
+            if e.code == 503:
+                time.sleep(float(e.headers.get("Retry-After", "1")) / 10)
+
+
+def _run(args, workers, depth, rate_limit):
+    workdir = tempfile.mkdtemp(prefix="hbnb-storm-")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "bench.db")
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        BCRYPT_LOG_ROUNDS = args.cost
+        HASH_WORKERS = workers
+        HASH_QUEUE_DEPTH = depth
+        RATE_LIMIT_ENABLED = rate_limit
+
+    server = make_server("127.0.0.1", 0, create_app(BenchConfig), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    stop, counts = threading.Event(), {"ok": 0}
+    storm = [
+        threading.Thread(target=_storm, args=(base, stop, counts))
+        for _ in range(args.clients)
+    ]
+    try:
+        for t in storm:
+            t.start()
+        time.sleep(0.5)
+        latencies = []
+        deadline = time.perf_counter() + args.seconds
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            with urllib.request.urlopen(base + "/api/v1/amenities/") as resp:
+                resp.read()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        stop.set()
+        for t in storm:
+            t.join()
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+    latencies.sort()
+    return {
+        "reads": len(latencies),
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000,
+        "logins": counts["ok"],
+        "shed": counts.get(503, 0),
+        "limited": counts.get(429, 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--cost", type=int, default=10, help="BCRYPT_LOG_ROUNDS")
+    parser.add_argument(
+        "--workers", type=int, default=2, help="HASH_WORKERS for the pool run"
+    )
+    parser.add_argument(
+        "--depth", type=int, default=4, help="HASH_QUEUE_DEPTH for the pool run"
+    )
+    args = parser.parse_args()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    runs = (
+        ("wide", args.clients, args.clients, False),
+        ("pool", args.workers, args.depth, False),
+        ("limit", args.workers, args.depth, True),
+    )
+    for label, workers, depth, rate_limit in runs:
+        r = _run(args, workers, depth, rate_limit)
+        print(
+            f"{label:5} reads {r['reads']:5}"
+            f"  p50 {r['p50']:7.1f} ms  p95 {r['p95']:7.1f} ms"
+            f"  logins {r['logins']:5}  shed {r['shed']:5}  429 {r['limited']:5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Renewing a session: password login against /auth/refresh.
+
+Run from part3 folder: python benchmarks/bench_refresh.py [--cost 12] [--requests 20]
+
+Creates an app on a temporary SQLite file with BCRYPT_LOG_ROUNDS = --cost,
+logs the seeded admin in once, then times --requests sequential logins and
+--requests sequential refreshes with the refresh token from that login.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.config import Config
+
+CREDENTIALS = {"email": "admin@example.com", "password": "admin123"}
+
+
+def _time(label, count, send):
+    start = time.perf_counter()
+    for _ in range(count):
+        response = send()
+        assert response.status_code == 200, response.status_code
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:8} {count / elapsed:8.1f} req/s  {elapsed / count * 1000:8.2f} ms/req"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cost", type=int, default=12, help="BCRYPT_LOG_ROUNDS")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hbnb-refresh-")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "bench.db")
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        BCRYPT_LOG_ROUNDS = args.cost
+        RATE_LIMIT_ENABLED = False
+
+    try:
+        client = create_app(BenchConfig).test_client()
+        tokens = client.post("/api/v1/auth/login", json=CREDENTIALS).get_json()
+        headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+        _time(
+            "login",
+            args.requests,
+            lambda: client.post("/api/v1/auth/login", json=CREDENTIALS),
+        )
+        _time(
+            "refresh",
+            args.requests,
+            lambda: client.post("/api/v1/auth/refresh", headers=headers),
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Read throughput while a writer commits, default SQLite against the tuned pragmas.
+
+Run from part3 folder:
+    python benchmarks/bench_sqlite_concurrency.py [--readers 2] [--seconds 4]
+
+For each setting a temporary SQLite file is shared by one writer process,
+which keeps committing --batch amenity rows per transaction, and --readers
+processes reading the first 20 amenities by name. Both go through the app's
+engine, so the connect hook applies the pragmas, but skip the HTTP layer:
+on a small machine request handling saturates the CPU long before SQLite
+locking shows. "default" is SQLite's rollback journal with
+synchronous=FULL; "tuned" uses ProductionConfig.SQLITE_PRAGMAS.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+
+from app import create_app, db
+from app.config import Config, ProductionConfig
+from app.models.amenity import Amenity
+
+
+def _writer(config, batch, seconds, ready, results):
+    app = create_app(config)
+    ready.wait()
+    deadline = time.perf_counter() + seconds
+    commits = 0
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            now = datetime.now(timezone.utc)
+            db.session.execute(
+                insert(Amenity.__table__),
+                [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "name": uuid.uuid4().hex,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for _ in range(batch)
+                ],
+            )
+            db.session.commit()
+            commits += 1
+    results.put(("commits", commits))
+
+
+def _reader(config, seconds, ready, results):
+    app = create_app(config)
+    ready.wait()
+    deadline = time.perf_counter() + seconds
+    latencies = []
+    query = select(Amenity.id, Amenity.name).order_by(Amenity.name).limit(20)
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            db.session.execute(query).all()
+            db.session.commit()
+            latencies.append(time.perf_counter() - start)
+    results.put(("reads", latencies))
+
+
+def _run(args, tuned):
+    workdir = tempfile.mkdtemp(prefix="hbnb-sqlite-")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "bench.db")
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        if tuned:
+            SQLITE_PRAGMAS = ProductionConfig.SQLITE_PRAGMAS
+            SQLALCHEMY_ENGINE_OPTIONS = ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS
+
+    # Create and seed the database before the workers open it.
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.engine.dispose()
+
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    ready = ctx.Barrier(args.readers + 1)
+    writer_args = (BenchConfig, args.batch, args.seconds, ready, results)
+    workers = [ctx.Process(target=_writer, args=writer_args)]
+    workers += [
+        ctx.Process(target=_reader, args=(BenchConfig, args.seconds, ready, results))
+        for _ in range(args.readers)
+    ]
+    latencies, commits = [], 0
+    try:
+        for w in workers:
+            w.start()
+        for _ in workers:
+            kind, value = results.get()
+            if kind == "commits":
+                commits = value
+            else:
+                latencies += value
+        for w in workers:
+            w.join()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    latencies.sort()
+    return {
+        "reads": len(latencies) / args.seconds,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000,
+        "commits": commits / args.seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=4)
+    parser.add_argument(
+        "--batch", type=int, default=200, help="rows inserted per write transaction"
+    )
+    args = parser.parse_args()
+
+    for label, tuned in (("default", False), ("tuned", True)):
+        r = _run(args, tuned)
+        print(
+            f"{label:8} reads {r['reads']:7.1f}/s"
+            f"  p50 {r['p50']:6.2f} ms  p95 {r['p95']:6.2f} ms"
+            f"  commits {r['commits']:6.1f}/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare peak memory of a streamed listing with a single large page.
+
+Run from part3 folder: python benchmarks/bench_stream.py [--rows 20000]
+
+Reviews are bulk-inserted into a temporary SQLite file, then read back
+through GET /api/v1/reviews/ once as one page holding every row and once
+as an NDJSON stream. Peak Python allocations are measured with tracemalloc
+while the response body is consumed.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.config import Config
+from app.services import facade
+
+
+def _seed(rows, batch):
+    owner_id = facade.get_user_by_email("admin@example.com").id
+    place_id = facade.create_place({
+        "title": "Streamed place", "price": 50.0, "latitude": 0.0,
+        "longitude": 0.0, "owner_id": owner_id,
+    }).id
+    for start in range(0, rows, batch):
+        count = min(batch, rows - start)
+        _, errors = facade.create_reviews([
+            {"text": "Generated review", "rating": 1 + i % 5,
+             "user_id": owner_id, "place_id": place_id}
+            for i in range(count)
+        ])
+        assert not errors, errors[:3]
+        db.session.expunge_all()
+
+
+def _measure(client, url, headers=None):
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, headers=headers or {})
+    size = sum(len(chunk) for chunk in response.response)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert response.status_code == 200, response.status_code
+    return size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500, help="STREAM_BATCH_SIZE")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hbnb-stream-")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "bench.db")
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        PAGE_MAX_LIMIT = args.rows
+        STREAM_BATCH_SIZE = args.batch
+        ENTITY_CACHE_SIZE = 0
+
+    app = create_app(BenchConfig)
+    try:
+        with app.app_context():
+            _seed(args.rows, 1000)
+            db.session.remove()
+        client = app.test_client()
+        runs = (
+            ("one page", f"/api/v1/reviews/?limit={args.rows}", None),
+            ("ndjson", "/api/v1/reviews/", {"Accept": "application/x-ndjson"}),
+        )
+        for label, url, headers in runs:
+            size, elapsed, peak = _measure(client, url, headers)
+            print(f"{label:9} {size / 1e6:7.1f} MB body  {elapsed:6.2f} s"
+                  f"  peak {peak / 1e6:7.1f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""Rebuild place rating aggregates from reviews.
+
+Run from part3 folder: python rebuild_ratings.py
+"""
+import os
+import sys
+
+# run from part3 directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.config import DevelopmentConfig
+from app.services import facade
+
+app = create_app(DevelopmentConfig)
+with app.app_context():
+    rated = facade.rebuild_place_ratings()
+    print(f"Rating aggregates rebuilt; {rated} place(s) have reviews.")
@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS users (
 
 -- Create index on email for faster lookups
 CREATE INDEX idx_users_email ON users(email);
+CREATE INDEX ix_users_created_at_id ON users(created_at, id);
 
 -- Create Place table
 CREATE TABLE IF NOT EXISTS places (
@@ -24,7 +25,17 @@ CREATE TABLE IF NOT EXISTS places (
     price DECIMAL(10, 2) NOT NULL,
     latitude FLOAT NOT NULL,
     longitude FLOAT NOT NULL,
+    geo_cell INT,
     owner_id CHAR(36) NOT NULL,
+    -- Rating aggregates over reviews, maintained on every review write
+    review_count INT NOT NULL DEFAULT 0,
+    rating_sum INT NOT NULL DEFAULT 0,
+    rating_1 INT NOT NULL DEFAULT 0,
+    rating_2 INT NOT NULL DEFAULT 0,
+    rating_3 INT NOT NULL DEFAULT 0,
+    rating_4 INT NOT NULL DEFAULT 0,
+    rating_5 INT NOT NULL DEFAULT 0,
+    rating_avg FLOAT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE,
@@ -36,6 +47,14 @@ CREATE TABLE IF NOT EXISTS places (
 -- Create index on owner_id for faster lookups
 CREATE INDEX idx_places_owner_id ON places(owner_id);
 
+-- Keyset pagination indexes: (sort key, id)
+CREATE INDEX ix_places_created_at_id ON places(created_at, id);
+CREATE INDEX ix_places_price_id ON places(price, id);
+CREATE INDEX ix_places_rating_avg_id ON places(rating_avg, id);
+
+-- Spatial lookups: grid cell of (latitude, longitude), see app/persistence/geo.py
+CREATE INDEX ix_places_geo_cell ON places(geo_cell, latitude, longitude);
+
 -- Create Amenity table
 CREATE TABLE IF NOT EXISTS amenities (
     id CHAR(36) PRIMARY KEY,
@@ -44,6 +63,8 @@ CREATE TABLE IF NOT EXISTS amenities (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
 
+CREATE INDEX ix_amenities_created_at_id ON amenities(created_at, id);
+
 -- Create Review table
 CREATE TABLE IF NOT EXISTS reviews (
     id CHAR(36) PRIMARY KEY,
@@ -62,6 +83,9 @@ CREATE TABLE IF NOT EXISTS reviews (
 -- Create indexes for faster lookups
 CREATE INDEX idx_reviews_user_id ON reviews(user_id);
 CREATE INDEX idx_reviews_place_id ON reviews(place_id);
+CREATE INDEX ix_reviews_created_at_id ON reviews(created_at, id);
+CREATE INDEX ix_reviews_rating_id ON reviews(rating, id);
+CREATE INDEX ix_reviews_place_id_created_at_id ON reviews(place_id, created_at, id);
 
 -- Create Place_Amenity association table (Many-to-Many)
 CREATE TABLE IF NOT EXISTS place_amenity (
@@ -75,3 +99,30 @@ CREATE TABLE IF NOT EXISTS place_amenity (
 -- Create indexes for the association table
 CREATE INDEX idx_place_amenity_place_id ON place_amenity(place_id);
 CREATE INDEX idx_place_amenity_amenity_id ON place_amenity(amenity_id);
+CREATE INDEX ix_place_amenity_amenity_id_place_id ON place_amenity(amenity_id, place_id);
+
+-- Full-text search (SQLite only): rows share their rowid with places and are
+-- kept in sync by the application; see app/persistence/search.py
+-- CREATE VIRTUAL TABLE places_fts USING fts5(
+--     place_id UNINDEXED, title, description,
+--     tokenize = 'unicode61 remove_diacritics 2'
+-- );
+
+-- Map clusters: per-zoom-level grid aggregates of place coordinates,
+-- maintained by the application on every place write
+CREATE TABLE IF NOT EXISTS place_clusters (
+    level INT NOT NULL,
+    cell BIGINT NOT NULL,
+    count INT NOT NULL,
+    lat_sum FLOAT NOT NULL,
+    lon_sum FLOAT NOT NULL,
+    PRIMARY KEY (level, cell)
+);
+
+-- Change counters per table, bumped in the same transaction as each write;
+-- the API derives ETag / Last-Modified from them
+CREATE TABLE IF NOT EXISTS table_versions (
+    name VARCHAR(64) PRIMARY KEY,
+    version INT NOT NULL,
+    updated_at TIMESTAMP NOT NULL
+);
@@ -6,12 +6,48 @@ Tests all API endpoints with authentication and authorization
 
 import unittest
 import json
+import random
+import time
+from sqlalchemy import event, select, text
 from app import create_app, db
 from app.config import TestingConfig
 from app.models.user import User
 from app.models.place import Place
 from app.models.review import Review
 from app.models.amenity import Amenity
+from app.models.place_cluster import PlaceCluster
+from app.persistence.geo import haversine_km
+from app.services import facade
+
+
+def record_statements(func, *args):
+    """Run ``func(*args)``; returns (SQL statements it executed, its result)."""
+    statements = []
+
+    def record(conn, cursor, statement, *rest):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        result = func(*args)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return statements, result
+
+
+def count_commits(func, *args):
+    """Run ``func(*args)``; returns (number of commits it made, its result)."""
+    commits = []
+
+    def record(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, 'commit', record)
+    try:
+        result = func(*args)
+    finally:
+        event.remove(db.engine, 'commit', record)
+    return len(commits), result
 
 
 class TestAuthEndpoints(unittest.TestCase):
@@ -67,6 +103,111 @@ class TestAuthEndpoints(unittest.TestCase):
         )
         self.assertEqual(response.status_code, 401)
 
+    def test_login_rehashes_to_configured_cost(self):
+        """Test that a successful login moves the hash to BCRYPT_LOG_ROUNDS"""
+        from app import bcrypt
+
+        self.assertEqual(self.user.password.split('$')[2], '04')
+        self.user.password = bcrypt.generate_password_hash(
+            'password123', rounds=5
+        ).decode()
+        db.session.commit()
+        self.assertTrue(self.user.password_needs_rehash())
+
+        response = self.client.post('/api/v1/auth/login', json={
+            'email': 'test@example.com', 'password': 'wrongpassword'})
+        self.assertEqual(response.status_code, 401)
+        db.session.expire_all()
+        self.assertEqual(self.user.password.split('$')[2], '05')
+
+        response = self.client.post('/api/v1/auth/login', json={
+            'email': 'test@example.com', 'password': 'password123'})
+        self.assertEqual(response.status_code, 200)
+        db.session.expire_all()
+        self.assertEqual(self.user.password.split('$')[2], '04')
+        self.assertFalse(self.user.password_needs_rehash())
+        self.assertTrue(self.user.verify_password('password123'))
+
+        self.app.config['BCRYPT_LOG_ROUNDS'] = 6
+        response = self.client.post('/api/v1/auth/login', json={
+            'email': 'test@example.com', 'password': 'password123'})
+        self.assertEqual(response.status_code, 200)
+        db.session.expire_all()
+        self.assertEqual(self.user.password.split('$')[2], '06')
+
+    def test_refresh_mints_access_token_with_claims(self):
+        """Test that /auth/refresh issues an access token without a password check"""
+        from flask_jwt_extended import decode_token
+
+        tokens = self.client.post('/api/v1/auth/login', json={
+            'email': 'test@example.com', 'password': 'password123'}).get_json()
+        self.assertIn('refresh_token', tokens)
+
+        response = self.client.post('/api/v1/auth/refresh', headers={
+            'Authorization': f"Bearer {tokens['refresh_token']}"})
+        self.assertEqual(response.status_code, 200)
+        claims = decode_token(response.get_json()['access_token'])
+        self.assertEqual(claims['sub'], str(self.user.id))
+        self.assertEqual(claims['type'], 'access')
+        self.assertIs(claims['is_admin'], False)
+
+        # An access token cannot stand in for a refresh token.
+        response = self.client.post('/api/v1/auth/refresh', headers={
+            'Authorization': f"Bearer {tokens['access_token']}"})
+        self.assertNotEqual(response.status_code, 200)
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        """Test that revoked tokens are rejected until they expire"""
+        tokens = self.client.post('/api/v1/auth/login', json={
+            'email': 'test@example.com', 'password': 'password123'}).get_json()
+        access = {'Authorization': f"Bearer {tokens['access_token']}"}
+        refresh = {'Authorization': f"Bearer {tokens['refresh_token']}"}
+
+        response = self.client.post('/api/v1/auth/logout', headers=access,
+                                    json=[tokens['refresh_token']])
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/v1/auth/logout', headers=access,
+                                    json={'refresh_token': tokens['refresh_token']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.client.get('/api/v1/auth/protected', headers=access).status_code, 401
+        )
+        self.assertEqual(
+            self.client.post('/api/v1/auth/refresh', headers=refresh).status_code, 401
+        )
+
+        # Someone else's refresh token cannot be revoked through this session.
+        other = self.client.post('/api/v1/auth/login', json={
+            'email': 'admin@example.com', 'password': 'admin123'}).get_json()
+        mine = self.client.post('/api/v1/auth/login', json={
+            'email': 'test@example.com', 'password': 'password123'}).get_json()
+        response = self.client.post(
+            '/api/v1/auth/logout',
+            headers={'Authorization': f"Bearer {other['access_token']}"},
+            json={'refresh_token': mine['refresh_token']},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_token_blocklist_prunes_expired_entries(self):
+        """Test that revocations are dropped once the token has expired"""
+        from app.services.token_blocklist import TokenBlocklist
+
+        now = [1000.0]
+        blocklist = TokenBlocklist(clock=lambda: now[0])
+        blocklist.revoke('a', 1010)
+        blocklist.revoke('b', 1100)
+        blocklist.revoke('expired', 999)
+        self.assertIn('a', blocklist)
+        self.assertNotIn('expired', blocklist)
+        self.assertEqual(len(blocklist), 2)
+
+        now[0] = 1050.0
+        blocklist.prune()
+        self.assertNotIn('a', blocklist)
+        self.assertIn('b', blocklist)
+        self.assertEqual(len(blocklist), 1)
+
     def test_login_missing_fields(self):
         """Test login with missing fields"""
         response = self.client.post(
@@ -79,6 +220,193 @@ class TestAuthEndpoints(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
 
 
+class TestHashingPool(unittest.TestCase):
+    """Test backpressure on password hashing"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(User(first_name="Busy", last_name="User",
+                            email="busy@example.com", password="password123"))
+        db.session.commit()
+        self.pool = self.app.extensions['hashing_pool']
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _login(self):
+        return self.client.post('/api/v1/auth/login', json={
+            'email': 'busy@example.com', 'password': 'password123'})
+
+    def test_hashing_runs_on_pool_threads(self):
+        """Test that bcrypt work leaves the request thread"""
+        import threading
+        from app.services import hashing
+
+        self.assertTrue(
+            hashing.run(threading.current_thread).name.startswith('hashing')
+        )
+        self.assertEqual(self._login().status_code, 200)
+
+    def test_saturated_pool_sheds_logins_but_not_reads(self):
+        """Test 503 + Retry-After once every worker and queue slot is taken"""
+        import threading
+
+        release = threading.Event()
+        held = [self.pool.submit(release.wait)
+                for _ in range(self.pool.workers + self.pool.queue_depth)]
+        try:
+            response = self._login()
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+            self.assertIn('error', json.loads(response.data))
+
+            response = self.client.post('/api/v1/auth/register', json={
+                'first_name': 'New', 'last_name': 'User',
+                'email': 'new@example.com', 'password': 'secret'})
+            self.assertEqual(response.status_code, 503)
+            self.assertIsNone(facade.get_user_by_email('new@example.com'))
+
+            self.assertEqual(self.client.get('/api/v1/places/').status_code, 200)
+        finally:
+            release.set()
+            for future in held:
+                future.result()
+        self.assertEqual(self._login().status_code, 200)
+
+
+class TestLoginRateLimit(unittest.TestCase):
+    """Test token-bucket throttling of login and register"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(User(first_name="Rate", last_name="User",
+                            email="rate@example.com", password="password123"))
+        db.session.commit()
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _login(self, email='rate@example.com', password='wrong', ip='10.0.0.1'):
+        return self.client.post(
+            '/api/v1/auth/login',
+            json={'email': email, 'password': password},
+            environ_base={'REMOTE_ADDR': ip},
+        )
+
+    def test_email_bucket_refuses_before_hashing(self):
+        """Test 429 + Retry-After once an email runs out of attempts"""
+        from app.services import hashing
+
+        burst = self.app.config['LOGIN_RATE_EMAIL_BURST']
+        for attempt in range(burst):
+            response = self._login()
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.headers['RateLimit-Limit'], str(burst))
+            self.assertEqual(
+                response.headers['RateLimit-Remaining'], str(burst - attempt - 1)
+            )
+
+        calls = []
+        original = hashing.run
+
+        def recording_run(func, *args, **kwargs):
+            calls.append(func)
+            return original(func, *args, **kwargs)
+
+        hashing.run = recording_run
+        try:
+            response = self._login(password='password123', ip='10.0.0.2')
+        finally:
+            hashing.run = original
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+        self.assertEqual(response.headers['RateLimit-Remaining'], '0')
+        self.assertEqual(calls, [])
+
+        # Other accounts are unaffected, and the email key ignores case.
+        self.assertEqual(
+            self._login(email='admin@example.com', password='admin123').status_code, 200
+        )
+        self.assertEqual(self._login(email=' RATE@example.com').status_code, 429)
+
+    def test_ip_bucket_spans_emails_and_register(self):
+        """Test that one address cannot spread attempts over many emails"""
+        burst = self.app.config['LOGIN_RATE_IP_BURST']
+        for i in range(burst):
+            self.assertEqual(self._login(email=f'user{i}@example.com').status_code, 401)
+        response = self.client.post(
+            '/api/v1/auth/register',
+            json={
+                'first_name': 'New',
+                'last_name': 'User',
+                'email': 'new@example.com',
+                'password': 'secret',
+            },
+            environ_base={'REMOTE_ADDR': '10.0.0.1'},
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertIsNone(facade.get_user_by_email('new@example.com'))
+        self.assertEqual(
+            self._login(email='other@example.com', ip='10.0.0.9').status_code, 401
+        )
+
+    def test_non_object_bodies_are_limited_by_ip(self):
+        """Test that a JSON body other than an object is a 400 charged to the IP only"""
+        burst = self.app.config['LOGIN_RATE_IP_BURST']
+        for i, body in enumerate([['rate@example.com'], 'rate@example.com', 5]):
+            response = self.client.post('/api/v1/auth/login', json=body,
+                                        environ_base={'REMOTE_ADDR': '10.0.0.3'})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(
+                response.headers['RateLimit-Remaining'], str(burst - i - 1)
+            )
+        response = self.client.post(
+            '/api/v1/auth/register', json=[{'email': 'x@example.com'}]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            json.loads(response.data)['error'], 'Request body must be a JSON object'
+        )
+
+    def test_token_bucket_refills_and_bounds_keys(self):
+        """Test lazy refill and LRU eviction in the limiter itself"""
+        from app.services.rate_limit import TokenBucketLimiter
+
+        now = [0.0]
+        limiter = TokenBucketLimiter(
+            burst=2, per_minute=60, max_keys=3, clock=lambda: now[0]
+        )
+        self.assertTrue(limiter.hit('a').allowed)
+        self.assertTrue(limiter.hit('a').allowed)
+        refused = limiter.hit('a')
+        self.assertFalse(refused.allowed)
+        self.assertAlmostEqual(refused.retry_after, 1.0)
+
+        now[0] = 1.0
+        self.assertTrue(limiter.hit('a').allowed)
+        for key in 'bcd':
+            limiter.hit(key)
+        self.assertEqual(len(limiter), 3)
+        # 'a' was least recently seen, so it was evicted and starts full again.
+        self.assertEqual(limiter.hit('a').remaining, 1)
+
+
 class TestUserEndpoints(unittest.TestCase):
     """Test user endpoints"""
 
@@ -588,6 +916,2235 @@ class TestReviewEndpoints(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data['text'], 'Updated review')
 
+    def test_list_reviews_for_place(self):
+        """Test that a place lists only its own reviews"""
+        other_place = Place(
+            title='Other Place',
+            price=50.0,
+            latitude=10.0,
+            longitude=10.0,
+            owner_id=self.owner.id
+        )
+        db.session.add(other_place)
+        db.session.flush()
+        db.session.add_all(
+            [
+                Review(
+                    text='Nice', rating=4, user_id=self.user.id, place_id=self.place.id
+                ),
+                Review(
+                    text='Great',
+                    rating=5,
+                    user_id=self.owner.id,
+                    place_id=self.place.id,
+                ),
+                Review(
+                    text='Meh', rating=2, user_id=self.user.id, place_id=other_place.id
+                ),
+            ]
+        )
+        db.session.commit()
+
+        response = self.client.get(
+            f'/api/v1/places/{self.place.id}/reviews?sort=-rating'
+        )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([r['text'] for r in data], ['Great', 'Nice'])
+        self.assertEqual(response.headers['X-Total-Count'], '2')
+
+        response = self.client.get('/api/v1/places/missing/reviews')
+        self.assertEqual(response.status_code, 404)
+
+    def test_reviews_by_place_uses_index(self):
+        """Test that reviews are looked up by place through an index"""
+        stmt = select(Review).where(Review.place_id == self.place.id)
+        plan = db.session.execute(
+            text(
+                'EXPLAIN QUERY PLAN '
+                + str(stmt.compile(compile_kwargs={'literal_binds': True}))
+            )
+        ).all()
+        self.assertIn('USING INDEX', ' '.join(row[-1] for row in plan))
+
+    def test_review_writes_maintain_place_rating(self):
+        """Test that creating, updating and deleting reviews keeps place ratings"""
+        headers = {'Authorization': f'Bearer {self.user_token}'}
+        place_id = self.place.id
+        response = self.client.post('/api/v1/reviews/', headers=headers, json={
+            'text': 'Good', 'rating': 4, 'user_id': self.user.id, 'place_id': place_id})
+        self.assertEqual(response.status_code, 201)
+        review_id = json.loads(response.data)['id']
+        db.session.add(
+            Review(text='Meh', rating=2, user_id=self.owner.id, place_id=place_id)
+        )
+        facade.place_repo.adjust_ratings([(place_id, 2, 1)])
+        db.session.commit()
+
+        rating = self.client.get(f'/api/v1/places/{place_id}').get_json()['rating']
+        self.assertEqual(rating['count'], 2)
+        self.assertEqual(rating['average'], 3.0)
+        self.assertEqual(rating['histogram'], {'1': 0, '2': 1, '3': 0, '4': 1, '5': 0})
+
+        response = self.client.put(f'/api/v1/reviews/{review_id}', headers=headers,
+                                   json={'rating': 5})
+        self.assertEqual(response.status_code, 200)
+        rating = self.client.get(f'/api/v1/places/{place_id}').get_json()['rating']
+        self.assertEqual(rating['average'], 3.5)
+        self.assertEqual(rating['histogram']['4'], 0)
+        self.assertEqual(rating['histogram']['5'], 1)
+
+        response = self.client.put(f'/api/v1/reviews/{review_id}', headers=headers,
+                                   json={'rating': 9})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.delete(f'/api/v1/reviews/{review_id}', headers=headers)
+        self.assertEqual(response.status_code, 204)
+        rating = self.client.get(f'/api/v1/places/{place_id}').get_json()['rating']
+        self.assertEqual(rating['count'], 1)
+        self.assertEqual(rating['average'], 2.0)
+
+    def test_batch_review_writes_maintain_place_rating(self):
+        """Test that repository update_many and delete_many keep place ratings"""
+        created, errors = facade.create_reviews(
+            [
+                {
+                    'text': 'Good',
+                    'rating': 4,
+                    'user_id': self.user.id,
+                    'place_id': self.place.id,
+                },
+                {
+                    'text': 'Meh',
+                    'rating': 2,
+                    'user_id': self.owner.id,
+                    'place_id': self.place.id,
+                },
+            ]
+        )
+        self.assertEqual(errors, [])
+        good, meh = (r.id for r in created)
+
+        facade.review_repo.update_many({good: {'rating': 5}, meh: {'text': 'Okay'}})
+        place = db.session.get(Place, self.place.id)
+        self.assertEqual((place.review_count, place.rating_sum), (2, 7))
+        self.assertEqual((place.rating_4, place.rating_5), (0, 1))
+
+        with self.assertRaises(ValueError):
+            facade.review_repo.update_many({meh: {'rating': 9}})
+
+        facade.review_repo.delete_many([good, 'missing'])
+        place = db.session.get(Place, self.place.id)
+        self.assertEqual((place.review_count, place.rating_avg), (1, 2.0))
+        self.assertEqual(place.rating_5, 0)
+
+    def test_rebuild_place_ratings(self):
+        """Test that rating aggregates can be rebuilt from the reviews table"""
+        db.session.add(
+            Review(text='Fine', rating=3, user_id=self.user.id, place_id=self.place.id)
+        )
+        db.session.add(
+            Review(
+                text='Great', rating=5, user_id=self.owner.id, place_id=self.place.id
+            )
+        )
+        db.session.commit()
+        self.assertEqual(self.place.review_count, 0)
+
+        self.assertEqual(facade.rebuild_place_ratings(), 1)
+        place = db.session.get(Place, self.place.id)
+        self.assertEqual(place.review_count, 2)
+        self.assertEqual(place.rating_sum, 8)
+        self.assertEqual(place.rating_avg, 4.0)
+        self.assertEqual((place.rating_3, place.rating_5), (1, 1))
+
+    def test_sort_places_by_rating(self):
+        """Test that places can be listed best rated first"""
+        db.session.add(
+            Review(text='Great', rating=5, user_id=self.user.id, place_id=self.place.id)
+        )
+        db.session.commit()
+        facade.rebuild_place_ratings()
+
+        response = self.client.get('/api/v1/places/?sort=-rating&limit=1')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data[0]['id'], self.place.id)
+        self.assertEqual(data[0]['rating']['average'], 5.0)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+        response = self.client.get('/api/v1/places/?sort=-rating&limit=1&cursor='
+                                   + response.headers['X-Next-Cursor'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(json.loads(response.data)[0]['id'], self.place.id)
+
+    def _add_reviews(self, count, offset=0):
+        owner_id = db.session.merge(self.owner).id
+        for i in range(offset, offset + count):
+            author = User(
+                first_name="Author", last_name=str(i), email=f"author{i}@example.com"
+            )
+            db.session.add(author)
+            db.session.flush()
+            place = Place(title=f'Place {i}', price=10.0, latitude=1.0,
+                          longitude=1.0, owner_id=owner_id)
+            db.session.add(place)
+            db.session.flush()
+            db.session.add(
+                Review(text='Nice', rating=4, user_id=author.id, place_id=place.id)
+            )
+        db.session.commit()
+
+    def _count_review_list_queries(self):
+        db.session.expunge_all()
+        statements, response = record_statements(self.client.get, '/api/v1/reviews/')
+        self.assertEqual(response.status_code, 200)
+        return len(statements), json.loads(response.data)
+
+    def test_list_reviews_batches_users_and_places(self):
+        """Test that review authors and places are loaded in batches"""
+        self._add_reviews(3)
+        small_count, small_data = self._count_review_list_queries()
+
+        self._add_reviews(15, offset=3)
+        large_count, large_data = self._count_review_list_queries()
+
+        self.assertEqual(len(large_data), len(small_data) + 15)
+        self.assertEqual(small_count, large_count)
+        # count, page, users, places, plus the table versions behind the ETag
+        self.assertLessEqual(large_count, 5)
+        review = next(r for r in large_data if r['place']['title'] == 'Place 7')
+        self.assertEqual(review['user']['email'], 'author7@example.com')
+
+    def test_create_review_unknown_place(self):
+        """Test creating a review for a place that does not exist"""
+        response = self.client.post(
+            '/api/v1/reviews/',
+            headers={'Authorization': f'Bearer {self.user_token}'},
+            json={
+                'text': 'Nice',
+                'rating': 5,
+                'user_id': self.user.id,
+                'place_id': 'missing',
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.data)['error'], 'Place not found')
+
+
+class TestPlaceListQueries(unittest.TestCase):
+    """Test that the place listing runs a fixed number of queries"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.amenities = [Amenity(name=f'Amenity {i}') for i in range(3)]
+        db.session.add_all(self.amenities)
+        db.session.commit()
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add_places(self, count, offset=0):
+        for i in range(offset, offset + count):
+            owner = User(
+                first_name="Owner",
+                last_name=str(i),
+                email=f"owner{i}@example.com",
+            )
+            db.session.add(owner)
+            db.session.flush()
+            db.session.add(Place(
+                title=f'Place {i}',
+                description='Test',
+                price=50.0 + i,
+                latitude=40.0,
+                longitude=-74.0,
+                owner_id=owner.id,
+                amenities=list(self.amenities),
+            ))
+        db.session.commit()
+
+    def _count_list_queries(self):
+        db.session.expunge_all()
+        statements, response = record_statements(self.client.get, '/api/v1/places/')
+        self.assertEqual(response.status_code, 200)
+        return len(statements), json.loads(response.data)
+
+    def test_list_places_query_count_is_constant(self):
+        """Test that listing places does not issue per-row queries"""
+        self._add_places(5)
+        small_count, small_data = self._count_list_queries()
+
+        self._add_places(20, offset=5)
+        large_count, large_data = self._count_list_queries()
+
+        self.assertEqual(len(large_data), len(small_data) + 20)
+        self.assertEqual(small_count, large_count)
+        # count, page, amenities, plus the table versions behind the ETag
+        self.assertLessEqual(large_count, 4)
+
+    def test_list_places_includes_owner_and_amenities(self):
+        """Test that listed places embed owner and amenities"""
+        self._add_places(1)
+        _, data = self._count_list_queries()
+        place = next(p for p in data if p['title'] == 'Place 0')
+        self.assertEqual(place['owner']['email'], 'owner0@example.com')
+        self.assertEqual(len(place['amenities']), 3)
+
+
+class TestPagination(unittest.TestCase):
+    """Test keyset pagination on list endpoints"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.owner = User(
+            first_name="Owner",
+            last_name="User",
+            email="owner@example.com",
+        )
+        db.session.add(self.owner)
+        db.session.flush()
+        for i in range(7):
+            db.session.add(Place(
+                title=f'Place {i}',
+                price=100.0 if i % 2 else 20.0 + i,
+                latitude=40.0,
+                longitude=-74.0,
+                owner_id=self.owner.id,
+            ))
+        db.session.commit()
+        self.total = len(db.session.query(Place).all())
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _walk(self, url):
+        pages, items = 0, []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(int(response.headers['X-Total-Count']), self.total)
+            items.extend(json.loads(response.data))
+            pages += 1
+            cursor = response.headers.get('X-Next-Cursor')
+            url = (
+                f'/api/v1/places/?limit=4&sort=price&cursor={cursor}'
+                if cursor
+                else None
+            )
+        return pages, items
+
+    def test_pages_cover_all_rows_in_order(self):
+        """Test that following cursors returns every row once, sorted"""
+        pages, items = self._walk('/api/v1/places/?limit=4&sort=price')
+        self.assertEqual(pages, -(-self.total // 4))
+        self.assertEqual(len({p['id'] for p in items}), self.total)
+        keys = [(p['price'], p['id']) for p in items]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_descending_sort(self):
+        """Test descending order with a - prefix"""
+        response = self.client.get('/api/v1/places/?limit=3&sort=-price')
+        prices = [p['price'] for p in json.loads(response.data)]
+        self.assertEqual(prices, sorted(prices, reverse=True))
+
+    def test_invalid_parameters(self):
+        """Test that bad limit, sort or cursor values are rejected"""
+        for query in ('limit=0', 'limit=abc', 'sort=title', 'cursor=garbage'):
+            response = self.client.get(f'/api/v1/places/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            response = self.client.get(f'/api/v1/amenities/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('error', json.loads(response.data), query)
+
+    def test_tampered_cursors_are_rejected(self):
+        """Test that every malformed cursor part gives 400 rather than 500"""
+        from app.persistence.repository import encode_cursor
+
+        place_id = db.session.query(Place).first().id
+        cursors = {
+            'price': [
+                ('price', 'abc', place_id),
+                ('price', {'x': 1}, place_id),
+                ('price', 1, {'a': 1}),
+                ('price', True, place_id),
+                ('price', None, place_id),
+                ('price', 1, 5),
+                ('-price', 1, place_id),
+                ('created_at', 1, place_id),
+            ],
+            'created_at': [
+                ('created_at', 'yesterday', place_id),
+                ('created_at', 12, place_id),
+                ('created_at', ['2024-01-01'], place_id),
+            ],
+            'rating': [('rating', '4.5', place_id)],
+        }
+        for sort, shapes in cursors.items():
+            for shape in shapes:
+                cursor = encode_cursor(*shape)
+                response = self.client.get(
+                    f'/api/v1/places/?sort={sort}&cursor={cursor}'
+                )
+                self.assertEqual(response.status_code, 400, shape)
+                self.assertEqual(
+                    json.loads(response.data)['error'], 'Invalid cursor', shape
+                )
+
+        cursor = encode_cursor('rating', 'bad', place_id)
+        response = self.client.get(f'/api/v1/reviews/?sort=rating&cursor={cursor}')
+        self.assertEqual(response.status_code, 400)
+
+
+class TestPlaceFilters(unittest.TestCase):
+    """Test server-side place filtering"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.owner = User(first_name="Owner", last_name="One", email="one@example.com")
+        self.other = User(first_name="Owner", last_name="Two", email="two@example.com")
+        self.pool = Amenity(name='Pool')
+        self.parking = Amenity(name='Parking')
+        db.session.add_all([self.owner, self.other, self.pool, self.parking])
+        db.session.flush()
+
+        def place(title, price, owner, amenities):
+            return Place(title=title, price=price, latitude=10.0, longitude=10.0,
+                         owner_id=owner.id, amenities=amenities)
+
+        db.session.add_all([
+            place('Both', 60.0, self.owner, [self.pool, self.parking]),
+            place('Pool only', 40.0, self.owner, [self.pool]),
+            place('Parking only', 90.0, self.other, [self.parking]),
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _titles(self, query):
+        response = self.client.get(f'/api/v1/places/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return sorted(p['title'] for p in json.loads(response.data))
+
+    def test_price_range(self):
+        """Test min_price and max_price bounds"""
+        self.assertEqual(
+            self._titles('min_price=40&max_price=60'), ['Both', 'Pool only']
+        )
+
+    def test_amenities_all_of(self):
+        """Test that every requested amenity must be present"""
+        self.assertEqual(self._titles(f'amenity={self.pool.id}'), ['Both', 'Pool only'])
+        self.assertEqual(
+            self._titles(f'amenity={self.pool.id}&amenity={self.parking.id}'), ['Both']
+        )
+        self.assertEqual(
+            self._titles(f'amenity={self.pool.id},{self.parking.id}'), ['Both']
+        )
+
+    def test_owner_filter(self):
+        """Test filtering by owner combined with price"""
+        self.assertEqual(
+            self._titles(f'owner_id={self.owner.id}&max_price=50'), ['Pool only']
+        )
+
+    def test_invalid_filter(self):
+        """Test that non-numeric or inverted price bounds are rejected"""
+        for query in ('min_price=abc', 'min_price=50&max_price=10'):
+            response = self.client.get(f'/api/v1/places/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class TestPlaceGeoSearch(unittest.TestCase):
+    """Test spatial place queries against a brute-force scan"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.owner = User(first_name="Geo", last_name="Owner", email="geo@example.com")
+        db.session.add(self.owner)
+        db.session.flush()
+        rng = random.Random(42)
+        points = [(rng.uniform(47, 49), rng.uniform(1, 4)) for _ in range(150)]
+        points += [(rng.uniform(-5, 5), rng.choice([-1, 1]) * rng.uniform(178, 180))
+                   for _ in range(30)]
+        for i, (lat, lon) in enumerate(points):
+            db.session.add(Place(title=f'Geo {i}', price=10.0, latitude=lat,
+                                 longitude=lon, owner_id=self.owner.id))
+        db.session.commit()
+        self.places = db.session.query(Place).all()
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_near_matches_brute_force(self):
+        """Test radius search returns the same places, nearest first"""
+        lat, lon, radius = 48.0, 2.5, 40
+        expected = sorted(
+            (haversine_km(lat, lon, p.latitude, p.longitude), p.id) for p in self.places
+        )
+        expected = [pid for d, pid in expected if d <= radius][:20]
+
+        response = self.client.get(
+            f'/api/v1/places/near?lat={lat}&lon={lon}&radius_km={radius}&limit=20')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([p['id'] for p in data], expected)
+        distances = [p['distance_km'] for p in data]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_near_across_antimeridian(self):
+        """Test that a circle crossing longitude 180 finds both sides"""
+        expected = {
+            p.id
+            for p in self.places
+            if haversine_km(0, 179.9, p.latitude, p.longitude) <= 300
+        }
+        response = self.client.get(
+            '/api/v1/places/near?lat=0&lon=179.9&radius_km=300&limit=500'
+        )
+        data = json.loads(response.data)
+        self.assertEqual({p['id'] for p in data}, expected)
+        self.assertTrue(any(p['longitude'] < 0 for p in data))
+
+    def test_near_rejects_bad_radius_and_coordinates(self):
+        """Test that zero, negative and non-finite search parameters are a 400"""
+        for query in ('lat=48&lon=2.5&radius_km=0', 'lat=48&lon=2.5&radius_km=-5',
+                      'lat=48&lon=2.5&radius_km=nan', 'lat=nan&lon=2.5',
+                      'lat=48&lon=inf'):
+            response = self.client.get(f'/api/v1/places/near?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+        response = self.client.get('/api/v1/places/near?lat=48&lon=2.5&radius_km=nan')
+        self.assertEqual(
+            json.loads(response.data)['error'], 'radius_km must be a finite number'
+        )
+
+        response = self.client.get('/api/v1/places/near?lat=48&lon=2.5&limit=500')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(p['distance_km'] <= 10 for p in json.loads(response.data)))
+
+    def test_bbox_and_polygon(self):
+        """Test bounding box and polygon containment"""
+        expected = {p.id for p in self.places
+                    if 47.5 <= p.latitude <= 48.5 and 2 <= p.longitude <= 3}
+        response = self.client.get('/api/v1/places/within?bbox=2,47.5,3,48.5&limit=500')
+        self.assertEqual({p['id'] for p in json.loads(response.data)}, expected)
+
+        response = self.client.get(
+            '/api/v1/places/within?polygon=47.5,2;48.5,2;48.5,3;47.5,3&limit=500')
+        self.assertEqual({p['id'] for p in json.loads(response.data)}, expected)
+
+        response = self.client.get('/api/v1/places/within?polygon=47.5,2;48.5,2')
+        self.assertEqual(response.status_code, 400)
+
+
+class TestPlaceClusters(unittest.TestCase):
+    """Test incrementally maintained map clusters"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = User(first_name="Map", last_name="Owner", email="map@example.com")
+        db.session.add(owner)
+        db.session.commit()
+        rng = random.Random(7)
+        self.places = [
+            facade.create_place({
+                'title': f'Map {i}', 'price': 10.0, 'owner_id': owner.id,
+                'latitude': rng.uniform(30, 50), 'longitude': rng.uniform(-10, 20),
+            })
+            for i in range(40)
+        ]
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _clusters(self, bbox, zoom):
+        response = self.client.get(f'/api/v1/places/clusters?bbox={bbox}&zoom={zoom}')
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data)
+
+    def _snapshot(self):
+        return sorted(
+            (c.level, c.cell, c.count, round(c.lat_sum, 6), round(c.lon_sum, 6))
+            for c in db.session.query(PlaceCluster).all()
+        )
+
+    def test_counts_match_places(self):
+        """Test that clusters in a viewport add up to the places inside it"""
+        data = self._clusters('-10,30,20,50', 4)
+        total = sum(c['count'] for c in data['clusters'])
+        inside = [p for p in db.session.query(Place).all()
+                  if 30 <= p.latitude <= 50 and -10 <= p.longitude <= 20]
+        self.assertEqual(total, len(inside))
+        for cluster in data['clusters']:
+            west, south, east, north = cluster['bounds']
+            self.assertTrue(south <= cluster['latitude'] <= north)
+            self.assertTrue(west <= cluster['longitude'] <= east)
+
+    def test_invalid_zoom(self):
+        """Test that a bad zoom is reported without Python's own message"""
+        for zoom, message in (
+            ('abc', 'zoom must be an integer'),
+            ('-1', 'zoom must not be negative'),
+        ):
+            response = self.client.get(
+                f'/api/v1/places/clusters?bbox=0,0,20,20&zoom={zoom}'
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.get_json(), {'error': message})
+
+    def test_writes_keep_clusters_in_sync(self):
+        """Test that update and delete match a full rebuild"""
+        facade.update_place(self.places[0].id, {'latitude': -33.9, 'longitude': 18.4})
+        facade.update_place(
+            self.places[1].id, {'latitude': self.places[1].latitude + 0.001}
+        )
+        facade.delete_place(self.places[2].id)
+        incremental = self._snapshot()
+
+        facade.rebuild_place_clusters()
+        self.assertEqual(incremental, self._snapshot())
+        data = self._clusters('18,-34,19,-33', 10)
+        self.assertEqual(sum(c['count'] for c in data['clusters']), 1)
+
+    def test_batch_writes_keep_clusters_in_sync(self):
+        """Test that repository update_many and delete_many match a full rebuild"""
+        facade.place_repo.update_many({
+            self.places[0].id: {'latitude': -33.9, 'longitude': 18.4},
+            self.places[1].id: {'price': 99.0},
+        })
+        facade.place_repo.delete_many([self.places[2].id, self.places[3].id])
+        incremental = self._snapshot()
+
+        facade.rebuild_place_clusters()
+        self.assertEqual(incremental, self._snapshot())
+        data = self._clusters('18,-34,19,-33', 10)
+        self.assertEqual(sum(c['count'] for c in data['clusters']), 1)
+
+
+class TestPlaceSearch(unittest.TestCase):
+    """Test full-text place search"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = User(first_name="Search", last_name="Owner", email="search@example.com")
+        db.session.add(owner)
+        db.session.commit()
+        self.owner_id = owner.id
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _create(self, title, description):
+        return facade.create_place({
+            'title': title, 'description': description, 'price': 10.0,
+            'latitude': 0.0, 'longitude': 0.0, 'owner_id': self.owner_id,
+        })
+
+    def _search(self, query):
+        response = self.client.get(f'/api/v1/places/search?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response, json.loads(response.data)
+
+    def test_index_follows_writes(self):
+        """Test that creates, updates and deletes are searchable at once"""
+        place = self._create('Lakeside cabin', 'Quiet <b>retreat</b> by the water')
+        _, data = self._search('q=lakeside')
+        self.assertEqual([p['id'] for p in data], [place.id])
+        self.assertEqual(data[0]['search']['title'], '<mark>Lakeside</mark> cabin')
+
+        _, data = self._search('q=retreat')
+        self.assertIn(
+            '&lt;b&gt;<mark>retreat</mark>&lt;/b&gt;', data[0]['search']['description']
+        )
+
+        facade.update_place(place.id, {'title': 'Mountain chalet'})
+        self.assertEqual(self._search('q=lakeside')[1], [])
+        self.assertEqual(len(self._search('q=chal')[1]), 1)
+
+        facade.delete_place(place.id)
+        self.assertEqual(self._search('q=chalet')[1], [])
+
+    def test_ranking_and_pagination(self):
+        """Test title matches rank first and cursors walk every hit"""
+        in_description = self._create('Plain room', 'Garden view garden access')
+        in_title = self._create('Garden suite', 'Spacious')
+        for i in range(3):
+            self._create(f'Garden loft {i}', 'Bright')
+
+        response, data = self._search('q=garden&limit=3')
+        self.assertEqual(response.headers['X-Total-Count'], '5')
+        self.assertNotEqual(data[0]['id'], in_description.id)
+        seen = [p['id'] for p in data]
+        _, data = self._search(
+            f"q=garden&limit=3&cursor={response.headers['X-Next-Cursor']}"
+        )
+        seen += [p['id'] for p in data]
+        self.assertEqual(len(set(seen)), 5)
+        self.assertEqual(seen[-1], in_description.id)
+        self.assertIn(in_title.id, seen)
+
+        response = self.client.get('/api/v1/places/search?q=%20%22')
+        self.assertEqual(response.status_code, 400)
+
+
+class TestBulkEndpoints(unittest.TestCase):
+    """Test bulk creation and batch repository operations"""
+
+    def setUp(self):
+        """Set up test environment"""
+        from flask_jwt_extended import create_access_token
+
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = User(first_name="Bulk", last_name="Owner", email="bulk@example.com")
+        other = User(
+            first_name="Bulk", last_name="Other", email="bulk-other@example.com"
+        )
+        self.amenity = Amenity(name='Parking')
+        db.session.add_all([owner, other, self.amenity])
+        db.session.commit()
+        self.owner_id, self.other_id, self.amenity_id = (
+            owner.id,
+            other.id,
+            self.amenity.id,
+        )
+        self.owner_headers = {
+            'Authorization': 'Bearer '
+            + create_access_token(
+                identity=owner.id, additional_claims={'is_admin': False}
+            )
+        }
+        self.admin_headers = {
+            'Authorization': 'Bearer '
+            + create_access_token(
+                identity=owner.id, additional_claims={'is_admin': True}
+            )
+        }
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _place(self, i, **extra):
+        return dict({'title': f'Bulk {i}', 'price': 20.0 + i, 'latitude': 10.0,
+                     'longitude': 20.0}, **extra)
+
+    def test_bulk_create_places(self):
+        """Test that many places are created with one commit"""
+        items = [self._place(i, amenities=[self.amenity_id]) for i in range(20)]
+        commits, response = count_commits(
+            lambda: self.client.post(
+                '/api/v1/places/bulk', json=items, headers=self.owner_headers
+            )
+        )
+        self.assertEqual(response.status_code, 201)
+        data = json.loads(response.data)
+        self.assertEqual(len(data['created']), 20)
+        self.assertEqual(data['errors'], [])
+        self.assertEqual(data['created'][3]['title'], 'Bulk 3')
+        self.assertEqual(data['created'][0]['owner']['id'], self.owner_id)
+        self.assertEqual(data['created'][0]['amenities'][0]['name'], 'Parking')
+        self.assertEqual(commits, 1)
+
+        cluster = db.session.execute(
+            select(PlaceCluster).where(PlaceCluster.level == 0)
+        ).scalars().all()
+        self.assertEqual(sum(c.count for c in cluster), db.session.query(Place).count())
+        response = self.client.get('/api/v1/places/search?q=bulk&limit=100')
+        self.assertEqual(len(json.loads(response.data)), 20)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test per-item errors with partial success and total failure"""
+        items = [
+            self._place(0),
+            self._place(1, price=-5),
+            'oops',
+            self._place(2, latitude='x'),
+        ]
+        response = self.client.post(
+            '/api/v1/places/bulk', json=items, headers=self.owner_headers
+        )
+        self.assertEqual(response.status_code, 207)
+        data = json.loads(response.data)
+        self.assertEqual(len(data['created']), 1)
+        self.assertEqual([e['index'] for e in data['errors']], [1, 2, 3])
+        self.assertEqual(data['errors'][0]['error'], 'Price must be positive')
+
+        no_price = self._place(3)
+        del no_price['price']
+        response = self.client.post(
+            '/api/v1/places/bulk',
+            headers=self.owner_headers,
+            json=[no_price, {'title': 'Nowhere', 'price': 10.0}],
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['error'] for e in json.loads(response.data)['errors']], [
+            'Missing required field: price',
+            'Missing required fields: latitude, longitude',
+        ])
+
+        response = self.client.post(
+            '/api/v1/places/bulk',
+            json=[self._place(0, title='')],
+            headers=self.owner_headers,
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/v1/places/bulk', json={'title': 'x'},
+                                    headers=self.owner_headers)
+        self.assertEqual(response.status_code, 400)
+
+        self.app.config['BULK_MAX_ITEMS'] = 2
+        response = self.client.post(
+            '/api/v1/places/bulk',
+            json=[self._place(i) for i in range(3)],
+            headers=self.owner_headers,
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_reviews_and_amenities(self):
+        """Test bulk review and amenity creation"""
+        place = facade.create_place(dict(self._place(0), owner_id=self.owner_id))
+        place_id = place.id
+        items = [
+            {
+                'text': 'Good',
+                'rating': 4,
+                'user_id': self.owner_id,
+                'place_id': place_id,
+            },
+            {
+                'text': 'Bad',
+                'rating': 2,
+                'user_id': self.owner_id,
+                'place_id': place_id,
+            },
+            {
+                'text': 'Not me',
+                'rating': 5,
+                'user_id': self.other_id,
+                'place_id': place_id,
+            },
+            {
+                'text': 'Nowhere',
+                'rating': 5,
+                'user_id': self.owner_id,
+                'place_id': 'missing',
+            },
+            {'text': 'Unrated', 'user_id': self.owner_id, 'place_id': place_id},
+        ]
+        response = self.client.post(
+            '/api/v1/reviews/bulk', json=items, headers=self.owner_headers
+        )
+        self.assertEqual(response.status_code, 207)
+        data = json.loads(response.data)
+        self.assertEqual([r['text'] for r in data['created']], ['Good', 'Bad'])
+        self.assertEqual(data['created'][0]['place']['id'], place_id)
+        self.assertEqual(
+            data['errors'],
+            [
+                {'index': 2, 'error': 'Unauthorized action'},
+                {'index': 3, 'error': 'Place not found'},
+                {'index': 4, 'error': 'Missing required field: rating'},
+            ],
+        )
+        rating = self.client.get(f'/api/v1/places/{place_id}').get_json()['rating']
+        self.assertEqual((rating['count'], rating['average']), (2, 3.0))
+
+        response = self.client.post('/api/v1/amenities/bulk', json=[{'name': 'Gym'}],
+                                    headers=self.owner_headers)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post(
+            '/api/v1/amenities/bulk',
+            json=[{'name': 'Gym'}, {'name': ''}],
+            headers=self.admin_headers,
+        )
+        self.assertEqual(response.status_code, 207)
+        data = json.loads(response.data)
+        self.assertEqual(data['created'][0]['name'], 'Gym')
+        self.assertEqual(data['errors'][0]['index'], 1)
+
+    def test_bulk_link_and_unlink_amenities(self):
+        """Test linking and unlinking amenities in one request"""
+        mine = facade.create_place(dict(self._place(0), owner_id=self.owner_id)).id
+        theirs = facade.create_place(dict(self._place(1), owner_id=self.other_id)).id
+        pool = facade.create_amenity({'name': 'Pool'}).id
+
+        response = self.client.post(
+            '/api/v1/places/amenities/bulk',
+            headers=self.owner_headers,
+            json={
+                'link': [
+                    {'place_id': mine, 'amenity_id': self.amenity_id},
+                    {'place_id': mine, 'amenity_id': pool},
+                    {'place_id': theirs, 'amenity_id': pool},
+                    {'place_id': mine, 'amenity_id': 'missing'},
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, 207)
+        data = json.loads(response.data)
+        self.assertEqual(data['linked'], 2)
+        self.assertEqual(
+            [(e['list'], e['index'], e['error']) for e in data['errors']],
+            [('link', 2, 'Unauthorized action'), ('link', 3, 'Amenity not found')],
+        )
+        place = self.client.get(f'/api/v1/places/{mine}').get_json()
+        names = {a['name'] for a in place['amenities']}
+        self.assertEqual(names, {'Parking', 'Pool'})
+
+        response = self.client.post(
+            '/api/v1/places/amenities/bulk',
+            headers=self.owner_headers,
+            json={
+                'link': [{'place_id': mine, 'amenity_id': pool}],
+                'unlink': [{'place_id': mine, 'amenity_id': self.amenity_id}],
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual((data['linked'], data['unlinked']), (0, 1))
+        place = self.client.get(f'/api/v1/places/{mine}').get_json()
+        names = {a['name'] for a in place['amenities']}
+        self.assertEqual(names, {'Pool'})
+
+    def test_repository_update_and_delete_many(self):
+        """Test batch updates and deletes through the repository"""
+        created, _ = facade.create_amenities([{'name': f'A{i}'} for i in range(5)])
+        ids = [a.id for a in created]
+        commits, updated = count_commits(lambda: facade.amenity_repo.update_many(
+            {amenity_id: {'name': 'Renamed'} for amenity_id in ids[:3]}))
+        self.assertEqual(commits, 1)
+        self.assertEqual(len(updated), 3)
+        self.assertEqual(facade.get_amenity(ids[0]).name, 'Renamed')
+
+        commits, deleted = count_commits(
+            lambda: facade.amenity_repo.delete_many(ids + ['missing'])
+        )
+        self.assertEqual((commits, deleted), (1, 5))
+        self.assertIsNone(facade.get_amenity(ids[4]))
+
+
+class TestPlaceAmenityUpdates(unittest.TestCase):
+    """Test set-based amenity lookups and diffed association writes"""
+
+    def setUp(self):
+        """Set up test environment"""
+        from flask_jwt_extended import create_access_token
+
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = User(
+            first_name="Amenity", last_name="Owner", email="amenity-owner@example.com"
+        )
+        self.amenities = [Amenity(name=f'Amenity {i}') for i in range(4)]
+        db.session.add(owner)
+        db.session.add_all(self.amenities)
+        db.session.commit()
+        self.owner_id = owner.id
+        self.ids = [a.id for a in self.amenities]
+        self.headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=owner.id, additional_claims={'is_admin': False})}
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _place(self, **extra):
+        return dict({'title': 'Equipped', 'price': 10.0, 'latitude': 1.0,
+                     'longitude': 1.0, 'owner_id': self.owner_id}, **extra)
+
+    def test_create_resolves_amenities_in_one_query(self):
+        """Test that amenity ids are fetched together and echoed back"""
+        db.session.remove()
+        statements, response = record_statements(
+            lambda: self.client.post(
+                '/api/v1/places/',
+                json=self._place(amenities=self.ids),
+                headers=self.headers,
+            )
+        )
+        self.assertEqual(response.status_code, 201)
+        data = json.loads(response.data)
+        self.assertEqual([a['id'] for a in data['amenities']], self.ids)
+        amenity_selects = [s for s in statements
+                           if s.startswith('SELECT') and 'FROM amenities' in s]
+        self.assertEqual(len(amenity_selects), 1)
+
+    def test_unknown_amenities_are_reported(self):
+        """Test that unknown amenity ids are rejected, not dropped"""
+        response = self.client.post('/api/v1/places/', headers=self.headers,
+                                    json=self._place(amenities=[self.ids[0], 'nope']))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            json.loads(response.data)['error'], 'Unknown amenity id(s): nope'
+        )
+
+        place = facade.create_place(self._place(amenities=self.ids[:1]))
+        with self.assertRaises(ValueError):
+            facade.update_place(place.id, {'amenities': ['nope']})
+        self.assertEqual(facade.place_repo.get_amenity_ids(place.id), {self.ids[0]})
+
+    def test_update_writes_only_changed_links(self):
+        """Test that updating amenities inserts and deletes only the difference"""
+        place = facade.create_place(self._place(amenities=self.ids[:3]))
+        place_id = place.id
+
+        statements, _ = record_statements(
+            lambda: facade.update_place(place_id, {'amenities': self.ids[1:]}))
+        inserts = [s for s in statements if s.startswith('INSERT INTO place_amenity')]
+        deletes = [s for s in statements if s.startswith('DELETE FROM place_amenity')]
+        self.assertEqual((len(inserts), len(deletes)), (1, 1))
+        self.assertEqual(facade.place_repo.get_amenity_ids(place_id), set(self.ids[1:]))
+        self.assertEqual(
+            {a.id for a in facade.get_place(place_id).amenities}, set(self.ids[1:])
+        )
+
+        statements, _ = record_statements(
+            lambda: facade.update_place(
+                place_id, {'amenities': list(reversed(self.ids[1:]))}
+            )
+        )
+        writes = [s for s in statements if not s.startswith('SELECT')]
+        self.assertFalse([s for s in writes if 'place_amenity' in s])
+
+
+class TestUnitOfWork(unittest.TestCase):
+    """Test that facade writes can share a single commit"""
+
+    def setUp(self):
+        """Set up test environment"""
+        from flask_jwt_extended import create_access_token
+
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = User(first_name="Unit", last_name="Owner", email="uow@example.com")
+        db.session.add(owner)
+        db.session.commit()
+        self.owner_id = owner.id
+        self.headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=owner.id, additional_claims={'is_admin': True})}
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _place(self, title):
+        return {'title': title, 'price': 10.0, 'latitude': 1.0, 'longitude': 1.0,
+                'owner_id': self.owner_id}
+
+    def test_nested_writes_commit_once(self):
+        """Test that several facade writes inside a unit commit together"""
+        def work():
+            with facade.unit_of_work():
+                amenity = facade.create_amenity({'name': 'Sauna'})
+                with facade.unit_of_work():
+                    place = facade.create_place(
+                        dict(self._place('Spa'), amenities=[amenity.id])
+                    )
+                facade.update_place(place.id, {'price': 20.0})
+            return place.id
+
+        commits, place_id = count_commits(work)
+        self.assertEqual(commits, 1)
+        db.session.remove()
+        place = facade.get_place(place_id)
+        self.assertEqual(place.price, 20.0)
+        self.assertEqual([a.name for a in place.amenities], ['Sauna'])
+
+    def test_exception_rolls_back_everything(self):
+        """Test that a failing step leaves no partial state"""
+        with self.assertRaises(ValueError):
+            with facade.unit_of_work():
+                facade.create_place(self._place('Half done'))
+                facade.create_place(dict(self._place('Broken'), price=-1))
+        self.assertEqual(
+            db.session.query(Place).filter_by(title='Half done').count(), 0
+        )
+
+    def test_requests_commit_at_most_once(self):
+        """Test that an API write costs one commit and failed requests none"""
+        commits, response = count_commits(lambda: self.client.post(
+            '/api/v1/places/', json=self._place('Via API'), headers=self.headers))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(commits, 1)
+
+        commits, response = count_commits(
+            lambda: self.client.post(
+                '/api/v1/places/',
+                json=dict(self._place('Bad'), price=-3),
+                headers=self.headers,
+            )
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(commits, 0)
+
+        commits, response = count_commits(lambda: self.client.get('/api/v1/places/'))
+        self.assertEqual(commits, 0)
+
+
+class TestConditionalGet(unittest.TestCase):
+    """Test ETag / Last-Modified validators on read endpoints"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = User(first_name="Cache", last_name="Owner", email="cache@example.com")
+        db.session.add(owner)
+        db.session.commit()
+        self.owner_id = owner.id
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_list_returns_304_for_matching_etag(self):
+        """Test that a matching If-None-Match is answered without running the handler"""
+        response = self.client.get('/api/v1/places/')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertEqual(response.headers['Cache-Control'], 'public, no-cache')
+        self.assertIn('Last-Modified', response.headers)
+
+        statements, response = record_statements(
+            lambda: self.client.get('/api/v1/places/', headers={'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(len(statements), 1)
+
+        response = self.client.get(
+            '/api/v1/places/?limit=1', headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_change_the_etag(self):
+        """Test that writing a table invalidates the validators that depend on it"""
+        etag = self.client.get('/api/v1/places/').headers['ETag']
+        amenities_etag = self.client.get('/api/v1/amenities/').headers['ETag']
+
+        facade.create_place({
+            'title': 'Fresh', 'price': 10.0, 'latitude': 0.0, 'longitude': 0.0,
+            'owner_id': self.owner_id,
+        })
+        response = self.client.get('/api/v1/places/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+        response = self.client.get(
+            '/api/v1/amenities/', headers={'If-None-Match': amenities_etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        etag = response.headers['ETag']
+        db.session.add(Amenity(name='Sauna'))
+        db.session.rollback()
+        response = self.client.get(
+            '/api/v1/amenities/', headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_review_changes_place_etag(self):
+        """Test that rating updates invalidate place responses"""
+        place = facade.create_place({
+            'title': 'Rated', 'price': 10.0, 'latitude': 0.0, 'longitude': 0.0,
+            'owner_id': self.owner_id,
+        })
+        etag = self.client.get(f'/api/v1/places/{place.id}').headers['ETag']
+        facade.create_review(
+            {
+                'text': 'Nice',
+                'rating': 5,
+                'user_id': self.owner_id,
+                'place_id': place.id,
+            }
+        )
+        response = self.client.get(
+            f'/api/v1/places/{place.id}', headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['rating']['count'], 1)
+
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since is honoured when no ETag is sent"""
+        from datetime import datetime
+        from sqlalchemy import update
+        from werkzeug.http import http_date
+        from app.models.table_version import TableVersion
+
+        db.session.execute(update(TableVersion).values(
+            updated_at=datetime(2020, 1, 1, 12, 0, 0, 500000)))
+        db.session.commit()
+        response = self.client.get('/api/v1/amenities/')
+        last_modified = response.headers['Last-Modified']
+        self.assertEqual(last_modified, 'Wed, 01 Jan 2020 12:00:01 GMT')
+        response = self.client.get('/api/v1/amenities/',
+                                   headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get('/api/v1/amenities/', headers={
+            'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+
+        # A change later in the very second a client was told about.
+        response = self.client.get('/api/v1/amenities/', headers={
+            'If-Modified-Since': 'Wed, 01 Jan 2020 12:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+
+        facade.create_amenity({'name': 'Sauna'})
+        changed = db.session.get(TableVersion, 'amenities').updated_at
+        response = self.client.get('/api/v1/amenities/', headers={
+            'If-Modified-Since': http_date(changed.replace(microsecond=0))})
+        self.assertEqual(response.status_code, 200)
+
+    def test_errors_carry_no_validators(self):
+        """Test that 404 responses are not given an ETag"""
+        response = self.client.get('/api/v1/places/missing')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+    def test_user_etags_differ_per_identity(self):
+        """Test that private responses never share an ETag between users"""
+        from flask_jwt_extended import create_access_token
+
+        other = User(
+            first_name="Other", last_name="User", email="other-cache@example.com"
+        )
+        db.session.add(other)
+        db.session.commit()
+        admin_token = create_access_token(
+            identity='admin', additional_claims={'is_admin': True}
+        )
+        other_token = create_access_token(
+            identity=other.id, additional_claims={'is_admin': False}
+        )
+
+        response = self.client.get(f'/api/v1/users/{other.id}',
+                                   headers={'Authorization': f'Bearer {other_token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+        etag = response.headers['ETag']
+
+        response = self.client.get(f'/api/v1/users/{other.id}', headers={
+            'Authorization': f'Bearer {admin_token}', 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_user_access_is_checked_before_validators(self):
+        """Test that callers who may not read a user get 403, never 304"""
+        from flask_jwt_extended import create_access_token
+
+        other = User(
+            first_name="Other", last_name="User", email="other-cache@example.com"
+        )
+        db.session.add(other)
+        db.session.commit()
+        headers = {
+            'Authorization': 'Bearer ' + create_access_token(
+                identity=other.id, additional_claims={'is_admin': False}),
+            'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT',
+            'If-None-Match': '*',
+        }
+        response = self.client.get(f'/api/v1/users/{self.owner_id}', headers=headers)
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('ETag', response.headers)
+        response = self.client.get('/api/v1/users/', headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(f'/api/v1/users/{other.id}', headers=headers)
+        self.assertEqual(response.status_code, 304)
+
+
+class TestEntityCache(unittest.TestCase):
+    """Test the in-process entity cache behind facade.get_*"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.cache = self.app.extensions['entity_cache']
+
+        owner = User(first_name="Cached", last_name="Owner", email="cached@example.com")
+        db.session.add(owner)
+        db.session.commit()
+        self.owner_id = owner.id
+        self.place = facade.create_place({
+            'title': 'Hot place', 'price': 10.0, 'latitude': 0.0, 'longitude': 0.0,
+            'owner_id': self.owner_id,
+        })
+        self.place_id = self.place.id
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _queries(self, func, *args):
+        db.session.remove()
+        statements, result = record_statements(func, *args)
+        return len(statements), result
+
+    def test_repeated_get_skips_database(self):
+        """Test that a hot id is served from the cache in later sessions"""
+        self._queries(facade.get_place, self.place_id)
+        hits = self.cache.hits
+        count, place = self._queries(facade.get_place, self.place_id)
+        self.assertEqual(count, 0)
+        self.assertEqual(place.title, 'Hot place')
+        self.assertEqual(self.cache.hits, hits + 1)
+        self.assertEqual(place.owner.email, 'cached@example.com')
+
+    def test_writes_invalidate_entries(self):
+        """Test that committed updates, Core writes and deletes are seen at once"""
+        self._queries(facade.get_place, self.place_id)
+        facade.update_place(self.place_id, {'title': 'Renamed'})
+        _, place = self._queries(facade.get_place, self.place_id)
+        self.assertEqual(place.title, 'Renamed')
+
+        facade.create_review({'text': 'Nice', 'rating': 4,
+                              'user_id': self.owner_id, 'place_id': self.place_id})
+        _, place = self._queries(facade.get_place, self.place_id)
+        self.assertEqual(place.review_count, 1)
+
+        facade.delete_place(self.place_id)
+        _, place = self._queries(facade.get_place, self.place_id)
+        self.assertIsNone(place)
+
+    def test_missing_ids_are_cached(self):
+        """Test negative caching and its invalidation when the id appears"""
+        self._queries(facade.get_amenity, 'not-yet')
+        count, amenity = self._queries(facade.get_amenity, 'not-yet')
+        self.assertEqual(count, 0)
+        self.assertIsNone(amenity)
+        self.assertGreaterEqual(self.cache.negative_hits, 1)
+
+        db.session.add(Amenity(name='Pool', id='not-yet'))
+        db.session.commit()
+        _, amenity = self._queries(facade.get_amenity, 'not-yet')
+        self.assertEqual(amenity.name, 'Pool')
+
+    def test_rollback_keeps_entries(self):
+        """Test that uncommitted writes are neither cached nor invalidating"""
+        self._queries(facade.get_place, self.place_id)
+        place = facade.get_place(self.place_id)
+        place.title = 'Uncommitted'
+        db.session.flush()
+        db.session.rollback()
+        count, place = self._queries(facade.get_place, self.place_id)
+        self.assertEqual(count, 0)
+        self.assertEqual(place.title, 'Hot place')
+
+    def test_lru_eviction_and_ttl(self):
+        """Test that the cache stays bounded and entries expire"""
+        self.cache.max_size = 2
+        for obj_id in ('a', 'b', 'c'):
+            self._queries(facade.get_user, obj_id)
+        self.assertEqual(self.cache.stats()['size'], 2)
+        self.assertGreaterEqual(self.cache.evictions, 1)
+
+        self.cache.ttl = 0.01
+        self._queries(facade.get_place, self.place_id)
+        time.sleep(0.02)
+        count, _ = self._queries(facade.get_place, self.place_id)
+        self.assertGreater(count, 0)
+
+
+class TestSparseFieldsets(unittest.TestCase):
+    """Test the fields= query parameter"""
+
+    def setUp(self):
+        """Set up test environment"""
+        from flask_jwt_extended import create_access_token
+
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = User(first_name="Sparse", last_name="Owner", email="sparse@example.com")
+        wifi = Amenity(name="Sauna")
+        db.session.add_all([owner, wifi])
+        db.session.flush()
+        for i in range(3):
+            place = Place(
+                title=f'Sparse {i}',
+                description='Long text ' * 20,
+                price=10.0 + i,
+                latitude=10.0,
+                longitude=10.0 + i / 100,
+                owner_id=owner.id,
+                amenities=[wifi],
+            )
+            db.session.add(place)
+            db.session.flush()
+            db.session.add(
+                Review(text='Fine', rating=4, user_id=owner.id, place_id=place.id)
+            )
+        db.session.commit()
+        self.owner_id = owner.id
+        self.admin_headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=owner.id, additional_claims={'is_admin': True})}
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _get(self, url, **kwargs):
+        db.session.remove()
+        statements, response = record_statements(lambda: self.client.get(url, **kwargs))
+        return response, statements
+
+    def test_place_listing_prunes_columns_and_relationships(self):
+        """Test that a narrow place listing reads only the requested columns"""
+        response, statements = self._get(
+            f'/api/v1/places/?owner_id={self.owner_id}&fields=id,title,price'
+        )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(len(data), 3)
+        for item in data:
+            self.assertEqual(set(item), {'id', 'title', 'price'})
+
+        place_selects = [
+            s for s in statements if 'FROM places' in s and 'count(' not in s
+        ]
+        self.assertEqual(len(place_selects), 1)
+        self.assertNotIn('places.description', place_selects[0])
+        self.assertFalse(
+            [s for s in statements if 'FROM users' in s or 'place_amenity' in s]
+        )
+
+        response, _ = self._get(f'/api/v1/places/?owner_id={self.owner_id}'
+                                 '&fields=title,owner,amenities&sort=-price')
+        data = json.loads(response.data)
+        self.assertEqual(
+            [item['title'] for item in data], ['Sparse 2', 'Sparse 1', 'Sparse 0']
+        )
+        self.assertEqual(data[0]['owner']['first_name'], 'Sparse')
+        self.assertEqual(data[0]['amenities'][0]['name'], 'Sauna')
+
+    def test_unknown_field_is_rejected(self):
+        """Test that asking for a field an endpoint does not have is a 400"""
+        response, _ = self._get('/api/v1/places/?fields=id,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', json.loads(response.data)['error'])
+        response, _ = self._get(
+            '/api/v1/users/?fields=password', headers=self.admin_headers
+        )
+        self.assertEqual(response.status_code, 400)
+        amenity_id = facade.create_amenity({'name': 'Fields'}).id
+        response, _ = self._get(f'/api/v1/amenities/{amenity_id}?fields=secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', json.loads(response.data)['error'])
+
+    def test_reviews_skip_unrequested_lookups(self):
+        """Test that review listings only load the users and places they show"""
+        response, statements = self._get('/api/v1/reviews/?fields=id,rating')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([set(item) for item in data], [{'id', 'rating'}] * 3)
+        self.assertFalse([s for s in statements if 'FROM users' in s])
+        self.assertFalse([s for s in statements if 'FROM places' in s])
+
+        response, _ = self._get('/api/v1/reviews/?fields=rating,user')
+        data = json.loads(response.data)
+        self.assertEqual(data[0]['user']['email'], 'sparse@example.com')
+
+    def test_other_endpoints_trim_output(self):
+        """Test fields= on details, amenities, users and geo search"""
+        place_id = json.loads(self._get(
+            f'/api/v1/places/?owner_id={self.owner_id}&fields=id')[0].data)[0]['id']
+        response, _ = self._get(f'/api/v1/places/{place_id}?fields=title,rating')
+        self.assertEqual(set(json.loads(response.data)), {'title', 'rating'})
+
+        response, _ = self._get('/api/v1/amenities/?fields=name')
+        self.assertIn({'name': 'Sauna'}, json.loads(response.data))
+        self.assertEqual({len(item) for item in json.loads(response.data)}, {1})
+
+        response, _ = self._get(
+            '/api/v1/users/?fields=email', headers=self.admin_headers
+        )
+        self.assertIn({'email': 'sparse@example.com'}, json.loads(response.data))
+
+        response, _ = self._get(
+            '/api/v1/places/near?lat=10&lon=10&fields=title,distance_km'
+        )
+        data = json.loads(response.data)
+        self.assertEqual(set(data[0]), {'title', 'distance_km'})
+        self.assertEqual(data[0]['title'], 'Sparse 0')
+
+        facade.rebuild_place_clusters()
+        response, _ = self._get(
+            '/api/v1/places/clusters?bbox=0,0,20,20&zoom=3&fields=count'
+        )
+        self.assertEqual(json.loads(response.data)['clusters'], [{'count': 3}])
+
+
+class TestStreaming(unittest.TestCase):
+    """Test streamed NDJSON and JSON listings"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.app.config['STREAM_BATCH_SIZE'] = 3
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = User(first_name="Stream", last_name="Owner", email="stream@example.com")
+        db.session.add(owner)
+        db.session.flush()
+        self.place = Place(title='Streamed', price=10.0, latitude=1.0, longitude=1.0,
+                           owner_id=owner.id)
+        db.session.add(self.place)
+        db.session.flush()
+        for i in range(8):
+            db.session.add(Review(text=f'Review {i}', rating=i % 5 + 1,
+                                  user_id=owner.id, place_id=self.place.id))
+        db.session.commit()
+        self.place_id = self.place.id
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_ndjson_stream_matches_paged_listing(self):
+        """Test that every row is streamed, one JSON object per line"""
+        url = f'/api/v1/places/{self.place_id}/reviews?sort=-rating'
+        paged = json.loads(self.client.get(url + '&limit=100').data)
+
+        response = self.client.get(url, headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], paged)
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(lines[0].count('\n'), 0)
+
+    def test_stream_param_returns_json_array(self):
+        """Test that stream=1 streams a single JSON array"""
+        paged = json.loads(
+            self.client.get('/api/v1/reviews/?limit=500&fields=id,text').data
+        )
+        response = self.client.get('/api/v1/reviews/?stream=1&fields=id,text')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), paged)
+
+        response = self.client.get('/api/v1/places/?stream=1&owner_id=nobody')
+        self.assertEqual(json.loads(response.data), [])
+
+        response = self.client.get('/api/v1/amenities/?stream=1&fields=name')
+        self.assertTrue(
+            all(set(item) == {'name'} for item in json.loads(response.data))
+        )
+
+    def test_stream_reads_rows_in_batches(self):
+        """Test that reviews are fetched once and serialized batch by batch"""
+        db.session.remove()
+        statements, data = record_statements(
+            lambda: json.loads(self.client.get('/api/v1/reviews/?stream=1').data))
+        self.assertEqual(len(data), db.session.query(Review).count())
+        review_selects = [s for s in statements if 'FROM reviews' in s]
+        self.assertEqual(len(review_selects), 1)
+        self.assertNotIn('LIMIT', review_selects[0])
+        # Loaders are reset per batch of STREAM_BATCH_SIZE reviews.
+        user_selects = [s for s in statements if 'FROM users' in s]
+        self.assertEqual(len(user_selects), -(-len(data) // 3))
+
+    def test_stream_errors_and_validators(self):
+        """Test that bad arguments fail before streaming and each format has its ETag"""
+        response = self.client.get('/api/v1/reviews/?stream=1&sort=text')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', json.loads(response.data)['error'])
+
+        ndjson = self.client.get(
+            '/api/v1/reviews/', headers={'Accept': 'application/x-ndjson'}
+        )
+        plain = self.client.get('/api/v1/reviews/')
+        self.assertNotEqual(ndjson.headers['ETag'], plain.headers['ETag'])
+        self.assertIn('Accept', [v.strip() for v in ndjson.headers['Vary'].split(',')])
+        response = self.client.get('/api/v1/reviews/', headers={
+            'Accept': 'application/x-ndjson', 'If-None-Match': ndjson.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+
+class TestJsonRepresentation(unittest.TestCase):
+    """Test the API JSON encoder"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_datetimes_are_encoded_as_isoformat(self):
+        """Test that datetimes handed to the encoder match isoformat()"""
+        amenity = Amenity(name='Café ☕')
+        db.session.add(amenity)
+        db.session.commit()
+        response = self.client.get(f'/api/v1/amenities/{amenity.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), amenity.to_dict())
+
+    def test_stdlib_fallback_matches(self):
+        """Test that the encoder without orjson produces the same JSON"""
+        from datetime import datetime
+        from app.api.v1 import representations
+
+        data = {
+            'at': datetime(2024, 5, 1, 12, 30, 0, 250),
+            'name': 'Café',
+            'n': [1, 2.5, None],
+        }
+        fast = representations.dumps(data)
+        saved, representations.orjson = representations.orjson, None
+        try:
+            slow = representations.dumps(data)
+            with self.assertRaises(TypeError):
+                representations.dumps({'x': object()})
+        finally:
+            representations.orjson = saved
+        self.assertEqual(json.loads(fast), json.loads(slow))
+        self.assertEqual(json.loads(slow)['at'], '2024-05-01T12:30:00.000250')
+
+
+class TestCompression(unittest.TestCase):
+    """Test gzip compression of API responses"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app(TestingConfig)
+        self.app.config['STREAM_BATCH_SIZE'] = 5
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = User(first_name="Gzip", last_name="Owner", email="gzip@example.com")
+        db.session.add(owner)
+        db.session.flush()
+        for i in range(30):
+            db.session.add(
+                Place(
+                    title=f'Compressed {i}',
+                    description='Quiet and bright ' * 5,
+                    price=20.0 + i,
+                    latitude=5.0,
+                    longitude=5.0,
+                    owner_id=owner.id,
+                )
+            )
+        db.session.commit()
+        self.gzip = {'Accept-Encoding': 'gzip'}
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_large_responses_are_gzipped(self):
+        """Test negotiated gzip with an encoding-specific ETag"""
+        import gzip
+
+        plain = self.client.get('/api/v1/places/')
+        self.assertNotIn('Content-Encoding', plain.headers)
+
+        response = self.client.get('/api/v1/places/', headers=self.gzip)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertEqual(
+            response.headers['ETag'], plain.headers['ETag'][:-1] + '-gzip"'
+        )
+
+        cached = self.client.get('/api/v1/places/', headers=dict(
+            self.gzip, **{'If-None-Match': response.headers['ETag']}))
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.headers['ETag'], response.headers['ETag'])
+        self.assertEqual(cached.headers['Vary'], response.headers['Vary'])
+
+    def test_small_and_disabled_responses_are_not_compressed(self):
+        """Test the size threshold and the COMPRESS_ENABLED switch"""
+        response = self.client.get(
+            '/api/v1/places/?limit=1&fields=id', headers=self.gzip
+        )
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        self.app.config['COMPRESS_ENABLED'] = False
+        response = self.client.get('/api/v1/places/', headers=self.gzip)
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_streams_are_compressed_incrementally(self):
+        """Test that a streamed listing is gzipped chunk by chunk"""
+        import zlib
+
+        headers = dict(self.gzip, Accept='application/x-ndjson')
+        response = self.client.get('/api/v1/places/?fields=id,title', headers=headers,
+                                   buffered=False)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        chunks = list(response.response)
+        response.close()
+        self.assertGreater(len(chunks), 2)
+
+        # Every chunk but the trailer is flushed, so it decodes on its own.
+        decoder = zlib.decompressobj(31)
+        first = decoder.decompress(chunks[0])
+        self.assertTrue(first.endswith(b'\n'))
+        lines = (
+            first + b''.join(decoder.decompress(c) for c in chunks[1:])
+        ).splitlines()
+        self.assertEqual(len(lines), db.session.query(Place).count())
+
+
+# Tables as created by the code before places had geo cells and ratings.
+BASELINE_SCHEMA = [
+    """CREATE TABLE users (first_name VARCHAR(128) NOT NULL,
+        last_name VARCHAR(128) NOT NULL, email VARCHAR(128) NOT NULL,
+        password VARCHAR(256), is_admin BOOLEAN, id VARCHAR(36) NOT NULL,
+        created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL,
+        PRIMARY KEY (id))""",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    """CREATE TABLE amenities (name VARCHAR(50) NOT NULL, id VARCHAR(36) NOT NULL,
+        created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL,
+        PRIMARY KEY (id))""",
+    """CREATE TABLE places (title VARCHAR(100) NOT NULL, description VARCHAR(500),
+        price FLOAT NOT NULL, latitude FLOAT NOT NULL, longitude FLOAT NOT NULL,
+        owner_id VARCHAR(36) NOT NULL, id VARCHAR(36) NOT NULL,
+        created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, PRIMARY KEY (id),
+        FOREIGN KEY(owner_id) REFERENCES users (id))""",
+    """CREATE TABLE place_amenity (place_id VARCHAR(36) NOT NULL,
+        amenity_id VARCHAR(36) NOT NULL, PRIMARY KEY (place_id, amenity_id),
+        FOREIGN KEY(place_id) REFERENCES places (id),
+        FOREIGN KEY(amenity_id) REFERENCES amenities (id))""",
+    """CREATE TABLE reviews (text VARCHAR(500) NOT NULL, rating INTEGER NOT NULL,
+        user_id VARCHAR(36) NOT NULL, place_id VARCHAR(36) NOT NULL,
+        id VARCHAR(36) NOT NULL, created_at DATETIME NOT NULL,
+        updated_at DATETIME NOT NULL, PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id),
+        FOREIGN KEY(place_id) REFERENCES places (id))""",
+]
+BASELINE_OWNER = '00000000-0000-4000-8000-000000000001'
+BASELINE_PLACES = {
+    '00000000-0000-4000-8000-000000000011': (40.7128, -74.0060),
+    '00000000-0000-4000-8000-000000000012': (25.7617, -80.1918),
+}
+BASELINE_RATINGS = [4, 2]
+
+
+def create_baseline_database(path):
+    """A SQLite file with the baseline schema, an owner, two places and some reviews."""
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    now = '2024-01-01 00:00:00.000000'
+    with conn:
+        for statement in BASELINE_SCHEMA:
+            conn.execute(statement)
+        conn.execute(
+            "INSERT INTO users VALUES"
+            " ('Old', 'Owner', 'old@example.com', NULL, 0, ?, ?, ?)",
+            (BASELINE_OWNER, now, now),
+        )
+        for place_id, (lat, lon) in BASELINE_PLACES.items():
+            conn.execute(
+                "INSERT INTO places VALUES ('Old place', NULL, 50.0, ?, ?, ?, ?, ?, ?)",
+                (lat, lon, BASELINE_OWNER, place_id, now, now),
+            )
+        for i, rating in enumerate(BASELINE_RATINGS):
+            conn.execute("INSERT INTO reviews VALUES ('Old review', ?, ?, ?, ?, ?, ?)",
+                         (rating, BASELINE_OWNER, next(iter(BASELINE_PLACES)),
+                          f'00000000-0000-4000-8000-00000000002{i}', now, now))
+    conn.close()
+
+
+class TestSchemaUpgrade(unittest.TestCase):
+    """Test that databases made before the newer columns still start"""
+
+    def setUp(self):
+        """Set up a temporary database file with the baseline schema"""
+        import shutil
+        import tempfile
+
+        self.workdir = tempfile.mkdtemp(prefix='hbnb-test-')
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+        create_baseline_database(self.workdir + '/old.db')
+
+        class FileConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + self.workdir + '/old.db'
+
+        self.config = FileConfig
+
+    def _start(self):
+        app = create_app(self.config)
+        context = app.app_context()
+        context.push()
+        self.addCleanup(context.pop)
+        self.addCleanup(lambda: db.engine.dispose())
+        self.addCleanup(db.session.remove)
+        return app
+
+    def test_places_get_geo_cells_and_clusters(self):
+        """Test that startup adds geo_cell, backfills it and builds the clusters"""
+        from app.persistence import schema
+        from app.persistence.geo import cell_key
+
+        client = self._start().test_client()
+        for place_id, (lat, lon) in BASELINE_PLACES.items():
+            self.assertEqual(
+                db.session.get(Place, place_id).geo_cell, cell_key(lat, lon)
+            )
+        level0 = db.session.query(PlaceCluster).filter_by(level=0).all()
+        self.assertEqual(sum(c.count for c in level0), len(BASELINE_PLACES))
+
+        response = client.get('/api/v1/places/near?lat=40.7&lon=-74&radius_km=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.data)), 1)
+        indexes = {i['name'] for i in db.inspect(db.engine).get_indexes('places')}
+        self.assertIn('ix_places_geo_cell', indexes)
+        # Nothing is left to do on the next start.
+        self.assertEqual(schema.upgrade(db.engine), set())
+
+    def test_places_get_rating_aggregates(self):
+        """Test that startup adds the rating columns and computes them from reviews"""
+        client = self._start().test_client()
+        rated, unrated = BASELINE_PLACES
+        response = client.get(f'/api/v1/places/{rated}')
+        self.assertEqual(response.status_code, 200)
+        rating = json.loads(response.data)['rating']
+        self.assertEqual(rating['count'], len(BASELINE_RATINGS))
+        self.assertEqual(rating['average'], 3.0)
+        self.assertEqual(rating['histogram'], {'1': 0, '2': 1, '3': 0, '4': 1, '5': 0})
+        self.assertEqual(
+            json.loads(client.get(f'/api/v1/places/{unrated}').data)['rating']['count'],
+            0,
+        )
+
+
+class TestSqlitePragmas(unittest.TestCase):
+    """Test the per-connection SQLite tuning used in production"""
+
+    def setUp(self):
+        """Set up an app on a temporary database file with the production pragmas"""
+        import shutil
+        import tempfile
+        from app.config import ProductionConfig
+
+        self.workdir = tempfile.mkdtemp(prefix='hbnb-test-')
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+
+        class FileConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + self.workdir + '/test.db'
+            SQLITE_PRAGMAS = ProductionConfig.SQLITE_PRAGMAS
+            SQLALCHEMY_ENGINE_OPTIONS = ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS
+
+        self.app = create_app(FileConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.engine.dispose()
+        self.app_context.pop()
+
+    def test_every_connection_gets_the_pragmas(self):
+        """Test WAL and friends on pooled connections, not just the first one"""
+        from app.persistence.sqlite import pragma
+
+        with db.engine.connect() as first, db.engine.connect() as second:
+            for conn in (first, second):
+                self.assertEqual(pragma(conn, 'journal_mode'), 'wal')
+                self.assertEqual(pragma(conn, 'synchronous'), 1)
+                self.assertEqual(pragma(conn, 'busy_timeout'), 5000)
+                self.assertEqual(pragma(conn, 'cache_size'), -65536)
+                self.assertEqual(pragma(conn, 'foreign_keys'), 1)
+        self.assertTrue(db.engine.pool._pre_ping)
+        self.assertEqual(self.client.get('/api/v1/places/').status_code, 200)
+
+    def test_foreign_keys_are_enforced(self):
+        """Test that a review pointing at a missing place is refused by SQLite"""
+        from sqlalchemy.exc import IntegrityError
+
+        user = facade.get_user_by_email('admin@example.com')
+        with self.assertRaises(IntegrityError):
+            db.session.execute(
+                text(
+                    "INSERT INTO reviews"
+                    " (id, text, rating, user_id, place_id, created_at, updated_at)"
+                    " VALUES ('r1', 'Nice', 5, :user_id, 'missing',"
+                    " CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+                ),
+                {'user_id': user.id},
+            )
+        db.session.rollback()
+
+    def test_memory_database_is_left_alone(self):
+        """Test that configs without SQLITE_PRAGMAS keep SQLite's defaults"""
+        from app.persistence.sqlite import pragma
+
+        app = create_app(TestingConfig)
+        with app.app_context(), db.engine.connect() as conn:
+            self.assertEqual(pragma(conn, 'foreign_keys'), 0)
+
+
+class TestReadReplica(unittest.TestCase):
+    """Test routing of read requests to a replica database"""
+
+    def setUp(self):
+        """Set up an app whose replica is a SQLite file synced on demand"""
+        import shutil
+        import tempfile
+        from flask_jwt_extended import create_access_token
+
+        self.workdir = tempfile.mkdtemp(prefix='hbnb-test-')
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+
+        class ReplicaConfig(TestingConfig):
+            SQLALCHEMY_REPLICA_URI = 'sqlite:///' + self.workdir + '/replica.db'
+            REPLICA_SYNC_ON_COMMIT = False
+
+        self.app = create_app(ReplicaConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.replica = self.app.extensions['read_replica']
+        self.replica.sync()
+        admin = facade.get_user_by_email('admin@example.com')
+        token = create_access_token(
+            identity=admin.id, additional_claims={'is_admin': True}
+        )
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+        self.engines = []
+
+        def record(engine_name):
+            def listener(conn, cursor, statement, *args):
+                self.engines.append(engine_name)
+            return listener
+
+        for engine, name in ((db.engine, 'primary'), (self.replica.engine, 'replica')):
+            listener = record(name)
+            event.listen(engine, 'before_cursor_execute', listener)
+            self.addCleanup(event.remove, engine, 'before_cursor_execute', listener)
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_reads_use_replica_and_writes_use_primary(self):
+        """Test that GETs only touch the replica and POSTs only the primary"""
+        response = self.client.get('/api/v1/places/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(self.engines), {'replica'})
+
+        self.engines.clear()
+        response = self.client.post(
+            '/api/v1/amenities/', json={'name': 'Sauna'}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(self.engines), {'primary'})
+        amenity_id = response.get_json()['id']
+
+        # The replica has not been synced yet, so it does not know the amenity.
+        self.assertEqual(
+            self.client.get(f'/api/v1/amenities/{amenity_id}').status_code, 404
+        )
+        self.replica.sync()
+        self.assertEqual(
+            self.client.get(f'/api/v1/amenities/{amenity_id}').status_code, 200
+        )
+
+    def test_read_request_sticks_to_primary_after_writing(self):
+        """Test read-your-writes within a read request"""
+        with self.app.test_request_context('/api/v1/amenities/'):
+            self.app.preprocess_request()
+            self.assertEqual(len(facade.get_all_amenities()), 1)
+            self.assertEqual(set(self.engines), {'replica'})
+
+            amenity = facade.create_amenity({'name': 'Hammam'})
+            self.engines.clear()
+            self.assertEqual(facade.get_amenity(amenity.id).name, 'Hammam')
+            self.assertEqual(len(facade.get_all_amenities()), 2)
+            self.assertEqual(set(self.engines), {'primary'})
+
+    def test_sync_on_commit_keeps_replica_current(self):
+        """Test the backup-API sync that a SQLite replica gets after each write"""
+        self.app.config['REPLICA_SYNC_ON_COMMIT'] = True
+        response = self.client.post(
+            '/api/v1/amenities/', json={'name': 'Sauna'}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get(f"/api/v1/amenities/{response.get_json()['id']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['name'], 'Sauna')
+
+    def test_failed_sync_falls_back_to_primary(self):
+        """Test that a failed sync keeps the write and sends reads to the primary"""
+        import sqlite3
+        from unittest import mock
+
+        self.app.config['REPLICA_SYNC_ON_COMMIT'] = True
+        locked = sqlite3.OperationalError('database is locked')
+        with mock.patch(
+            'app.persistence.replica.sqlite3.connect', side_effect=locked
+        ), self.assertLogs(self.app.logger, 'ERROR'):
+            response = self.client.post(
+                '/api/v1/amenities/', json={'name': 'Sauna'}, headers=self.headers
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(self.replica.stale)
+
+        self.engines.clear()
+        response = self.client.get(f"/api/v1/amenities/{response.get_json()['id']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(self.engines), {'primary'})
+
+        self.replica.sync()
+        self.assertFalse(self.replica.stale)
+        self.engines.clear()
+        self.client.get('/api/v1/amenities/')
+        self.assertEqual(set(self.engines), {'replica'})
+
+
+class TestBinaryIds(unittest.TestCase):
+    """Test UUIDv7 ids stored as 16 bytes"""
+
+    def setUp(self):
+        """Set up an app storing time-ordered ids in binary"""
+        from flask_jwt_extended import create_access_token
+
+        class BinaryIdConfig(TestingConfig):
+            ID_VERSION = 7
+            ID_STORAGE = 'binary'
+
+        self.app = create_app(BinaryIdConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        admin = facade.get_user_by_email('admin@example.com')
+        token = create_access_token(
+            identity=admin.id, additional_claims={'is_admin': True}
+        )
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Tear down test environment"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_api_uses_canonical_strings(self):
+        """Test that binary storage is invisible to API clients"""
+        import uuid
+
+        response = self.client.post('/api/v1/places/', json={
+            'title': 'Binary Loft', 'description': 'Sixteen bytes', 'price': 90,
+            'latitude': 10.0, 'longitude': 10.0}, headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        place_id = response.get_json()['id']
+        self.assertEqual(uuid.UUID(place_id).version, 7)
+        self.assertEqual(str(uuid.UUID(place_id)), place_id)
+
+        stored = db.session.execute(
+            text(
+                'SELECT typeof(id), length(id), typeof(owner_id) FROM places'
+                ' WHERE title = :t'
+            ),
+            {'t': 'Binary Loft'},
+        ).one()
+        self.assertEqual(tuple(stored), ('blob', 16, 'blob'))
+
+        response = self.client.get(f'/api/v1/places/{place_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.get_json()['owner']['id'],
+            facade.get_user_by_email('admin@example.com').id,
+        )
+        self.assertEqual(
+            self.client.get(f'/api/v1/places/{place_id.upper()}').status_code, 200
+        )
+        self.assertEqual(self.client.get('/api/v1/places/not-a-uuid').status_code, 404)
+
+        hits = self.client.get('/api/v1/places/search?q=loft').get_json()
+        self.assertEqual([hit['id'] for hit in hits], [place_id])
+
+    def test_migrate_copies_string_ids_to_binary(self):
+        """Test the migration path for a database created with text ids"""
+        import shutil
+        import tempfile
+        from sqlalchemy import create_engine
+        from app.models import ids
+
+        workdir = tempfile.mkdtemp(prefix='hbnb-test-')
+        self.addCleanup(shutil.rmtree, workdir, True)
+
+        class StringIdConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + workdir + '/source.db'
+
+        with create_app(StringIdConfig).app_context():
+            expected = sorted((p.id, p.owner_id) for p in facade.get_all_places())
+            db.engine.dispose()
+
+        source = create_engine(StringIdConfig.SQLALCHEMY_DATABASE_URI)
+        target = create_engine('sqlite:///' + workdir + '/target.db')
+        ids.configure_engine(source, 'string')
+        ids.configure_engine(target, 'binary')
+        copied = ids.migrate(source, target)
+        self.assertEqual(copied['places'], len(expected))
+        self.assertEqual(copied['place_amenity'], len(expected))
+
+        with target.connect() as conn:
+            rows = conn.execute(
+                select(Place.__table__.c.id, Place.__table__.c.owner_id)
+            ).all()
+            self.assertEqual(sorted(tuple(r) for r in rows), expected)
+            lengths = conn.execute(text('SELECT DISTINCT length(id) FROM places'))
+            self.assertEqual(lengths.scalars().all(), [16])
+        with self.assertRaises(ValueError):
+            ids.migrate(source, target)
+        source.dispose()
+        target.dispose()
+
+    def test_migrate_upgrades_a_baseline_database(self):
+        """Test migrating a database made before the newer tables and columns"""
+        import shutil
+        import tempfile
+        from sqlalchemy import create_engine
+        from app.models import ids
+        from app.persistence.geo import cell_key
+
+        workdir = tempfile.mkdtemp(prefix='hbnb-test-')
+        self.addCleanup(shutil.rmtree, workdir, True)
+        create_baseline_database(workdir + '/old.db')
+        source = create_engine('sqlite:///' + workdir + '/old.db')
+        target = create_engine('sqlite:///' + workdir + '/new.db')
+        self.addCleanup(source.dispose)
+        self.addCleanup(target.dispose)
+        ids.configure_engine(source, 'string')
+        ids.configure_engine(target, 'binary')
+
+        copied = ids.migrate(source, target)
+        self.assertEqual(copied['places'], len(BASELINE_PLACES))
+        self.assertEqual(copied['reviews'], len(BASELINE_RATINGS))
+        self.assertEqual(copied['place_clusters'], 0)
+
+        places = Place.__table__
+        with target.connect() as conn:
+            rows = {r.id: r for r in conn.execute(select(places))}
+        self.assertEqual(set(rows), set(BASELINE_PLACES))
+        for place_id, (lat, lon) in BASELINE_PLACES.items():
+            self.assertEqual(rows[place_id].geo_cell, cell_key(lat, lon))
+        rated = rows[next(iter(BASELINE_PLACES))]
+        self.assertEqual(
+            (rated.review_count, rated.rating_sum),
+            (len(BASELINE_RATINGS), sum(BASELINE_RATINGS)),
+        )
+
 
 class TestHealthEndpoint(unittest.TestCase):
     """Test health check endpoint"""
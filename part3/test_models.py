@@ -557,5 +557,53 @@ class TestCascadeDeletes(unittest.TestCase):
         self.assertIsNone(deleted_review)
 
 
+
+class TestIds(unittest.TestCase):
+    """Test id generation and the binary id column type"""
+
+    def test_uuid7_is_time_ordered(self):
+        """Test version/variant bits and ordering of successive UUIDv7s"""
+        import time
+        import uuid
+        from app.models.ids import uuid7
+
+        before = time.time_ns() // 1_000_000
+        values = [uuid7() for _ in range(5000)]
+        self.assertTrue(
+            all(v.version == 7 and v.variant == uuid.RFC_4122 for v in values)
+        )
+        self.assertEqual(values, sorted(values))
+        self.assertEqual([str(v) for v in values], sorted(str(v) for v in values))
+        self.assertEqual(len(set(values)), len(values))
+        self.assertGreaterEqual(values[0].int >> 80, before)
+
+    def test_new_id_follows_config(self):
+        """Test that ID_VERSION picks the UUID version of new ids"""
+        import uuid
+        from app.models.ids import new_id
+
+        app = create_app(TestingConfig)
+        with app.app_context():
+            self.assertEqual(uuid.UUID(new_id()).version, 4)
+            app.config['ID_VERSION'] = 7
+            self.assertEqual(uuid.UUID(new_id()).version, 7)
+
+    def test_binary_column_conversions(self):
+        """Test that ids become 16 bytes and come back as canonical strings"""
+        import uuid
+        from sqlalchemy.dialects import sqlite
+        from app.models.ids import EntityId
+
+        value = str(uuid.uuid4())
+        column_type = EntityId()
+        dialect = sqlite.dialect()
+        self.assertEqual(column_type.process_bind_param(value, dialect), value)
+
+        dialect.binary_ids = True
+        stored = column_type.process_bind_param(value.upper(), dialect)
+        self.assertEqual(stored, uuid.UUID(value).bytes)
+        self.assertEqual(column_type.process_result_value(stored, dialect), value)
+        self.assertEqual(column_type.process_bind_param('not-a-uuid', dialect), b'')
+
 if __name__ == '__main__':
     unittest.main()
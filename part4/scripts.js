@@ -38,7 +38,7 @@ function checkAuthentication() {
     if (token) {
         if (placesList) {
             placesList.innerHTML = '<p class="page-subtitle">Loading places...</p>';
-            fetchPlaces(token);
+            fetchPlaces(token, _selectedMaxPrice());
         }
     } else {
         if (placesList) {
@@ -61,19 +61,41 @@ function _apiErrorMessage(list, status, body) {
     list.innerHTML = '<p class="form-error">' + msg + '</p>';
 }
 
-async function fetchPlaces(token) {
-    const list = document.getElementById('places-list');
-    try {
-        const response = await fetch(`${API_BASE_URL}/api/v1/places/`);
+// List endpoints return one page at a time; follow X-Next-Cursor until the
+// last page. Resolves to { ok, items } or, on an error page, { ok: false,
+// status, text } so callers can report it.
+async function fetchAllPages(url, params) {
+    const items = [];
+    let cursor = null;
+    do {
+        const pageParams = new URLSearchParams(params);
+        if (cursor) pageParams.set('cursor', cursor);
+        const query = pageParams.toString();
+        const response = await fetch(url + (query ? `?${query}` : ''));
         const text = await response.text();
-        let data = [];
+        let data = null;
         try { data = JSON.parse(text); } catch (_) {}
-        if (response.ok && Array.isArray(data)) {
-            allPlaces = data;
-            displayPlaces(data);
+        if (!response.ok || !Array.isArray(data)) {
+            return { ok: false, status: response.status, text: text };
+        }
+        items.push(...data);
+        cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return { ok: true, items: items };
+}
+
+async function fetchPlaces(token, maxPrice) {
+    const list = document.getElementById('places-list');
+    const params = new URLSearchParams();
+    if (maxPrice !== undefined && maxPrice !== '') params.set('max_price', String(maxPrice));
+    try {
+        const result = await fetchAllPages(`${API_BASE_URL}/api/v1/places/`, params);
+        if (result.ok) {
+            allPlaces = result.items;
+            displayPlaces(result.items);
             attachPriceFilter();
         } else {
-            _apiErrorMessage(list, response.status, text.slice(0, 80));
+            _apiErrorMessage(list, result.status, result.text.slice(0, 80));
         }
     } catch (err) {
         console.error('fetchPlaces failed:', err);
@@ -116,12 +138,8 @@ function escapeHtml(text) {
 }
 
 function applyPriceFilter(maxPrice) {
-    const cards = document.querySelectorAll('#places-list .place-card');
-    cards.forEach((card) => {
-        const price = parseFloat(card.getAttribute('data-price')) || 0;
-        const show = maxPrice === '' || price <= maxPrice;
-        card.style.display = show ? '' : 'none';
-    });
+    // Filtering runs server-side (max_price), so re-query instead of hiding cards.
+    fetchPlaces(getCookie('token'), maxPrice);
 }
 
 function attachPriceFilter() {
@@ -129,13 +147,17 @@ function attachPriceFilter() {
     if (!filter) return;
     filter.removeEventListener('change', _onPriceFilterChange);
     filter.addEventListener('change', _onPriceFilterChange);
-    _onPriceFilterChange({ target: filter });
 }
 
-function _onPriceFilterChange(event) {
-    const value = event.target.value;
-    const maxPrice = value === '' ? '' : parseFloat(value);
-    applyPriceFilter(maxPrice);
+function _selectedMaxPrice() {
+    const filter = document.getElementById('price-filter');
+    if (!filter) return '';
+    const maxPrice = parseFloat(filter.value);
+    return isNaN(maxPrice) ? '' : maxPrice;
+}
+
+function _onPriceFilterChange() {
+    applyPriceFilter(_selectedMaxPrice());
 }
 
 function getPlaceIdFromURL() {
@@ -226,10 +248,9 @@ async function fetchPlaceDetails(placeId, token) {
 }
 
 async function fetchReviewsForPlace(placeId) {
-    const response = await fetch(`${API_BASE_URL}/api/v1/reviews/`);
-    const data = await response.json().catch(() => []);
-    if (!response.ok || !Array.isArray(data)) return [];
-    return data.filter((r) => r.place_id === placeId);
+    const url = `${API_BASE_URL}/api/v1/places/${encodeURIComponent(placeId)}/reviews`;
+    const result = await fetchAllPages(url, new URLSearchParams()).catch(() => ({ ok: false }));
+    return result.ok ? result.items : [];
 }
 
 function displayPlaceDetails(place, reviews) {
@@ -3,13 +3,23 @@ Part 4 - Local server: serves static files and proxies /api/* to Part 3 (port 50
 Run from part4 folder: python server.py
 Then open http://127.0.0.1:8000/
 No CORS issues because browser talks only to this server.
+Text assets are sent gzipped to browsers that accept it; API responses are
+relayed as compressed by Part 3.
 """
+import gzip
+import os
+from email.utils import parsedate_to_datetime
 import urllib.request
 import urllib.error
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 
 API_BACKEND = "http://127.0.0.1:5000"
 PORT = 8000
+GZIP_MIN_SIZE = 500
+GZIP_LEVEL = 6
+GZIP_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg", ".txt")
+# path -> (mtime, size, gzipped bytes), so each asset is compressed once.
+_gzip_cache = {}
 
 
 class ProxyHandler(SimpleHTTPRequestHandler):
@@ -20,7 +30,8 @@ class ProxyHandler(SimpleHTTPRequestHandler):
             path_only = self.path.split("?")[0] if "?" in self.path else self.path
             if path_only.rstrip("/") == "":
                 self.path = "/login.html" + (self.path[self.path.index("?"):] if "?" in self.path else "")
-            super().do_GET()
+            if not self._send_gzipped():
+                super().do_GET()
 
     def do_POST(self):
         if self.path.startswith("/api/"):
@@ -40,6 +51,52 @@ class ProxyHandler(SimpleHTTPRequestHandler):
         else:
             self.send_error(404)
 
+    def _accepts_gzip(self):
+        for coding in self.headers.get("Accept-Encoding", "").split(","):
+            name, _, params = coding.strip().partition(";")
+            if name.strip().lower() in ("gzip", "*"):
+                return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+        return False
+
+    def _not_modified(self, mtime):
+        since = self.headers.get("If-Modified-Since")
+        if not since:
+            return False
+        try:
+            return int(mtime) <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError, OverflowError):
+            return False
+
+    def _send_gzipped(self):
+        """Send a text asset gzipped; False when the default handler should serve it."""
+        path = self.translate_path(self.path)
+        if not path.endswith(GZIP_EXTENSIONS) or not os.path.isfile(path):
+            return False
+        stat = os.stat(path)
+        if stat.st_size < GZIP_MIN_SIZE or not self._accepts_gzip():
+            return False
+        if self._not_modified(stat.st_mtime):
+            self.send_response(304)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return True
+        cached = _gzip_cache.get(path)
+        if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+            body = cached[2]
+        else:
+            with open(path, "rb") as f:
+                body = gzip.compress(f.read(), compresslevel=GZIP_LEVEL)
+            _gzip_cache[path] = (stat.st_mtime, stat.st_size, body)
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Last-Modified", self.date_time_string(stat.st_mtime))
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+
     def _proxy_request(self):
         url = API_BACKEND + self.path
         if self.command == "GET" and "?" in self.path:
@@ -54,25 +111,30 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 headers={k: v for k, v in self.headers.items() if k.lower() not in ("host", "connection")},
             )
             with urllib.request.urlopen(req, timeout=10) as resp:
-                self.send_response(resp.status)
-                for k, v in resp.headers.items():
-                    if k.lower() not in ("transfer-encoding", "connection"):
-                        self.send_header(k, v)
-                self.end_headers()
-                self.wfile.write(resp.read())
+                self._relay(resp.status, resp.headers, resp.read())
         except urllib.error.HTTPError as e:
-            self.send_response(e.code)
-            self.end_headers()
+            # 304 Not Modified and API errors arrive here; keep their headers
+            # (ETag, Cache-Control, ...) so browsers can revalidate through us.
             try:
-                self.wfile.write(e.read())
+                body = e.read()
             except Exception:
-                pass
+                body = b""
+            self._relay(e.code, e.headers, body)
         except Exception as e:
             self.send_response(502)
             self.send_header("Content-Type", "text/plain")
             self.end_headers()
             self.wfile.write(f"Proxy error: Part 3 API not reachable ({e})".encode())
 
+    def _relay(self, status, headers, body):
+        self.send_response(status)
+        for k, v in headers.items():
+            if k.lower() not in ("transfer-encoding", "connection"):
+                self.send_header(k, v)
+        self.end_headers()
+        if status != 304 and body:
+            self.wfile.write(body)
+
 
 if __name__ == "__main__":
     server = HTTPServer(("", PORT), ProxyHandler)